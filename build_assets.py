@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Wiley University - Business & Finance Website
+Content-hashed asset build
+
+Stages the site into dist/, writes a content-hashed copy of every PDF form
+and stylesheet (forms/expense-report.pdf -> forms/expense-report.1a2b3c4d5e.pdf),
+records the mapping in dist/asset-manifest.json, points the HTML pages at the
+hashed names and lists them with an immutable Cache-Control in dist/_headers.
+Netlify reads _headers from the published directory after the build, so the
+rules always match the deploy that produced them (netlify.toml has already
+been parsed by the time the build runs).
+
+A hashed name changes whenever its content does, so those files can be cached
+for a year. The original names stay in dist/ for bookmarks and old links.
+
+Only SITE_PATHS are staged. The other tools write goldens, print batches,
+signed and prefilled copies and the submissions database into the repo, and
+the build fails if any of those directories turns up in dist/.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DIST_DIR = os.path.join(BASE_DIR, 'dist')
+MANIFEST_NAME = 'asset-manifest.json'
+HEADERS_NAME = '_headers'
+
+# Assets that get hashed copies (relative to the site root)
+HASHED_ASSETS = (
+    'forms/*.pdf',
+    'css/*.css',
+    'online-forms/css/*.css',
+)
+
+# What gets published (relative to the site root); everything else stays out
+SITE_PATHS = (
+    '*.html',
+    '_headers',
+    '_redirects',
+    'robots.txt',
+    'favicon.ico',
+    'css',
+    'js',
+    'images',
+    'forms',
+    'online-forms',
+    'departments',
+    'policies',
+)
+
+# Files inside SITE_PATHS directories that are not part of the site
+EXCLUDE = (
+    '.*',
+    '__pycache__',
+    '*.py',
+    '*.md',
+)
+
+# Output directories of the repo's tools; none of these may be published
+UNPUBLISHED = (
+    '.build-cache',
+    'visual-goldens',
+    'print-batches',
+    'signed',
+    'prefilled',
+    'filled',
+    'form-data',
+    'submissions',
+)
+
+HASH_LENGTH = 10
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+# href="..." / src="..." attributes in HTML
+LINK_PATTERN = re.compile(r'''(\b(?:href|src)\s*=\s*)(["'])([^"']+)\2''', re.IGNORECASE)
+
+
+def file_hash(path):
+    """Return the SHA-256 hex digest of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hashed_name(rel_path, digest):
+    """forms/expense-report.pdf -> forms/expense-report.<hash>.pdf"""
+    root, ext = posixpath.splitext(rel_path)
+    return f"{root}.{digest[:HASH_LENGTH]}{ext}"
+
+
+def stage_site(site_dir=BASE_DIR, dist_dir=DIST_DIR):
+    """Copy SITE_PATHS into a fresh dist directory"""
+    if os.path.exists(dist_dir):
+        shutil.rmtree(dist_dir)
+    os.makedirs(dist_dir)
+    ignore = shutil.ignore_patterns(*EXCLUDE)
+    for pattern in SITE_PATHS:
+        for path in sorted(glob.glob(os.path.join(site_dir, pattern))):
+            target = os.path.join(dist_dir, os.path.relpath(path, site_dir))
+            if os.path.isdir(path):
+                shutil.copytree(path, target, ignore=ignore)
+            else:
+                shutil.copy2(path, target)
+
+
+def unpublished_paths(dist_dir=DIST_DIR):
+    """Paths in dist/ that belong to an UNPUBLISHED output directory"""
+    found = []
+    for root, dirs, _ in os.walk(dist_dir):
+        for name in sorted(dirs):
+            if name in UNPUBLISHED:
+                found.append(os.path.relpath(os.path.join(root, name), dist_dir).replace(os.sep, '/'))
+        dirs[:] = [name for name in dirs if name not in UNPUBLISHED]
+    return found
+
+
+def minify_stylesheet(path):
+    """Minify a staged stylesheet in place, so its hash names the bytes served"""
+    from minify_site import minify_css
+
+    with open(path, encoding='utf-8') as f:
+        css = f.read()
+    minified = minify_css(css) + '\n'
+    if len(minified) < len(css):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(minified)
+
+
+def hash_assets(dist_dir=DIST_DIR):
+    """Write hashed copies of HASHED_ASSETS (stylesheets minified first) and return the manifest"""
+    manifest = {}
+    for pattern in HASHED_ASSETS:
+        for path in sorted(glob.glob(os.path.join(dist_dir, pattern))):
+            if path.endswith('.css'):
+                minify_stylesheet(path)
+            rel_path = os.path.relpath(path, dist_dir).replace(os.sep, '/')
+            target = hashed_name(rel_path, file_hash(path))
+            shutil.copy2(path, os.path.join(dist_dir, target))
+            manifest[rel_path] = target
+    with open(os.path.join(dist_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write('\n')
+    return manifest
+
+
+def rewrite_url(url, page_dir, manifest):
+    """Return url pointing at the hashed asset, or None if it isn't one"""
+    if re.match(r'^[a-z][a-z0-9+.-]*:|^//|^#', url, re.IGNORECASE):
+        return None
+    path, suffix = re.match(r'([^?#]*)(.*)', url, re.DOTALL).groups()
+    if path.startswith('/'):
+        target = manifest.get(posixpath.normpath(path.lstrip('/')))
+        return f"/{target}{suffix}" if target else None
+    target = manifest.get(posixpath.normpath(posixpath.join(page_dir, path)))
+    if not target:
+        return None
+    return f"{posixpath.relpath(target, page_dir or '.')}{suffix}"
+
+
+def rewrite_html(dist_dir, manifest):
+    """Point links in every HTML page at the hashed assets; return pages changed"""
+    changed = 0
+    for path in glob.glob(os.path.join(dist_dir, '**', '*.html'), recursive=True):
+        rel_dir = posixpath.dirname(os.path.relpath(path, dist_dir).replace(os.sep, '/'))
+        with open(path, encoding='utf-8') as f:
+            html = f.read()
+
+        def replace(match):
+            new_url = rewrite_url(match.group(3), rel_dir, manifest)
+            if new_url is None:
+                return match.group(0)
+            return f"{match.group(1)}{match.group(2)}{new_url}{match.group(2)}"
+
+        rewritten = LINK_PATTERN.sub(replace, html)
+        if rewritten != html:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(rewritten)
+            changed += 1
+    return changed
+
+
+def headers_rules(manifest):
+    """Netlify _headers rules marking every hashed asset immutable"""
+    return ''.join(f"/{target}\n  Cache-Control: {IMMUTABLE}\n" for target in sorted(manifest.values()))
+
+
+def write_headers(dist_dir, manifest):
+    """Append the hashed asset rules to dist/_headers (after any the site itself has)"""
+    path = os.path.join(dist_dir, HEADERS_NAME)
+    existing = ''
+    if os.path.exists(path):
+        with open(path) as f:
+            existing = f.read().rstrip('\n') + '\n\n'
+    with open(path, 'w') as f:
+        f.write(existing + headers_rules(manifest))
+
+
+def build(site_dir=BASE_DIR, dist_dir=DIST_DIR):
+    """Run the full asset build"""
+    stage_site(site_dir, dist_dir)
+    leaked = unpublished_paths(dist_dir)
+    if leaked:
+        raise ValueError(f"Tool output would be published: {', '.join(leaked)}")
+    manifest = hash_assets(dist_dir)
+    pages = rewrite_html(dist_dir, manifest)
+    write_headers(dist_dir, manifest)
+    print(f"Hashed {len(manifest)} assets, rewrote links in {pages} pages -> {dist_dir}")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build dist/ with content-hashed forms and stylesheets")
+    parser.add_argument('--out', default=DIST_DIR, help="output directory (default: dist/)")
+    args = parser.parse_args()
+    try:
+        build(BASE_DIR, os.path.abspath(args.out))
+    except ValueError as error:
+        sys.exit(str(error))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Wiley University - Business & Finance Website
+Responsive image derivatives
+
+Resizes the photos in images/ to a ladder of widths, writes them to
+images/v/ in the built site (dist/ by default, after build_assets.py) and
+gives every <img> that uses them srcset, sizes, width and height attributes.
+Phones then download a variant that matches their screen and the browser
+can reserve the image box before it loads (no layout shift).
+
+Derivatives are cached in .build-cache/images/ by source hash. Needs Pillow;
+without it the stage is skipped and the site ships the original photos.
+"""
+
+import argparse
+import glob
+import hashlib
+import os
+import posixpath
+import re
+import shutil
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+from build_assets import BASE_DIR, DIST_DIR
+
+CACHE_DIR = os.path.join(BASE_DIR, '.build-cache', 'images')
+VARIANT_DIR = 'images/v'
+
+# Variant widths in pixels; a photo shown at 100-120 CSS px needs 1x-3x
+WIDTHS = (120, 240, 360, 480)
+SOURCE_EXTENSIONS = ('.webp', '.jpg', '.jpeg', '.png')
+WEBP_QUALITY = 80
+
+# Display width a phone is assumed to render at (device pixel ratio)
+MOBILE_DPR = 2
+
+IMG_PATTERN = re.compile(r'''<img\b(?:[^>"']|"[^"]*"|'[^']*')*>''', re.IGNORECASE)
+ATTR_PATTERN = re.compile(r'''([a-zA-Z][\w:-]*)\s*=\s*("[^"]*"|'[^']*')''')
+STYLE_WIDTH_PATTERN = re.compile(r'(?:^|;)\s*width\s*:\s*(\d+)px', re.IGNORECASE)
+
+
+def source_hash(path):
+    """Short SHA-256 of an image file"""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:10]
+
+
+def build_variants(path, digest):
+    """Resize one photo to every width below its own; return [(width, height, cache_path)]"""
+    with Image.open(path) as image:
+        src_width, src_height = image.size
+        variants = []
+        for width in WIDTHS:
+            if width >= src_width:
+                break
+            height = round(src_height * width / src_width)
+            cache_path = os.path.join(CACHE_DIR, f"{digest}-{width}.webp")
+            if not os.path.exists(cache_path):
+                resized = image.convert('RGB').resize((width, height), Image.LANCZOS)
+                tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+                resized.save(tmp_path, 'WEBP', quality=WEBP_QUALITY, method=6)
+                os.replace(tmp_path, cache_path)
+            variants.append((width, height, cache_path))
+    variants.append((src_width, src_height, path))
+    return variants
+
+
+def publish_variants(root):
+    """Build and copy variants for every source photo; return {images/x.webp: info}"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    os.makedirs(os.path.join(root, VARIANT_DIR), exist_ok=True)
+    catalog = {}
+    for path in sorted(glob.glob(os.path.join(root, 'images', '*'))):
+        name, ext = os.path.splitext(os.path.basename(path))
+        if ext.lower() not in SOURCE_EXTENSIONS:
+            continue
+        digest = source_hash(path)
+        entries = []
+        for width, height, cache_path in build_variants(path, digest):
+            if cache_path == path:
+                rel_path = f"images/{name}{ext}"
+            else:
+                rel_path = f"{VARIANT_DIR}/{name}-{width}.{digest}.webp"
+                shutil.copyfile(cache_path, os.path.join(root, rel_path))
+            entries.append({'width': width, 'height': height, 'path': rel_path,
+                            'bytes': os.path.getsize(cache_path)})
+        catalog[f"images/{name}{ext}"] = entries
+    return catalog
+
+
+def pick_variant(entries, css_width):
+    """Smallest variant at least css_width pixels wide (or the largest one)"""
+    for entry in entries:
+        if entry['width'] >= css_width:
+            return entry
+    return entries[-1]
+
+
+def rewrite_img(tag, page_dir, catalog, usage):
+    """Add srcset/sizes/width/height to one <img> tag"""
+    attrs = {name.lower(): value[1:-1] for name, value in ATTR_PATTERN.findall(tag)}
+    src = attrs.get('src', '')
+    if re.match(r'^[a-z][a-z0-9+.-]*:|^//', src, re.IGNORECASE) or 'srcset' in attrs:
+        return tag
+    key = posixpath.normpath(src.lstrip('/') if src.startswith('/') else posixpath.join(page_dir, src))
+    entries = catalog.get(key)
+    if not entries:
+        return tag
+
+    original = entries[-1]
+    match = STYLE_WIDTH_PATTERN.search(attrs.get('style', ''))
+    css_width = int(match.group(1)) if match else original['width']
+    css_height = round(css_width * original['height'] / original['width'])
+
+    def url(entry):
+        return '/' + entry['path'] if src.startswith('/') else posixpath.relpath(entry['path'], page_dir or '.')
+
+    fallback = pick_variant(entries, css_width)
+    additions = {
+        'src': url(fallback),
+        'srcset': ', '.join(f"{url(e)} {e['width']}w" for e in entries),
+        'sizes': f"{css_width}px",
+        'width': str(css_width),
+        'height': str(css_height),
+    }
+    usage.append((original['bytes'], fallback['bytes'], pick_variant(entries, css_width * MOBILE_DPR)['bytes']))
+
+    new_tag = tag
+    for name, value in additions.items():
+        if name in attrs and name != 'src':
+            continue
+        if name == 'src':
+            new_tag = re.sub(r'''(\bsrc\s*=\s*)(["'])[^"']*\2''', lambda m: f'{m.group(1)}{m.group(2)}{value}{m.group(2)}',
+                             new_tag, count=1, flags=re.IGNORECASE)
+        else:
+            new_tag = re.sub(r'\s*(/?>)$', lambda m: f' {name}="{value}"{m.group(1)}', new_tag)
+    return new_tag
+
+
+def rewrite_pages(root, catalog):
+    """Rewrite <img> tags in every page; return {page: [(original, 1x, mobile) bytes]}"""
+    report = {}
+    for path in sorted(glob.glob(os.path.join(root, '**', '*.html'), recursive=True)):
+        rel_path = os.path.relpath(path, root).replace(os.sep, '/')
+        with open(path, encoding='utf-8') as f:
+            html = f.read()
+        usage = []
+        rewritten = IMG_PATTERN.sub(lambda m: rewrite_img(m.group(0), posixpath.dirname(rel_path), catalog, usage), html)
+        if usage:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(rewritten)
+            report[rel_path] = usage
+    return report
+
+
+def print_report(report):
+    """Print image bytes per page before and after"""
+    print(f"{'page':<42} {'images':>6} {'original':>10} {'desktop':>10} {'mobile':>10}")
+    totals = [0, 0, 0]
+    for page, usage in report.items():
+        sums = [sum(u[i] for u in usage) for i in range(3)]
+        totals = [a + b for a, b in zip(totals, sums)]
+        print(f"{page:<42} {len(usage):>6} {sums[0]:>10,} {sums[1]:>10,} {sums[2]:>10,}")
+    if totals[0]:
+        print(f"\nImage bytes saved: {totals[0] - totals[1]:,} at 1x ({1 - totals[1] / totals[0]:.0%}), "
+              f"{totals[0] - totals[2]:,} on {MOBILE_DPR}x mobile screens ({1 - totals[2] / totals[0]:.0%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build responsive image variants and srcset markup")
+    parser.add_argument('root', nargs='?', default=DIST_DIR, help="site directory (default: dist/)")
+    args = parser.parse_args()
+
+    if Image is None:
+        print("Pillow is not installed - skipping responsive images (pip install -r requirements.txt)")
+        return
+    catalog = publish_variants(args.root)
+    report = rewrite_pages(args.root, catalog)
+    print(f"Built {sum(len(v) - 1 for v in catalog.values())} variants for {len(catalog)} photos")
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
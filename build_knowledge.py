@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Wiley University - Business & Finance Website
+Chat knowledge base builder
+
+Extracts the department directory (about text, contacts, hours, services,
+staff and forms), division leadership and institution contacts from the
+site pages and the form specs in generate_forms.create_all_forms(), and
+writes them to netlify/functions/knowledge.json. chat.js loads that file
+once per cold start in place of a hand-maintained copy of the same facts.
+
+The file records a hash of every page it was built from and of the form
+specs (not of generate_forms.py, whose drawing code doesn't affect it); when
+none of them changed the build is skipped, so it is cheap to run on every
+edit. The Netlify build runs it before deploying, and --check exits 1 when
+the committed file is out of date.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+from html.parser import HTMLParser
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+KNOWLEDGE_PATH = os.path.join(BASE_DIR, 'netlify', 'functions', 'knowledge.json')
+
+KNOWLEDGE_VERSION = 1
+SITE_URL = 'https://wiley-business-finance.netlify.app'
+
+# Pages and modules the knowledge base is built from (this script included);
+# the form specs are hashed separately
+SOURCES = (
+    'departments/*.html',
+    'index.html',
+    'contact.html',
+    'build_knowledge.py',
+)
+SPECS_SOURCE = 'form specs'
+
+# <h2> headings that introduce a department's service cards
+SERVICE_HEADINGS = ('Our Services', 'Types of Financial Aid')
+
+# Markdown link syntax left in page text: [text](url), or a bare [address]
+MARKDOWN_LINK = re.compile(r'\[([^\]]+)\]\([^)]*\)')
+BRACKETED_ADDRESS = re.compile(r'\[([^\]\s]*[@./][^\]\s]*)\]')
+# Unfilled template cells such as [Date] or [Year]
+PLACEHOLDER = re.compile(r'\[[A-Za-z ]+\]')
+
+VOID_ELEMENTS = frozenset(('area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'wbr'))
+
+
+class Node:
+    """Minimal element tree node"""
+    __slots__ = ('tag', 'attrs', 'children', 'parent')
+
+    def __init__(self, tag, attrs=(), parent=None):
+        self.tag = tag
+        self.attrs = dict(attrs)
+        self.children = []
+        self.parent = parent
+
+    def classes(self):
+        return (self.attrs.get('class') or '').split()
+
+    def iter(self):
+        """This node and all descendant elements, in document order"""
+        yield self
+        for child in self.children:
+            if isinstance(child, Node):
+                yield from child.iter()
+
+    def find_all(self, tag=None, cls=None):
+        return [node for node in self.iter()
+                if (tag is None or node.tag == tag) and (cls is None or cls in node.classes())]
+
+    def find(self, tag=None, cls=None):
+        found = self.find_all(tag, cls)
+        return found[0] if found else None
+
+    def text(self):
+        """Text content with whitespace collapsed; <br> becomes a line break"""
+        parts = []
+        for child in self.children:
+            if isinstance(child, Node):
+                parts.append('\n' if child.tag == 'br' else child.text())
+            else:
+                parts.append(child)
+        text = re.sub(r'[ \t\r\f\v]*\n[ \t\r\f\v\n]*', '\n', re.sub(r'[ \t\r\f\v]+', ' ', ''.join(parts))).strip()
+        return BRACKETED_ADDRESS.sub(r'\1', MARKDOWN_LINK.sub(r'\1', text))
+
+
+class TreeBuilder(HTMLParser):
+    """Parse HTML into a Node tree, closing unclosed elements on the way out"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Node('document')
+        self._current = self.root
+
+    def handle_starttag(self, tag, attrs):
+        node = Node(tag, attrs, self._current)
+        self._current.children.append(node)
+        if tag not in VOID_ELEMENTS:
+            self._current = node
+
+    def handle_endtag(self, tag):
+        node = self._current
+        while node is not self.root and node.tag != tag:
+            node = node.parent
+        if node is not self.root:
+            self._current = node.parent
+
+    def handle_data(self, data):
+        self._current.children.append(data)
+
+
+def parse_page(rel_path, base_dir=BASE_DIR):
+    """Parse a site page into a Node tree"""
+    builder = TreeBuilder()
+    with open(os.path.join(base_dir, rel_path), encoding='utf-8') as f:
+        builder.feed(f.read())
+    builder.close()
+    return builder.root
+
+
+def site_url(href, page_dir):
+    """Relative link on a page -> site-absolute path"""
+    if re.match(r'^[a-z][a-z0-9+.-]*:', href):
+        return href
+    return '/' + os.path.normpath(os.path.join(page_dir, href)).replace(os.sep, '/').lstrip('./')
+
+
+def section_after_heading(root, heading):
+    """The element wrapping the <h2> with this text"""
+    for h2 in root.find_all('h2'):
+        if h2.text() == heading:
+            return h2.parent
+    return None
+
+
+def enclosing_heading(node):
+    """Text of the <h2> in the nearest section around node, or None"""
+    node = node.parent
+    while node is not None:
+        heading = next((child for child in node.children if isinstance(child, Node) and child.tag == 'h2'), None)
+        if heading:
+            return heading.text()
+        node = node.parent
+    return None
+
+
+def staff_cards(container):
+    """[{name, title, unit, section, email, phone}] from .staff-card elements
+
+    section is the heading the card sits under ("Parking Permit Contact"),
+    unit any plain line under the title ("Department of Public Safety/Police
+    Department").
+    """
+    staff = []
+    for card in container.find_all(cls='staff-card') if container else []:
+        entry = {'name': card.find('h4').text()}
+        title = card.find(cls='staff-title')
+        if title:
+            entry['title'] = title.text()
+        unit = next((p for p in card.find_all('p') if not p.classes()), None)
+        if unit:
+            entry['unit'] = unit.text()
+        section = enclosing_heading(card)
+        if section:
+            entry['section'] = section
+        for link in card.find_all('a'):
+            href = link.attrs.get('href', '')
+            if href.startswith('mailto:'):
+                entry['email'] = href[len('mailto:'):]
+            elif href.startswith('tel:'):
+                entry['phone'] = link.text()
+        staff.append(entry)
+    return staff
+
+
+def sidebar_widgets(root):
+    """{header text: widget body node} for the page sidebar"""
+    widgets = {}
+    for widget in root.find_all(cls='sidebar-widget'):
+        header, body = widget.find(cls='sidebar-widget-header'), widget.find(cls='sidebar-widget-body')
+        if header and body:
+            widgets[header.text()] = body
+    return widgets
+
+
+def department_entry(rel_path):
+    """Everything the chat function needs about one department page"""
+    root = parse_page(rel_path)
+    page_dir = os.path.dirname(rel_path)
+    title = root.find('title').text()
+    meta = next((m for m in root.find_all('meta') if m.attrs.get('name') == 'description'), None)
+    about = (meta.attrs.get('content', '') if meta else '')
+    hero = root.find('h1')
+    entry = {
+        'name': hero.text() if hero else title.split('|')[0].strip(),
+        'page': '/' + rel_path,
+        'about': re.sub(r'^.*? at Wiley University - ', '', about),
+    }
+
+    widgets = sidebar_widgets(root)
+    contact = {}
+    if 'Contact Information' in widgets:
+        for p in widgets['Contact Information'].find_all('p'):
+            label = p.find('strong')
+            if label:
+                key = label.text().rstrip(':')
+                value = p.text()[len(label.text()):].strip()
+                contact[key] = value.replace('\n', ' ')
+    entry['contact'] = contact
+    for header, body in widgets.items():
+        if 'Hours' in header:
+            days, times = body.find_all('dt'), body.find_all('dd')
+            entry['hours'] = '; '.join(f"{d.text()}: {t.text()}" for d, t in zip(days, times))
+            break
+
+    for heading in SERVICE_HEADINGS:
+        services = section_after_heading(root, heading)
+        if services:
+            entry['services'] = [h4.text() for h4 in services.find_all('h4')]
+            break
+    staff = staff_cards(root.find('main'))
+    if staff:
+        entry['staff'] = staff
+    deadlines = deadline_tables(root)
+    if deadlines:
+        entry['deadlines'] = deadlines
+    actions = page_actions(root, page_dir)
+    if actions:
+        entry['actions'] = actions
+
+    forms = []
+    listing = section_after_heading(root, 'Forms & Downloads')
+    for item in listing.find_all('li') if listing else []:
+        name = item.find(cls='form-name')
+        if not name:
+            continue
+        form = {'title': name.text()}
+        description = item.find(cls='form-description')
+        if description:
+            form['about'] = description.text()
+        for link in item.find_all('a'):
+            href = site_url(link.attrs.get('href', ''), page_dir)
+            form['pdf' if href.endswith('.pdf') else 'online'] = href
+        forms.append(form)
+    entry['forms'] = forms
+    return entry
+
+
+def deadline_tables(root):
+    """{heading: [{column: cell}]} for tables under headings about deadlines, without placeholder rows"""
+    tables = {}
+    for h2 in root.find_all('h2'):
+        heading = h2.text()
+        table = h2.parent.find('table') if 'Deadline' in heading else None
+        if table is None:
+            continue
+        columns = [th.text() for th in table.find_all('th')]
+        rows = []
+        for tr in table.find_all('tr'):
+            cells = [td.text() for td in tr.find_all('td')]
+            if cells and not any(PLACEHOLDER.search(c) for c in cells):
+                rows.append(dict(zip(columns, cells)))
+        if rows:
+            tables[heading] = rows
+    return tables
+
+
+def page_actions(root, page_dir):
+    """[{label, url}] for the call-to-action buttons in a page's main content (not its form list)"""
+    main = root.find(cls='main-content')
+    listing = section_after_heading(root, 'Forms & Downloads')
+    skip = {id(node) for node in listing.iter()} if listing else set()
+    actions, seen = [], set()
+    for link in main.find_all('a') if main else []:
+        if 'btn' not in link.classes() or id(link) in skip:
+            continue
+        href = link.attrs.get('href', '')
+        if not href or href.startswith('#'):
+            continue
+        url, label = site_url(href, page_dir), link.text()
+        if label and (label, url) not in seen:
+            seen.add((label, url))
+            actions.append({'label': label, 'url': url})
+    return actions
+
+
+def department_slug(name):
+    """'Transportation & Fleet' -> 'transportation-fleet'"""
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+
+
+def merge_spec_forms(departments, specs, base_dir=BASE_DIR):
+    """Add PDF forms from create_all_forms() that a department page doesn't list"""
+    by_slug = {os.path.basename(d['page'])[:-len('.html')]: d for d in departments}
+    for spec in specs:
+        dept_slug = department_slug(spec['department'])
+        department = by_slug.get(dept_slug)
+        if department is None:
+            continue
+        pdf = f"/forms/{spec['filename']}"
+        if any(form.get('pdf') == pdf for form in department['forms']):
+            continue
+        form = {'title': spec['title'], 'pdf': pdf}
+        online = f"online-forms/{dept_slug}/{spec['slug']}.html"
+        if os.path.exists(os.path.join(base_dir, online)):
+            form['online'] = '/' + online
+        if spec['instructions']:
+            form['about'] = spec['instructions']
+        department['forms'].append(form)
+
+
+def institution_entry():
+    """Institution contacts from the home page footer"""
+    root = parse_page('index.html')
+    footer = root.find('footer')
+    text = footer.text()
+    institution = {'name': 'Wiley University', 'website': SITE_URL}
+    founded = re.search(r'Founded in (\d{4})', text)
+    if founded:
+        institution['founded'] = int(founded.group(1))
+    for column in footer.find_all(cls='footer-column'):
+        heading = column.find('h4')
+        if heading and heading.text() == 'Contact':
+            lines = [p.text() for p in column.find_all('p')]
+            institution['address'] = lines[0].replace('\n', ', ')
+            for line in '\n'.join(lines[1:]).split('\n'):
+                key, _, value = line.partition(':')
+                if value:
+                    institution[key.strip().lower()] = value.strip()
+            email = column.find('a')
+            if email:
+                institution['email'] = email.text()
+    return institution
+
+
+def source_hashes(specs, base_dir=BASE_DIR):
+    """{relative path: sha256} for every knowledge source, plus the form specs' hash"""
+    from generate_forms import spec_hash, subtree_hash
+
+    hashes = {SPECS_SOURCE: subtree_hash([spec_hash(spec['title'], spec['department'], spec['fields'],
+                                                    spec['instructions']) for spec in specs])}
+    for pattern in SOURCES:
+        for path in sorted(glob.glob(os.path.join(base_dir, pattern))):
+            with open(path, 'rb') as f:
+                hashes[os.path.relpath(path, base_dir).replace(os.sep, '/')] = hashlib.sha256(f.read()).hexdigest()
+    return hashes
+
+
+def build_knowledge(hashes, specs):
+    """Assemble the knowledge base"""
+    departments = [department_entry(os.path.relpath(path, BASE_DIR).replace(os.sep, '/'))
+                   for path in sorted(glob.glob(os.path.join(BASE_DIR, 'departments', '*.html')))]
+    merge_spec_forms(departments, specs)
+    return {
+        'version': KNOWLEDGE_VERSION,
+        'sources': hashes,
+        'institution': institution_entry(),
+        'leadership': staff_cards(section_after_heading(parse_page('contact.html'), 'Division Leadership')),
+        'departments': departments,
+    }
+
+
+def load_existing(path=KNOWLEDGE_PATH):
+    """The current knowledge file, or None"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def serialize(knowledge):
+    return json.dumps(knowledge, separators=(',', ':'), ensure_ascii=False) + '\n'
+
+
+def main():
+    from generate_forms import load_form_specs
+
+    parser = argparse.ArgumentParser(description="Build the chat function's knowledge base from the site")
+    parser.add_argument('--out', default=KNOWLEDGE_PATH, help="output file (default: netlify/functions/knowledge.json)")
+    parser.add_argument('--force', action='store_true', help="rebuild even if no source changed")
+    parser.add_argument('--check', action='store_true', help="exit 1 if the file is out of date (writes nothing)")
+    args = parser.parse_args()
+
+    specs = load_form_specs()
+    hashes = source_hashes(specs)
+    existing = load_existing(args.out)
+    changed = sorted(path for path, digest in hashes.items()
+                     if not existing or existing.get('sources', {}).get(path) != digest)
+    if args.check:
+        if existing is None or serialize(existing) != serialize(build_knowledge(hashes, specs)):
+            print(f"{args.out} is out of date ({', '.join(changed) or 'content differs'}) - "
+                  f"run build_knowledge.py and commit it", file=sys.stderr)
+            return 1
+        print(f"Knowledge base up to date ({len(hashes)} sources)")
+        return 0
+    if (not args.force and existing and existing.get('version') == KNOWLEDGE_VERSION
+            and existing.get('sources') == hashes):
+        print(f"Knowledge base up to date ({len(hashes)} sources unchanged)")
+        return 0
+
+    knowledge = build_knowledge(hashes, specs)
+    with open(args.out, 'w') as f:
+        f.write(serialize(knowledge))
+    forms = sum(len(d['forms']) for d in knowledge['departments'])
+    print(f"Rebuilt {args.out}: {len(knowledge['departments'])} departments, {forms} forms, "
+          f"{os.path.getsize(args.out):,} bytes ({len(changed)} changed sources)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
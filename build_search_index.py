@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Wiley University - Business & Finance Website
+Search index for the chat function
+
+Splits the policies/, departments/ and online-forms/ pages into short
+passages (one per heading section) and builds a BM25 inverted index over
+them. The index is written to netlify/functions/search-index.json, where
+chat.js loads it once per cold start and sends Claude only the top-k
+passages for each question instead of the whole knowledge base.
+
+BM25 weights are precomputed per posting, so a lookup is a sum of floats
+per query term. The tokenizer is described in the index itself and is
+mirrored by tokenize() in chat.js.
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import re
+import time
+from html.parser import HTMLParser
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INDEX_PATH = os.path.join(BASE_DIR, 'netlify', 'functions', 'search-index.json')
+KNOWLEDGE_PATH = os.path.join(BASE_DIR, 'netlify', 'functions', 'knowledge.json')
+
+SOURCES = (
+    'policies/*.html',
+    'departments/*.html',
+    'online-forms/*/*.html',
+)
+
+INDEX_VERSION = 1
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_PASSAGE_WORDS = 120
+WEIGHT_DIGITS = 3
+
+STOPWORDS = frozenset('''
+a an and are as at be by can do does for from has have how i if in into is it its
+me my of on or our please should that the their them there these this to us was
+we what when where which who will with you your
+'''.split())
+
+# Elements whose text is never passage content
+SKIP_ELEMENTS = frozenset(('script', 'style', 'noscript', 'header', 'nav', 'footer', 'button', 'svg'))
+HEADINGS = frozenset(('h1', 'h2', 'h3', 'h4'))
+BLOCKS = frozenset(('p', 'li', 'td', 'th', 'tr', 'div', 'label', 'option', 'dt', 'dd', 'br'))
+VOID_ELEMENTS = frozenset(('area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'wbr'))
+
+
+def tokenize(text):
+    """Lowercase alphanumeric terms without stopwords, plural 's' stripped (same as chat.js)"""
+    terms = []
+    for term in re.findall(r'[a-z0-9]+', text.lower()):
+        if term in STOPWORDS:
+            continue
+        if len(term) > 4 and term.endswith('s') and not term.endswith('ss'):
+            term = term[:-1]
+        terms.append(term)
+    return terms
+
+
+class PageSections(HTMLParser):
+    """Collect (heading, text) sections from a page, ignoring site chrome"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ''
+        self.sections = []
+        self._heading = ''
+        self._text = []
+        self._heading_text = None
+        self._skip = 0
+        self._in_title = False
+        self._has_main = False
+        self._in_main = 0
+
+    def feed_page(self, html):
+        self._has_main = '<main' in html
+        self.feed(html)
+        self.close()
+        self._flush()
+        return self
+
+    def _flush(self):
+        text = re.sub(r'\s+', ' ', ' '.join(self._text)).strip()
+        if text:
+            self.sections.append((self._heading, text))
+        self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'title':
+            self._in_title = True
+        elif tag == 'main':
+            self._in_main += 1
+        if tag in VOID_ELEMENTS:
+            if tag == 'br':
+                self._text.append(' ')
+            return
+        if tag in SKIP_ELEMENTS or self._skip:
+            self._skip += 1
+        elif tag in HEADINGS:
+            self._heading_text = []
+        elif tag in BLOCKS:
+            self._text.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag == 'title':
+            self._in_title = False
+        elif tag == 'main':
+            self._in_main -= 1
+        if tag in VOID_ELEMENTS:
+            return
+        if self._skip:
+            self._skip -= 1
+        elif tag in HEADINGS and self._heading_text is not None:
+            heading = re.sub(r'\s+', ' ', ''.join(self._heading_text)).strip()
+            self._heading_text = None
+            if heading:
+                self._flush()
+                self._heading = heading
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif self._skip or (self._has_main and not self._in_main):
+            return
+        elif self._heading_text is not None:
+            self._heading_text.append(data)
+        else:
+            self._text.append(data)
+
+
+def page_passages(path, base_dir=BASE_DIR):
+    """Yield passage dicts for one HTML page"""
+    with open(path, encoding='utf-8') as f:
+        page = PageSections().feed_page(f.read())
+    url = '/' + os.path.relpath(path, base_dir).replace(os.sep, '/')
+    title = re.sub(r'\s*\|.*$', '', page.title.strip()) or url
+    for heading, text in page.sections:
+        words = text.split()
+        for start in range(0, len(words), MAX_PASSAGE_WORDS):
+            yield {
+                'url': url,
+                'title': title,
+                'section': heading,
+                'text': ' '.join(words[start:start + MAX_PASSAGE_WORDS]),
+            }
+
+
+def collect_passages(base_dir=BASE_DIR):
+    """All passages from every source page"""
+    passages = []
+    for pattern in SOURCES:
+        for path in sorted(glob.glob(os.path.join(base_dir, pattern))):
+            passages.extend(page_passages(path, base_dir))
+    return passages
+
+
+def build_index(passages):
+    """Build the compact index: passages plus term -> [doc, weight, doc, weight, ...]"""
+    doc_terms = [tokenize(f"{p['title']} {p['section']} {p['text']}") for p in passages]
+    avgdl = sum(len(terms) for terms in doc_terms) / max(len(doc_terms), 1)
+
+    postings = {}
+    for doc_id, terms in enumerate(doc_terms):
+        counts = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * len(terms) / avgdl)
+        for term, tf in counts.items():
+            postings.setdefault(term, []).append((doc_id, tf * (BM25_K1 + 1) / (tf + norm)))
+
+    n_docs = len(passages)
+    terms = {}
+    for term, docs in sorted(postings.items()):
+        idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+        flat = []
+        for doc_id, weight in docs:
+            flat += [doc_id, round(idf * weight, WEIGHT_DIGITS)]
+        terms[term] = flat
+
+    return {
+        'version': INDEX_VERSION,
+        'tokenizer': {'pattern': '[a-z0-9]+', 'stopwords': sorted(STOPWORDS), 'stripPlural': 4},
+        'docs': [[p['url'], p['title'], p['section'], p['text']] for p in passages],
+        'terms': terms,
+    }
+
+
+def search(index, query, k=5):
+    """Top-k (score, doc) pairs for a query"""
+    scores = {}
+    for term in set(tokenize(query)):
+        postings = index['terms'].get(term)
+        if not postings:
+            continue
+        for i in range(0, len(postings), 2):
+            scores[postings[i]] = scores.get(postings[i], 0) + postings[i + 1]
+    best = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+    return [(score, index['docs'][doc_id]) for doc_id, score in best]
+
+
+def format_passages(results):
+    """Passages as they are placed into the chat prompt"""
+    return '\n\n'.join(f"[{doc[1]} - {doc[2]}]({doc[0]})\n{doc[3]}" for _, doc in results)
+
+
+def write_index(index, path=INDEX_PATH):
+    """Write the index as compact JSON"""
+    with open(path, 'w') as f:
+        json.dump(index, f, separators=(',', ':'))
+
+
+BENCH_QUERIES = (
+    'How do I get reimbursed for mileage?',
+    'What is the per diem rate for dinner?',
+    'How do I request a parking permit?',
+    'Who do I contact about a work order?',
+    'What happens if I withdraw and have Title IV aid?',
+    'Can I get a refund after dropping classes?',
+    'How do I appeal satisfactory academic progress?',
+    'Where do I report a vehicle accident?',
+    'What is the petty cash limit?',
+    'How do I request a new key for my office?',
+)
+
+
+def knowledge_prompt_size(path=KNOWLEDGE_PATH):
+    """Characters of the full knowledge base (what the prompt carries without the index)"""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def benchmark(k=5, rounds=200):
+    """Print index build time, lookup latency and prompt-size reduction"""
+    start = time.perf_counter()
+    passages = collect_passages()
+    parsed = time.perf_counter()
+    index = build_index(passages)
+    built = time.perf_counter()
+    size = len(json.dumps(index, separators=(',', ':')))
+    print(f"Parsed {len(passages)} passages in {(parsed - start) * 1000:.1f} ms, "
+          f"indexed {len(index['terms'])} terms in {(built - parsed) * 1000:.1f} ms ({size:,} bytes)")
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for query in BENCH_QUERIES:
+            search(index, query, k)
+    per_query = (time.perf_counter() - start) / (rounds * len(BENCH_QUERIES))
+    print(f"Lookup: {per_query * 1e6:.1f} us per query (top {k})")
+
+    full = knowledge_prompt_size()
+    sizes = [len(format_passages(search(index, query, k))) for query in BENCH_QUERIES]
+    average = sum(sizes) / len(sizes)
+    print(f"Prompt context: {full:,} chars for the full knowledge base vs {average:,.0f} chars for top-{k} passages "
+          f"(~{full / 4:,.0f} -> ~{average / 4:,.0f} tokens)")
+    for query in BENCH_QUERIES[:3]:
+        top = search(index, query, 1)
+        if top:
+            print(f"  {query!r} -> {top[0][1][0]} ({top[0][1][2]})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the chat function's passage search index")
+    parser.add_argument('--out', default=INDEX_PATH, help="index file (default: netlify/functions/search-index.json)")
+    parser.add_argument('--bench', action='store_true', help="report build time, lookup latency and prompt size")
+    parser.add_argument('--query', help="print the top passages for a question")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark()
+        return
+    index = build_index(collect_passages())
+    if args.query:
+        print(format_passages(search(index, args.query)))
+        return
+    write_index(index, args.out)
+    print(f"Indexed {len(index['docs'])} passages, {len(index['terms'])} terms -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
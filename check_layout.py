@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Wiley University - Business & Finance Website
+Form layout checker
+
+Lays out every form in create_all_forms() without writing PDFs: the
+generator draws onto a canvas that only tracks pages, while _draw_fields()
+records each widget rect. The rects are then checked for
+
+- widgets that overlap each other (sweep line over x per page)
+- widgets that leave the page
+- widgets in the header band (title block on page 1, running header after)
+- widgets in the footer band that _draw_footer() draws on the last page
+- widgets on the form ID code or its quiet zone, on every page
+
+    python3 check_layout.py [--json]
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from reportlab.lib.units import inch
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from generate_forms import (FORM_ID_BOTTOM, FORM_ID_QUIET, FORM_ID_RIGHT, FORM_ID_SIZE, WileyFormGenerator,
+                            create_all_forms)
+
+EPSILON = 0.01
+
+# Bands drawn by _draw_header / _draw_header_minimal / _draw_footer (points from the page edge)
+FIRST_PAGE_HEADER = 1.7 * inch + 1
+CONTINUATION_HEADER = 0.6 * inch + 0.5
+FOOTER = 0.75 * inch + 0.5
+
+
+def form_id_box(width):
+    """(x0, y0, x1, y1) of the form ID code with its quiet zone, drawn on every page"""
+    left = width - FORM_ID_RIGHT
+    return (left - FORM_ID_QUIET, FORM_ID_BOTTOM - FORM_ID_QUIET,
+            left + FORM_ID_SIZE + FORM_ID_QUIET, FORM_ID_BOTTOM + FORM_ID_SIZE + FORM_ID_QUIET)
+
+
+class _Ignore:
+    """Accepts and ignores any drawing call"""
+
+    def __getattr__(self, name):
+        return self
+
+    def __call__(self, *args, **kwargs):
+        return None
+
+
+class CountingCanvas(_Ignore):
+    """Canvas stand-in that only counts pages and measures text (generate_forms.LayoutCanvas records every call)"""
+
+    def __init__(self):
+        self.page = 1
+        self.acroForm = _Ignore()
+
+    def getPageNumber(self):
+        return self.page
+
+    def showPage(self):
+        self.page += 1
+
+    def stringWidth(self, text, font_name, font_size):
+        return stringWidth(text, font_name, font_size)
+
+
+class LayoutRecorder(WileyFormGenerator):
+    """Generator that lays forms out and keeps the widget rects instead of writing PDFs"""
+
+    def __init__(self):
+        super().__init__(deterministic=True)
+        self.layouts = []
+
+    def create_form(self, filename, title, department, fields, instructions=None):
+        c = CountingCanvas()
+        self._draw_form(c, title, department, fields, instructions)
+        self.layouts.append((filename, c.page, self.widget_rects))
+
+
+def overlaps(rects):
+    """Overlapping (a, b) rect pairs on one page, by sweeping left to right"""
+    events = sorted(rects, key=lambda r: r[3])
+    active = []
+    pairs = []
+    for rect in events:
+        x = rect[3]
+        active = [a for a in active if a[3] + a[5] > x + EPSILON]
+        for other in active:
+            if rect[4] < other[4] + other[6] - EPSILON and other[4] < rect[4] + rect[6] - EPSILON:
+                pairs.append((other, rect))
+        active.append(rect)
+    return pairs
+
+
+def check_form(filename, pages, rects, width, height):
+    """Issue dicts for one form's layout"""
+    issues = []
+
+    def issue(code, rect, detail):
+        issues.append({'form': filename, 'page': rect[0], 'code': code, 'widget': rect[1], 'detail': detail})
+
+    id_x0, id_y0, id_x1, id_y1 = form_id_box(width)
+    by_page = {}
+    for rect in rects:
+        page, _, _, x, y, w, h = rect
+        by_page.setdefault(page, []).append(rect)
+        if x < -EPSILON or y < -EPSILON or x + w > width + EPSILON or y + h > height + EPSILON:
+            issue('off_page', rect, f"rect ({x:.0f}, {y:.0f}, {w:.0f}x{h:.0f}) leaves the {width:.0f}x{height:.0f} page")
+            continue
+        header = FIRST_PAGE_HEADER if page == 1 else CONTINUATION_HEADER
+        if y + h > height - header + EPSILON:
+            issue('header', rect, f"top at {(height - y - h) / inch:.2f} in from the top edge")
+        if page == pages and y < FOOTER - EPSILON:
+            issue('footer', rect, f"bottom at {y / inch:.2f} in, footer band ends at {FOOTER / inch:.2f} in")
+        if x < id_x1 - EPSILON and id_x0 < x + w - EPSILON and y < id_y1 - EPSILON and id_y0 < y + h - EPSILON:
+            issue('form_id', rect, f"bottom at {y / inch:.2f} in reaches the form ID code "
+                                   f"(top of its quiet zone at {id_y1 / inch:.2f} in)")
+
+    for page_rects in by_page.values():
+        for a, b in overlaps(page_rects):
+            issue('overlap', b, f"overlaps {a[1]}")
+    return issues
+
+
+def check_all():
+    """Lay out every form; return (forms, widgets, issues)"""
+    recorder = LayoutRecorder()
+    create_all_forms(recorder)
+    issues = []
+    widgets = 0
+    for filename, pages, rects in recorder.layouts:
+        widgets += len(rects)
+        issues += check_form(filename, pages, rects, recorder.width, recorder.height)
+    return len(recorder.layouts), widgets, issues
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check form widget geometry for overlaps and band collisions")
+    parser.add_argument('--json', action='store_true', help="print issues as JSON")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    forms, widgets, issues = check_all()
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        print(json.dumps(issues, indent=2))
+    else:
+        for item in issues:
+            print(f"{item['form']} p{item['page']} {item['code']}: {item['widget']} {item['detail']}")
+    print(f"Checked {widgets} widgets on {forms} forms in {elapsed * 1000:.0f} ms: {len(issues)} issues",
+          file=sys.stderr)
+    return 1 if issues else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Wiley University - Business & Finance Forms Generator
+Startup-time budget check for generate_forms.py
+
+Runs `python -X importtime -c "import generate_forms"` in fresh interpreters,
+reports the slowest imports and fails if the module goes over its budget or
+pulls in any of the heavy reportlab modules that are only needed to draw.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# Cumulative import time allowed for generate_forms (milliseconds, best of N)
+BUDGET_MS = 120
+
+# Modules that must not be imported just by importing generate_forms
+FORBIDDEN_AT_IMPORT = (
+    'reportlab.pdfgen',
+    'reportlab.platypus',
+    'reportlab.pdfbase.pdfdoc',
+    'reportlab.pdfbase.ttfonts',
+    'reportlab.lib.styles',
+)
+
+MODULE = 'generate_forms'
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def measure_import(module=MODULE):
+    """Import module in a fresh interpreter and return {name: (self_us, cumulative_us)}"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=BASE_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def check_startup(runs=5, budget_ms=BUDGET_MS, top=10):
+    """Measure startup and return a list of budget violations (empty if OK)"""
+    samples = []
+    timings = {}
+    for _ in range(runs):
+        timings = measure_import()
+        samples.append(timings[MODULE][1] / 1000)
+
+    best = min(samples)
+    print(f"import {MODULE}: best {best:.1f} ms, median {statistics.median(samples):.1f} ms "
+          f"over {runs} runs (budget {budget_ms} ms)")
+
+    print("\nSlowest imports (cumulative, last run):")
+    slowest = sorted(timings.items(), key=lambda item: item[1][1], reverse=True)
+    for name, (self_us, cumulative_us) in slowest[:top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {self_us / 1000:8.1f} ms self  {name}")
+
+    problems = []
+    if best > budget_ms:
+        problems.append(f"import took {best:.1f} ms, budget is {budget_ms} ms")
+    for name in timings:
+        if name.startswith(FORBIDDEN_AT_IMPORT):
+            problems.append(f"{name} is imported at startup; defer it to where it is used")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check generate_forms.py import time against its budget")
+    parser.add_argument('--runs', type=int, default=5, help="fresh interpreters to sample")
+    parser.add_argument('--budget-ms', type=float, default=BUDGET_MS, help="allowed cumulative import time")
+    parser.add_argument('--top', type=int, default=10, help="slowest imports to list")
+    args = parser.parse_args()
+
+    problems = check_startup(args.runs, args.budget_ms, args.top)
+    if problems:
+        print("\nStartup budget exceeded:")
+        for problem in problems:
+            print(f"- {problem}")
+        sys.exit(1)
+    print("\nStartup budget OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Wiley University - Business & Finance Website
+Benchmark and visual-equivalence check for the PDF backends
+
+Renders every form with each backend in generate_forms.BACKENDS and reports
+throughput, output size and the startup cost of a fresh process that renders
+one form (import plus first render). The native backend's pages are then
+rasterized next to reportlab's and compared with visual_regression.compare();
+the check fails if any page differs by more than the regression threshold.
+
+    python3 compare_backends.py [--repeat 5] [--skip-visual]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import visual_regression
+from generate_forms import BACKENDS, WileyFormGenerator, load_form_specs
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REFERENCE = 'reportlab'
+
+STARTUP_SNIPPET = (
+    "import time; start = time.perf_counter(); "
+    "from generate_forms import WileyFormGenerator, load_form_specs; "
+    "spec = load_form_specs()[0]; "
+    "WileyFormGenerator(deterministic=True, backend={backend!r}).render_form("
+    "spec['title'], spec['department'], spec['fields'], spec['instructions'], slug=spec['slug']); "
+    "print(time.perf_counter() - start)"
+)
+
+
+def render_all(specs, backend):
+    """{filename: pdf bytes} for every form"""
+    generator = WileyFormGenerator(deterministic=True, backend=backend)
+    return {spec['filename']: generator.render_form(spec['title'], spec['department'], spec['fields'],
+                                                    spec['instructions'], slug=spec['slug'])
+            for spec in specs}
+
+
+def throughput(specs, backend, repeat):
+    """(best seconds for all forms, total bytes)"""
+    render_all(specs, backend)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pdfs = render_all(specs, backend)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, sum(len(data) for data in pdfs.values())
+
+
+def startup(backend, repeat):
+    """Best seconds for a fresh interpreter to import the generator and render one form"""
+    samples = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, '-c', STARTUP_SNIPPET.format(backend=backend)],
+                                cwd=BASE_DIR, capture_output=True, text=True, check=True)
+        samples.append(float(result.stdout))
+    return min(samples)
+
+
+def visual_check(specs, backend):
+    """[(filename, page, changed share or None if page counts differ)] against the reference backend"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = {}
+        for name in (REFERENCE, backend):
+            os.makedirs(os.path.join(tmp_dir, name))
+            for filename, data in render_all(specs, name).items():
+                with open(os.path.join(tmp_dir, name, filename), 'wb') as f:
+                    f.write(data)
+            paths[name] = sorted(os.path.join(tmp_dir, name, spec['filename']) for spec in specs)
+        os.makedirs(visual_regression.CACHE_DIR, exist_ok=True)
+        results = []
+        for reference, candidate in zip(paths[REFERENCE], paths[backend]):
+            expected = visual_regression.page_tasks([reference], visual_regression.DPI)
+            actual = visual_regression.page_tasks([candidate], visual_regression.DPI)
+            name = os.path.basename(reference)
+            if len(expected) != len(actual):
+                results.append((name, 0, None))
+                continue
+            for expected_task, actual_task in zip(expected, actual):
+                golden, _ = visual_regression.render_page(expected_task)
+                current, _ = visual_regression.render_page(actual_task)
+                diff_path = os.path.join(visual_regression.CACHE_DIR, 'diffs',
+                                         f"{backend}-{os.path.splitext(name)[0]}-p{actual_task[2] + 1}.png")
+                os.makedirs(os.path.dirname(diff_path), exist_ok=True)
+                results.append((name, actual_task[2], visual_regression.compare(current, golden, diff_path)))
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the PDF backends for speed, size and rendering")
+    parser.add_argument('--repeat', type=int, default=5, help="runs per measurement; the best is reported")
+    parser.add_argument('--skip-visual', action='store_true', help="only benchmark")
+    args = parser.parse_args()
+
+    specs = load_form_specs()
+    timings = {}
+    for backend in BACKENDS:
+        elapsed, size = throughput(specs, backend, args.repeat)
+        first = startup(backend, args.repeat)
+        timings[backend] = elapsed
+        print(f"{backend:>9}: {len(specs) / elapsed:6.0f} forms/s ({elapsed * 1000:.0f} ms for {len(specs)}), "
+              f"{size / 1024:.0f} KB total, fresh process to first form {first * 1000:.0f} ms")
+    for backend in BACKENDS:
+        if backend != REFERENCE:
+            print(f"{backend} is {timings[REFERENCE] / timings[backend]:.1f}x the throughput of {REFERENCE}")
+
+    if args.skip_visual:
+        return 0
+    if visual_regression.Image is None or visual_regression.renderer() is None:
+        sys.exit("The visual check needs Pillow and pypdfium2 or pdftoppm (or pass --skip-visual)")
+    failed = False
+    for backend in BACKENDS:
+        if backend == REFERENCE:
+            continue
+        results = visual_check(specs, backend)
+        bad = [r for r in results if r[2] is None or r[2] > visual_regression.DIFF_THRESHOLD]
+        for name, page, share in bad:
+            detail = "page count differs" if share is None else f"{share:.2%} of pixels changed"
+            print(f"FAIL {backend} {name} page {page + 1}: {detail}")
+        worst = max((r[2] for r in results if r[2] is not None), default=0)
+        print(f"{backend} vs {REFERENCE}: {len(results)} pages, {len(bad)} differ "
+              f"(worst {worst:.3%}, threshold {visual_regression.DIFF_THRESHOLD:.1%})")
+        failed |= bool(bad)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Wiley University - Business & Finance Website
+Savings from the shared form components
+
+Reports how often each component() block (Employee Information, Student
+Information, the approval ladder) is used, the field-drawing time of all
+forms with cached fragments against drawing the same blocks field by field,
+and the memory the specs take with shared blocks against private copies.
+Both build paths write identical PDFs; the report checks that too.
+
+    python3 component_report.py [--repeat 5]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import generate_forms
+from generate_forms import WileyFormGenerator, load_form_specs
+
+
+class FieldTimer(WileyFormGenerator):
+    """Generator that times _draw_fields() separately from the rest of a render"""
+
+    def __init__(self, use_fragments):
+        super().__init__(deterministic=True)
+        self.use_fragments = use_fragments
+        self.field_time = 0.0
+
+    def _draw_fields(self, c, fields, y_start):
+        start = time.perf_counter()
+        super()._draw_fields(c, fields, y_start)
+        self.field_time += time.perf_counter() - start
+
+
+def build_all(specs, use_fragments):
+    """(total seconds, field drawing seconds, [pdf bytes]) for one build of every form"""
+    generator = FieldTimer(use_fragments)
+    start = time.perf_counter()
+    pdfs = [generator.render_form(spec['title'], spec['department'], spec['fields'], spec['instructions'],
+                                      slug=spec['slug'])
+            for spec in specs]
+    return time.perf_counter() - start, generator.field_time, pdfs
+
+
+def spec_memory(build):
+    """Bytes allocated by build()"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build-time and spec-size savings of shared form components")
+    parser.add_argument('--repeat', type=int, default=5, help="builds per mode; the best is reported")
+    args = parser.parse_args()
+
+    specs = load_form_specs()
+    uses = {}
+    for spec in specs:
+        for field in spec['fields']:
+            entry = generate_forms._COMPONENT_STARTS.get(id(field))
+            if entry:
+                uses[entry[0]] = uses.get(entry[0], 0) + 1
+    fields_in_blocks = sum(n * len(generate_forms._COMPONENTS[key]) for key, n in uses.items())
+    print("Component uses:")
+    for (name, params), n in sorted(uses.items()):
+        print(f"  {name}{dict(params) if params else ''}: {n} forms")
+    print(f"  {fields_in_blocks} of {sum(len(s['fields']) for s in specs)} top-level fields come from components")
+
+    build_all(specs, True)   # warm imports and the fragment cache
+    results = {}
+    for _ in range(args.repeat):
+        # Alternate the modes so drift in machine load hits both alike
+        for mode in (False, True):
+            run = build_all(specs, mode)
+            if mode not in results or run[0] < results[mode][0]:
+                results[mode] = run
+    identical = results[True][2] == results[False][2]
+    for mode, name in ((False, 'field by field'), (True, 'cached fragments')):
+        total, fields, _ = results[mode]
+        print(f"Build {len(specs)} forms, {name}: {total * 1000:.1f} ms ({fields * 1000:.1f} ms drawing fields)")
+    saved = results[False][1] - results[True][1]
+    print(f"Field drawing saved: {saved * 1000:.1f} ms ({saved / results[False][1]:.0%}); "
+          f"output {'identical' if identical else 'DIFFERS'}")
+
+    # collect_form_specs() runs create_all_forms(); load_form_specs() would read the compiled cache
+    shared = spec_memory(generate_forms.collect_form_specs)
+    shared_component = generate_forms.component
+    generate_forms.component = lambda name, **params: generate_forms._COMPONENT_BUILDERS[name](**params)
+    try:
+        private = spec_memory(generate_forms.collect_form_specs)
+    finally:
+        generate_forms.component = shared_component
+    print(f"Spec memory: {shared / 1024:.1f} KB with shared blocks, {private / 1024:.1f} KB with a copy "
+          f"per form ({1 - shared / private:.0%} saved)")
+    return 0 if identical else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Wiley University - Business & Finance Website
+Memory and access cost of the Field model against spec dicts
+
+_draw_fields() works on generate_forms.Field objects (__slots__, defaults
+resolved and checked once) built from the spec dicts in create_all_forms().
+This report measures, with tracemalloc, what the fields of every form take as
+dicts and as Fields, the same for a synthetic line-item form (an expense
+report with --rows rows of items), and the cost of reading every attribute
+_draw_field() needs: dict.get() with defaults against slot access.
+
+    python3 field_model_report.py [--rows 2000] [--repeat 5]
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from generate_forms import Field, collect_form_specs, inch
+
+LINE_ITEM = {'type': 'row', 'fields': [
+    {'label': 'Date', 'width': 1},
+    {'label': 'Description', 'width': 3},
+    {'label': 'Account', 'width': 1.25},
+    {'label': 'Amount', 'width': 1.25},
+]}
+
+
+def line_item_fields(rows):
+    """Fields of an expense report with rows line items"""
+    fields = [{'type': 'section', 'label': 'Expenses'}]
+    for n in range(rows):
+        fields.append(json.loads(json.dumps(LINE_ITEM)))
+        fields.append({'type': 'checkbox', 'label': f"Receipt attached for line {n + 1}"})
+    fields.append({'type': 'signature', 'label': 'Employee Signature'})
+    return fields
+
+
+def count_fields(fields):
+    """Fields including row items"""
+    return sum(1 + len(field.get('fields', ())) for field in fields)
+
+
+def held_memory(make):
+    """Bytes still allocated after make() returns what it keeps"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = make()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def fresh_copy(fields):
+    """Unshared dicts and strings equal to fields"""
+    return json.loads(json.dumps(fields))
+
+
+def as_fields(fields):
+    """Fields for a fresh copy of fields, with the dicts dropped"""
+    return [Field(spec) for spec in fresh_copy(fields)]
+
+
+def read_dicts(fields):
+    for field in fields:
+        field.get('type', 'text')
+        field.get('label', '')
+        field.get('width', 4) * inch
+        field.get('height', 0.3) * inch
+        field.get('required', False)
+        field.get('options', [])
+        for item in field.get('fields', []):
+            item.get('label', '')
+            item.get('width', 2) * inch
+
+
+def read_fields(fields):
+    for field in fields:
+        field.type
+        field.label
+        field.width
+        field.height
+        field.required
+        field.options
+        for item in field.fields:
+            item.label
+            item.width
+
+
+def best_time(run, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def report(name, fields, repeat):
+    count = count_fields(fields)
+    dicts = held_memory(lambda: fresh_copy(fields))
+    models = held_memory(lambda: as_fields(fields))
+    built = [Field(spec) for spec in fields]
+    get_time = best_time(lambda: read_dicts(fields), repeat)
+    slot_time = best_time(lambda: read_fields(built), repeat)
+    print(f"{name}: {count:,} fields")
+    print(f"  memory: dicts {dicts / 1024:8.1f} KB ({dicts / count:5.0f} B/field), "
+          f"Fields {models / 1024:8.1f} KB ({models / count:5.0f} B/field), {1 - models / dicts:.0%} less")
+    print(f"  reading every attribute _draw_field() uses: dict.get() {get_time / count * 1e9:5.0f} ns/field, "
+          f"slots {slot_time / count * 1e9:5.0f} ns/field ({get_time / slot_time:.1f}x faster)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory and access cost of Field against spec dicts")
+    parser.add_argument('--rows', type=int, default=2000, help="line items in the synthetic form")
+    parser.add_argument('--repeat', type=int, default=5, help="timing runs; the best is reported")
+    args = parser.parse_args()
+
+    report("All forms", [field for spec in collect_form_specs() for field in spec['fields']], args.repeat)
+    report(f"Line-item form ({args.rows:,} rows)", line_item_fields(args.rows), args.repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
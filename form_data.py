@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Wiley University - Business & Finance Website
+XFDF / FDF form data for the generated PDF forms
+
+A filled form is its blank template plus field values. This tool stores only
+the values: one canonical template per form in forms/, and a small XFDF
+(XML) or FDF (PDF syntax) file per submission, keyed by the PDF field names
+generate_forms.py gives the widgets. Each data file points at its template
+(href forms/<slug>.pdf) and records the template's document ID, so a full
+PDF can be rebuilt at any time with pdf_fields.FormTemplate.
+
+    export   filled PDFs -> data files (template found by document ID)
+    convert  CSV or JSONL records -> data files, streamed one record at a time
+    import   data files -> filled PDFs
+    bench    storage and speed of data files against full PDFs
+
+    python3 form_data.py export prefilled/*.pdf --out form-data/
+    python3 form_data.py convert submissions.jsonl --format fdf --out form-data/
+    python3 form_data.py import form-data/*.xfdf --out filled/
+    python3 form_data.py bench --records 5000
+"""
+
+import argparse
+import csv
+import glob
+import json
+import os
+import re
+import sys
+import time
+import xml.etree.ElementTree as ElementTree
+from xml.sax.saxutils import escape, quoteattr
+
+from pdf_fields import FormTemplate, PdfFile, decode_name, pdf_string, unescape_string
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FORMS_DIR = os.path.join(BASE_DIR, 'forms')
+OUTPUT_DIR = os.path.join(BASE_DIR, 'form-data')
+FILLED_DIR = os.path.join(BASE_DIR, 'filled')
+FORMATS = ('xfdf', 'fdf')
+XFDF_NAMESPACE = 'http://ns.adobe.com/xfdf/'
+BENCH_FORM = 'direct-deposit-authorization'
+
+FDF_FIELD_PATTERN = re.compile(rb'<<\s*/T \(((?:\\.|[^\\)])*)\)\s*/V (?:\(((?:\\.|[^\\)])*)\)|/([^\s/<>\[\]()]+))\s*>>')
+FDF_FILE_PATTERN = re.compile(rb'/F \(((?:\\.|[^\\)])*)\)')
+FDF_ID_PATTERN = re.compile(rb'/ID \[\s*<([0-9a-fA-F]+)>')
+NAME_ESCAPE_PATTERN = re.compile(rb'[^!-~]|[#%()<>\[\]{}/]')
+
+
+class FormDataError(ValueError):
+    """A data file or record that cannot be matched to a template"""
+
+
+def pdf_name(text):
+    """Text -> PDF name bytes (no slash), #xx-escaping irregular characters"""
+    return NAME_ESCAPE_PATTERN.sub(lambda m: b'#%02X' % m.group(0)[0], str(text).encode('cp1252', errors='replace'))
+
+
+def template_href(slug):
+    """href stored in data files for a form's template"""
+    return f"forms/{slug}.pdf"
+
+
+def slug_from_href(href):
+    """Form slug of a data file's template href"""
+    return os.path.splitext(os.path.basename(href.replace('\\', '/')))[0]
+
+
+def to_xfdf(values, href, original_id=None):
+    """XFDF bytes for {field name: value}"""
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             f'<xfdf xmlns="{XFDF_NAMESPACE}" xml:space="preserve">',
+             f'<f href={quoteattr(href)}/>',
+             '<fields>']
+    lines += [f'<field name={quoteattr(name)}><value>{escape(value)}</value></field>' for name, value in values.items()]
+    lines.append('</fields>')
+    if original_id:
+        lines.append(f'<ids original="{original_id}" modified="{original_id}"/>')
+    lines.append('</xfdf>\n')
+    return '\n'.join(lines).encode('utf-8')
+
+
+def to_fdf(values, href, kinds, original_id=None):
+    """FDF bytes for {field name: value}; kinds ({field name: type}) makes checkbox and radio values names"""
+    fields = []
+    for name, value in values.items():
+        value = b'/' + pdf_name(value) if kinds.get(name, 'text') != 'text' else b'(' + pdf_string(value) + b')'
+        fields.append(b'<< /T (' + pdf_string(name) + b') /V ' + value + b' >>')
+    document = b'/F (' + pdf_string(href) + b')'
+    if original_id:
+        document += b' /ID [<%s><%s>]' % (original_id.encode('ascii'), original_id.encode('ascii'))
+    return (b'%FDF-1.2\n1 0 obj\n<< /FDF << ' + document + b' /Fields [\n' + b'\n'.join(fields)
+            + b'\n] >> >>\nendobj\ntrailer\n<< /Root 1 0 R >>\n%%EOF\n')
+
+
+def read_data(data):
+    """(template href, original document ID or None, {field name: value}) from XFDF or FDF bytes"""
+    if data.lstrip().startswith(b'%FDF'):
+        href = FDF_FILE_PATTERN.search(data)
+        if href is None:
+            raise FormDataError("FDF without a template (/F)")
+        original_id = FDF_ID_PATTERN.search(data)
+        values = {}
+        for name, text, state in FDF_FIELD_PATTERN.findall(data):
+            values[unescape_string(name)] = unescape_string(text) if not state else decode_name(state).decode('cp1252')
+        return unescape_string(href.group(1)), original_id.group(1).decode('ascii') if original_id else None, values
+
+    try:
+        root = ElementTree.fromstring(data)
+    except ElementTree.ParseError as error:
+        raise FormDataError(f"not XFDF or FDF: {error}")
+    ns = {'x': XFDF_NAMESPACE}
+    href = root.find('x:f', ns)
+    if href is None:
+        raise FormDataError("XFDF without a template (<f href>)")
+    ids = root.find('x:ids', ns)
+    values = {field.get('name'): field.findtext('x:value', '', ns) for field in root.iterfind('x:fields/x:field', ns)}
+    return href.get('href'), ids.get('original') if ids is not None else None, values
+
+
+class Templates:
+    """Canonical templates in a forms directory, parsed on first use"""
+
+    def __init__(self, forms_dir=FORMS_DIR):
+        self.forms_dir = forms_dir
+        self._templates = {}
+        self._by_id = None
+
+    def get(self, slug):
+        """FormTemplate for a form slug"""
+        if slug not in self._templates:
+            path = os.path.join(self.forms_dir, f"{slug}.pdf")
+            if not os.path.exists(path):
+                raise FormDataError(f"no template for {slug!r} in {self.forms_dir}")
+            with open(path, 'rb') as f:
+                self._templates[slug] = FormTemplate(f.read())
+        return self._templates[slug]
+
+    def slug_for(self, pdf):
+        """Slug of the template a filled PdfFile was made from (the first half of its /ID)"""
+        if self._by_id is None:
+            self._by_id = {}
+            for path in glob.glob(os.path.join(self.forms_dir, '*.pdf')):
+                with open(path, 'rb') as f:
+                    document_id = PdfFile(f.read()).document_id
+                if document_id:
+                    self._by_id[document_id.decode('ascii').lower()] = os.path.splitext(os.path.basename(path))[0]
+        slug = self._by_id.get((pdf.document_id or b'').decode('ascii').lower())
+        if slug is None:
+            raise FormDataError("not made from a template in the forms directory (document ID not found)")
+        return slug
+
+    def encode(self, slug, values, data_format):
+        """Data file bytes for a form's values (canonicalized; unknown fields dropped)"""
+        template = self.get(slug)
+        values = {name: value for name, value in
+                  ((name, template.canonical(name, value)) for name, value in values.items()) if value is not None}
+        original_id = template.pdf.document_id.decode('ascii') if template.pdf.document_id else None
+        if data_format == 'fdf':
+            kinds = {name: template.fields[name]['type'] for name in values}
+            return to_fdf(values, template_href(slug), kinds, original_id)
+        return to_xfdf(values, template_href(slug), original_id)
+
+    def fill(self, data):
+        """(slug, full PDF bytes) for a data file"""
+        href, _, values = read_data(data)
+        slug = slug_from_href(href)
+        return slug, self.get(slug).fill(values)
+
+
+def export_pdfs(paths, out_dir, data_format, templates):
+    """Data files for filled PDFs; return (count, data bytes, PDF bytes, [(path, error)])"""
+    os.makedirs(out_dir, exist_ok=True)
+    count = data_bytes = pdf_bytes = 0
+    errors = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            data = f.read()
+        try:
+            filled = FormTemplate(data)
+            slug = templates.slug_for(filled.pdf)
+        except (FormDataError, ValueError, AttributeError) as error:
+            errors.append((path, str(error)))
+            continue
+        encoded = templates.encode(slug, filled.values(), data_format)
+        with open(os.path.join(out_dir, os.path.splitext(os.path.basename(path))[0] + '.' + data_format), 'wb') as f:
+            f.write(encoded)
+        count += 1
+        data_bytes += len(encoded)
+        pdf_bytes += len(data)
+    return count, data_bytes, pdf_bytes, errors
+
+
+def iter_records(path, slug=None):
+    """(slug, name, {column: value}) per record, read one at a time from CSV (needs slug) or JSONL
+    ({formType, fields, submissionId?} submissions or flat records)"""
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.endswith('.csv'):
+            if slug is None:
+                raise FormDataError("CSV records need --form")
+            for index, record in enumerate(csv.DictReader(f)):
+                yield slug, f"{slug}-{index:06d}", record
+            return
+        for index, line in enumerate(filter(str.strip, f)):
+            record = json.loads(line)
+            form = record.get('formType', slug)
+            if form is None:
+                raise FormDataError(f"line {index + 1}: no formType (or pass --form)")
+            name = record.get('submissionId') or f"{form}-{index:06d}"
+            yield form, re.sub(r'[^A-Za-z0-9_.-]+', '_', str(name)), record.get('fields', record)
+
+
+def convert_records(records, out_dir, data_format, templates):
+    """Data files for (slug, name, record) tuples; return (count, data bytes, {slug: count})"""
+    from generate_forms import load_form_specs
+    from prefill_forms import field_aliases
+
+    specs = {spec['slug']: spec for spec in load_form_specs()}
+    aliases = {}
+    os.makedirs(out_dir, exist_ok=True)
+    count = data_bytes = 0
+    per_form = {}
+    for slug, name, record in records:
+        if slug not in aliases:
+            if slug not in specs:
+                raise FormDataError(f"Unknown form {slug!r}")
+            aliases[slug] = field_aliases(specs[slug])
+        values = {aliases[slug][column]: value for column, value in record.items() if column in aliases[slug]}
+        encoded = templates.encode(slug, values, data_format)
+        with open(os.path.join(out_dir, f"{name}.{data_format}"), 'wb') as f:
+            f.write(encoded)
+        count += 1
+        data_bytes += len(encoded)
+        per_form[slug] = per_form.get(slug, 0) + 1
+    return count, data_bytes, per_form
+
+
+def import_files(paths, out_dir, templates):
+    """Filled PDFs for data files; return (count, PDF bytes, [(path, error)])"""
+    os.makedirs(out_dir, exist_ok=True)
+    count = total = 0
+    errors = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            data = f.read()
+        try:
+            _, filled = templates.fill(data)
+        except FormDataError as error:
+            errors.append((path, str(error)))
+            continue
+        with open(os.path.join(out_dir, os.path.splitext(os.path.basename(path))[0] + '.pdf'), 'wb') as f:
+            f.write(filled)
+        count += 1
+        total += len(filled)
+    return count, total, errors
+
+
+def benchmark(count, templates):
+    """Storage and time of XFDF / FDF per record against a full filled PDF per record"""
+    from generate_forms import load_form_specs
+    from prefill_forms import field_aliases, synthetic_employees
+
+    spec = next(spec for spec in load_form_specs() if spec['slug'] == BENCH_FORM)
+    aliases = field_aliases(spec)
+    template = templates.get(BENCH_FORM)
+    records = [{aliases[column]: value for column, value in record.items()}
+               for record in synthetic_employees(count)]
+
+    start = time.perf_counter()
+    pdf_bytes = sum(len(template.fill(values)) for values in records)
+    fill_time = time.perf_counter() - start
+    print(f"{count:,} {BENCH_FORM} records, template {len(template.pdf.data) / 1024:.1f} KB")
+    print(f"  full PDFs: {pdf_bytes / 1e6:8.2f} MB ({pdf_bytes / count / 1024:.1f} KB each, "
+          f"{count / fill_time:,.0f} fills/s)")
+
+    for data_format in FORMATS:
+        start = time.perf_counter()
+        encoded = [templates.encode(BENCH_FORM, values, data_format) for values in records]
+        encode_time = time.perf_counter() - start
+        start = time.perf_counter()
+        rebuilt = [templates.fill(data)[1] for data in encoded[:min(count, 500)]]
+        rebuild_time = (time.perf_counter() - start) / len(rebuilt)
+        changed = sum(FormTemplate(pdf).values() != FormTemplate(template.fill(values)).values()
+                      for pdf, values in zip(rebuilt, records))
+        if changed:
+            print(f"  {data_format}: {changed} of {len(rebuilt)} round trips changed values")
+        stored = sum(map(len, encoded)) + len(template.pdf.data)
+        print(f"  {data_format:>9}: {stored / 1e6:8.2f} MB with the template "
+              f"({sum(map(len, encoded)) / count:.0f} bytes each, {1 - stored / pdf_bytes:.1%} smaller; "
+              f"{count / encode_time:,.0f} records/s written, {1 / rebuild_time:,.0f} PDFs/s rebuilt)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="XFDF / FDF form data for the generated PDF forms")
+    parser.add_argument('--forms-dir', default=FORMS_DIR, help="canonical templates (default: forms/)")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    export = sub.add_parser('export', help="write the field values of filled PDFs as data files")
+    export.add_argument('pdfs', nargs='+')
+    export.add_argument('--format', choices=FORMATS, default='xfdf')
+    export.add_argument('--out', default=OUTPUT_DIR, help="output directory (default: form-data/)")
+
+    convert = sub.add_parser('convert', help="write data files from CSV or JSONL records")
+    convert.add_argument('records', help="CSV file, or JSONL of {formType, fields} submissions or flat records")
+    convert.add_argument('--form', help="form slug for CSV or records without formType")
+    convert.add_argument('--format', choices=FORMATS, default='xfdf')
+    convert.add_argument('--out', default=OUTPUT_DIR, help="output directory (default: form-data/)")
+
+    load = sub.add_parser('import', help="rebuild filled PDFs from data files")
+    load.add_argument('files', nargs='+')
+    load.add_argument('--out', default=FILLED_DIR, help="output directory (default: filled/)")
+
+    bench = sub.add_parser('bench', help=f"compare data files with full PDFs for synthetic {BENCH_FORM} records")
+    bench.add_argument('--records', type=int, default=5000)
+
+    args = parser.parse_args()
+    templates = Templates(args.forms_dir)
+    start = time.perf_counter()
+    try:
+        if args.command == 'bench':
+            benchmark(args.records, templates)
+            return 0
+        if args.command == 'export':
+            count, data_bytes, pdf_bytes, errors = export_pdfs(args.pdfs, args.out, args.format, templates)
+            for path, error in errors:
+                print(f"SKIP {path}: {error}")
+            print(f"Wrote {count:,} {args.format.upper()} files to {args.out}: {data_bytes / 1024:.1f} KB "
+                  f"instead of {pdf_bytes / 1024:.1f} KB of PDFs ({1 - data_bytes / max(pdf_bytes, 1):.1%} smaller)")
+        elif args.command == 'convert':
+            count, data_bytes, per_form = convert_records(iter_records(args.records, args.form), args.out,
+                                                          args.format, templates)
+            elapsed = time.perf_counter() - start
+            for slug, forms in sorted(per_form.items()):
+                print(f"{slug:<34} {forms:>9,}")
+            print(f"Wrote {count:,} {args.format.upper()} files ({data_bytes / 1e6:.2f} MB) to {args.out} "
+                  f"in {elapsed:.2f} s ({count / max(elapsed, 1e-9):,.0f} records/s)")
+        else:
+            count, total, errors = import_files(args.files, args.out, templates)
+            for path, error in errors:
+                print(f"SKIP {path}: {error}")
+            print(f"Wrote {count:,} PDFs ({total / 1e6:.1f} MB) to {args.out}")
+    except FormDataError as error:
+        sys.exit(str(error))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+"""
+Wiley University - Business & Finance Website
+Form ID codes on scanned and uploaded forms
+
+Every generated page carries a small QR code (generate_forms._draw_form_id)
+holding SLUG/HASH/PAGE: the form slug, the first characters of its spec
+hash (the form hash spec_diff.py reports) and the page number. This module
+reads it back, so intake can route a scan or an uploaded PDF to the right
+schema with one dictionary lookup instead of trying every form.
+
+The reader only needs Pillow. It looks for the three finder patterns in
+the bottom right part of the page, samples the module grid between them and
+decodes it with reportlab's QR tables plus a Reed-Solomon corrector.
+PDFs are rasterized through visual_regression (pypdfium2 or pdftoppm).
+
+    python3 form_id.py scans/*.png uploads/*.pdf     # slug, revision and page per file
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+from generate_forms import FORM_ID_HASH_LENGTH, load_form_specs, spec_hash
+
+SEARCH_BOX = (0.4, 0.8)    # the code sits right of centre in the footer band: search right of and below these shares
+RASTER_DPI = 150           # PDF pages are rendered at this resolution for reading
+RUN = re.compile(rb'\x00+|\x01+')
+
+# GF(256) tables for the QR Reed-Solomon code (polynomial 0x11d)
+EXP = [0] * 512
+LOG = [0] * 256
+_value = 1
+for _i in range(255):
+    EXP[_i] = _value
+    LOG[_value] = _i
+    _value <<= 1
+    if _value & 0x100:
+        _value ^= 0x11d
+for _i in range(255, 512):
+    EXP[_i] = EXP[_i - 255]
+
+
+class FormIdError(Exception):
+    """No readable form ID code on a page"""
+
+
+def form_index(specs=None):
+    """{(slug, short hash): spec} for the current forms"""
+    index = {}
+    for spec in specs or load_form_specs():
+        digest = spec_hash(spec['title'], spec['department'], spec['fields'], spec['instructions'])
+        index[spec['slug'], digest[:FORM_ID_HASH_LENGTH]] = spec
+    return index
+
+
+def parse_payload(text):
+    """'SLUG/HASH/PAGE' -> (slug, hash, page)"""
+    try:
+        slug, digest, page = text.split('/')
+        return slug.lower(), digest.lower(), int(page)
+    except ValueError:
+        raise FormIdError(f"not a form ID: {text!r}") from None
+
+
+# ---- Reed-Solomon ----------------------------------------------------------
+
+def _mul(a, b):
+    return EXP[LOG[a] + LOG[b]] if a and b else 0
+
+
+def _inverse(a):
+    return EXP[255 - LOG[a]]
+
+
+def _evaluate(poly, x):
+    """Horner evaluation; poly has the highest degree first"""
+    y = 0
+    for coefficient in poly:
+        y = _mul(y, x) ^ coefficient
+    return y
+
+
+def _solve(rows, values):
+    """Solve a square linear system over GF(256) by Gaussian elimination"""
+    n = len(rows)
+    rows = [row[:] + [value] for row, value in zip(rows, values)]
+    for col in range(n):
+        pivot = next((r for r in range(col, n) if rows[r][col]), None)
+        if pivot is None:
+            raise FormIdError("uncorrectable code")
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        scale = _inverse(rows[col][col])
+        rows[col] = [_mul(v, scale) for v in rows[col]]
+        for r in range(n):
+            if r != col and rows[r][col]:
+                factor = rows[r][col]
+                rows[r] = [v ^ _mul(factor, p) for v, p in zip(rows[r], rows[col])]
+    return [row[n] for row in rows]
+
+
+def rs_correct(block, ec_count):
+    """Corrected codewords of one RS block (data then EC), generator roots a^0..a^(ec-1)"""
+    n = len(block)
+    syndromes = [_evaluate(block, EXP[j]) for j in range(ec_count)]
+    if not any(syndromes):
+        return block
+
+    # Berlekamp-Massey: error locator, lowest degree first
+    locator, previous = [1], [1]
+    shift, last_delta = 1, 1
+    for k in range(ec_count):
+        delta = syndromes[k]
+        for j in range(1, len(locator)):
+            delta ^= _mul(locator[j], syndromes[k - j])
+        if delta == 0:
+            shift += 1
+            continue
+        factor = _mul(delta, _inverse(last_delta))
+        update = [0] * shift + [_mul(factor, c) for c in previous]
+        grown = [(locator[i] if i < len(locator) else 0) ^ (update[i] if i < len(update) else 0)
+                 for i in range(max(len(locator), len(update)))]
+        if 2 * (len(locator) - 1) <= k:
+            previous, last_delta, shift = locator, delta, 1
+        else:
+            shift += 1
+        locator = grown
+    while len(locator) > 1 and locator[-1] == 0:
+        locator.pop()
+    errors = len(locator) - 1
+    if 2 * errors > ec_count:
+        raise FormIdError("too many errors in code")
+
+    # Chien search: position p (from the start) is wrong when X = a^(n-1-p) inverts a root
+    positions = [p for p in range(n) if _evaluate(locator[::-1], _inverse(EXP[n - 1 - p])) == 0]
+    if len(positions) != errors:
+        raise FormIdError("uncorrectable code")
+    # Magnitudes from S_j = sum Y * X^j
+    xs = [EXP[n - 1 - p] for p in positions]
+    rows = [[EXP[(LOG[x] * j) % 255] for x in xs] for j in range(errors)]
+    magnitudes = _solve(rows, syndromes[:errors])
+    fixed = list(block)
+    for p, magnitude in zip(positions, magnitudes):
+        fixed[p] ^= magnitude
+    if any(_evaluate(fixed, EXP[j]) for j in range(ec_count)):
+        raise FormIdError("uncorrectable code")
+    return fixed
+
+
+# ---- Symbol decoding -------------------------------------------------------
+
+def decode_modules(modules):
+    """Text of a QR symbol given as rows of booleans (True is dark)"""
+    from reportlab.graphics.barcode import qrencoder
+    from reportlab.graphics.barcode.qrencoder import QRAlphaNum, QRNumber, QRRSBlock, QRUtil
+
+    size = len(modules)
+    version = (size - 17) // 4
+    if size != version * 4 + 17 or not 1 <= version <= 40:
+        raise FormIdError(f"bad symbol size {size}")
+
+    # Format information: both copies, nearest valid code wins
+    vertical = [modules[i if i < 6 else i + 1 if i < 8 else size - 15 + i][8] for i in range(15)]
+    horizontal = [modules[8][size - i - 1 if i < 8 else 15 - i if i < 9 else 15 - i - 1] for i in range(15)]
+    best = None
+    for level in range(4):
+        for mask in range(8):
+            bits = QRUtil.getBCHTypeInfo((level << 3) | mask)
+            distance = sum(((bits >> i) & 1) != read[i] for read in (vertical, horizontal) for i in range(15))
+            if best is None or distance < best[0]:
+                best = (distance, level, mask)
+    distance, level, mask = best
+    if distance > 6:
+        raise FormIdError("unreadable format information")
+
+    code = qrencoder.QRCode(version, level)
+    code.moduleCount = size
+    flip = QRUtil.getMask(mask)
+    bits = [modules[row][col] ^ bool(flip(row, col)) for col, row in code.dataPosIterator()]
+    codewords = [int(''.join('1' if b else '0' for b in bits[i:i + 8]), 2) for i in range(0, len(bits) - 7, 8)]
+
+    # De-interleave the blocks, correct each, and join their data codewords
+    blocks = QRRSBlock.getRSBlocks(version, level)
+    data = [[] for _ in blocks]
+    ec = [[] for _ in blocks]
+    stream = iter(codewords)
+    for i in range(max(b.dataCount for b in blocks)):
+        for block, out in zip(blocks, data):
+            if i < block.dataCount:
+                out.append(next(stream))
+    for i in range(max(b.totalCount - b.dataCount for b in blocks)):
+        for block, out in zip(blocks, ec):
+            if i < block.totalCount - block.dataCount:
+                out.append(next(stream))
+    payload = []
+    for block, d, e in zip(blocks, data, ec):
+        payload += rs_correct(d + e, len(e))[:block.dataCount]
+
+    # Segments: numeric, alphanumeric and byte mode
+    bitstring = ''.join(f"{byte:08b}" for byte in payload)
+    position = 0
+
+    def take(count):
+        nonlocal position
+        if position + count > len(bitstring):
+            raise FormIdError("truncated data")
+        position += count
+        return int(bitstring[position - count:position], 2)
+
+    length_index = 0 if version < 10 else 1 if version < 27 else 2
+    text = []
+    while position + 4 <= len(bitstring):
+        mode = take(4)
+        if mode == 0:
+            break
+        if mode == QRAlphaNum.mode:
+            count = take(QRAlphaNum.lengthbits[length_index])
+            for _ in range(count // 2):
+                value = take(11)
+                text.append(QRAlphaNum.chars[value // 45] + QRAlphaNum.chars[value % 45])
+            if count % 2:
+                text.append(QRAlphaNum.chars[take(6)])
+        elif mode == QRNumber.mode:
+            count = take(QRNumber.lengthbits[length_index])
+            for start in range(0, count, 3):
+                digits = min(3, count - start)
+                text.append(f"{take((4, 7, 10)[digits - 1]):0{digits}d}")
+        elif mode == 4:
+            count = take((8, 16, 16)[length_index])
+            text.append(bytes(take(8) for _ in range(count)).decode('utf-8', 'replace'))
+        else:
+            raise FormIdError(f"unsupported QR mode {mode}")
+    return ''.join(text)
+
+
+# ---- Locating the symbol on a page ----------------------------------------
+
+def _runs(row):
+    """[(dark, start, length)] of a thresholded row"""
+    return [(row[m.start()], m.start(), m.end() - m.start()) for m in RUN.finditer(row)]
+
+
+def _finder_ratio(lengths):
+    """Module size if five run lengths look like 1:1:3:1:1, else None"""
+    total = sum(lengths)
+    if total < 7:
+        return None
+    module = total / 7
+    tolerance = module * 0.7
+    expected = (1, 1, 3, 1, 1)
+    if all(abs(length - e * module) < e * tolerance for length, e in zip(lengths, expected)):
+        return module
+    return None
+
+
+def _cross_check(column, row, height):
+    """Vertical centre of a finder pattern through (row, col), or None"""
+    def walk(step):
+        lengths = []
+        r = row
+        for want in (1, 0, 1):
+            length = 0
+            while 0 <= r < height and column[r] == want:
+                length += 1
+                r += step
+            lengths.append(length)
+        return lengths
+
+    up, down = walk(-1), walk(1)
+    lengths = [up[2], up[1], up[0] + down[0] - 1, down[1], down[2]]
+    if _finder_ratio(lengths) is None:
+        return None
+    return row - up[0] + 1 + (up[0] + down[0] - 1) / 2
+
+
+def find_finders(dark, width, height):
+    """Finder pattern centres [(x, y, module size)] in a thresholded image (bytes, 1 is dark)
+
+    A real finder is hit on every row through its 3-module core; data modules
+    that happen to look like one are hit on a row or two, so weak clusters
+    are dropped.
+    """
+    hits = []
+    columns = {}
+    for y in range(height):
+        row = dark[y * width:(y + 1) * width]
+        if 1 not in row:
+            continue
+        runs = _runs(row)
+        for i in range(len(runs) - 4):
+            window = runs[i:i + 5]
+            if not window[0][0]:
+                continue
+            module = _finder_ratio([length for _, _, length in window])
+            if module is None:
+                continue
+            x = window[2][1] + window[2][2] / 2
+            col = int(x)
+            if col not in columns:
+                columns[col] = dark[col::width]
+            centre_y = _cross_check(columns[col], y, height)
+            if centre_y is not None:
+                hits.append((x, centre_y, module))
+
+    clusters = []
+    for hit in hits:
+        for cluster in clusters:
+            x, y, module = cluster[0]
+            if abs(hit[0] - x) < 3 * module and abs(hit[1] - y) < 3 * module:
+                cluster.append(hit)
+                break
+        else:
+            clusters.append([hit])
+    strongest = max(map(len, clusters), default=0)
+    # Medians, so a stray hit merged into a finder doesn't pull its centre
+    return [tuple(sorted(values)[len(values) // 2] for values in zip(*cluster))
+            for cluster in clusters if len(cluster) >= max(2, strongest / 3)]
+
+
+def _symbol_corners(finders):
+    """(top left, top right, bottom left) finder centres: the triple closest to a right isosceles triangle"""
+    best = None
+    for i, a in enumerate(finders):
+        for j, b in enumerate(finders):
+            for k, c in enumerate(finders):
+                if len({i, j, k}) < 3 or j > k:
+                    continue
+                # a is the corner; b and c the two legs
+                ab = (b[0] - a[0], b[1] - a[1])
+                ac = (c[0] - a[0], c[1] - a[1])
+                la = (ab[0] ** 2 + ab[1] ** 2) ** 0.5
+                lc = (ac[0] ** 2 + ac[1] ** 2) ** 0.5
+                if not la or not lc:
+                    continue
+                cosine = abs(ab[0] * ac[0] + ab[1] * ac[1]) / (la * lc)
+                modules = max(a[2], b[2], c[2]) / min(a[2], b[2], c[2])
+                score = cosine + abs(la / lc - 1) + (modules - 1)
+                if score < 0.3 and (best is None or score < best[0]):
+                    # Top right is clockwise from bottom left (y grows downwards)
+                    if ab[0] * ac[1] - ab[1] * ac[0] < 0:
+                        b, c = c, b
+                    best = (score, a, b, c)
+    if best is None:
+        raise FormIdError("no form ID code found")
+    return best[1:]
+
+
+def _bilinear(pixels, width, height, x, y):
+    """Grey level at a point (pixel centres sit at +0.5)"""
+    x = min(max(x - 0.5, 0), width - 1.001)
+    y = min(max(y - 0.5, 0), height - 1.001)
+    x0, y0 = int(x), int(y)
+    fx, fy = x - x0, y - y0
+    i = y0 * width + x0
+    top = pixels[i] * (1 - fx) + pixels[i + 1] * fx
+    bottom = pixels[i + width] * (1 - fx) + pixels[i + width + 1] * fx
+    return top * (1 - fy) + bottom * fy
+
+
+def sample_symbol(image, threshold):
+    """Module rows of the QR symbol in a greyscale image"""
+    width, height = image.size
+    pixels = image.tobytes()
+    dark = pixels.translate(bytes(int(value < threshold) for value in range(256)))
+    top_left, top_right, bottom_left = _symbol_corners(find_finders(dark, width, height))
+    module = (top_left[2] + top_right[2] + bottom_left[2]) / 3
+    span = (((top_right[0] - top_left[0]) ** 2 + (top_right[1] - top_left[1]) ** 2) ** 0.5 +
+            ((bottom_left[0] - top_left[0]) ** 2 + (bottom_left[1] - top_left[1]) ** 2) ** 0.5) / 2
+    version = max(1, round((span / module + 7 - 17) / 4))
+    size = version * 4 + 17
+    step = size - 7
+    ux = ((top_right[0] - top_left[0]) / step, (top_right[1] - top_left[1]) / step)
+    uy = ((bottom_left[0] - top_left[0]) / step, (bottom_left[1] - top_left[1]) / step)
+    modules = []
+    for r in range(size):
+        row = []
+        for c in range(size):
+            x = top_left[0] + (c - 3) * ux[0] + (r - 3) * uy[0]
+            y = top_left[1] + (c - 3) * ux[1] + (r - 3) * uy[1]
+            row.append(_bilinear(pixels, width, height, x, y) < threshold)
+        modules.append(row)
+    return modules
+
+
+def read_form_id(image):
+    """(slug, short spec hash, page) from a page image; raises FormIdError"""
+    image = image.convert('L')
+    width, height = image.size
+    footer = image.crop((int(width * SEARCH_BOX[0]), int(height * SEARCH_BOX[1]), width, height))
+    # Threshold halfway between paper and ink
+    histogram = footer.histogram()
+    half, seen = sum(histogram) / 2, 0
+    for white, count in enumerate(histogram):
+        seen += count
+        if seen >= half:
+            break
+    return parse_payload(decode_modules(sample_symbol(footer, white / 2)))
+
+
+def read_file(path):
+    """[(page index in file, (slug, hash, page) or FormIdError)] for an image or a PDF"""
+    if path.lower().endswith('.pdf'):
+        import visual_regression
+
+        os.makedirs(visual_regression.CACHE_DIR, exist_ok=True)
+        rasters = [visual_regression.render_page(task)[0]
+                   for task in visual_regression.page_tasks([path], RASTER_DPI)]
+    else:
+        rasters = [path]
+    results = []
+    for index, raster in enumerate(rasters):
+        try:
+            with Image.open(raster) as image:
+                results.append((index + 1, read_form_id(image)))
+        except FormIdError as error:
+            results.append((index + 1, error))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read the form ID code of scanned or uploaded forms")
+    parser.add_argument('files', nargs='+', help="page images or PDFs")
+    args = parser.parse_args()
+
+    if Image is None:
+        sys.exit("Pillow is required (pip install pillow)")
+    index = form_index()
+    failed = False
+    for path in args.files:
+        for page_index, found in read_file(path):
+            entry = {'file': path, 'filePage': page_index}
+            if isinstance(found, FormIdError):
+                entry['error'] = str(found)
+                failed = True
+            else:
+                slug, digest, page = found
+                entry.update(formType=slug, specHash=digest, page=page,
+                             current=(slug, digest) in index)
+            print(json.dumps(entry))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
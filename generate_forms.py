@@ -4,16 +4,23 @@ Wiley University - Business & Finance Forms Generator
 Creates fillable PDF forms following brand guidelines
 """
 
+import argparse
+import functools
+import hashlib
+import io
+import json
 import os
+import pickle
+import re
+import sys
+import time
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, HRFlowable
-from reportlab.pdfgen import canvas
-from reportlab.pdfbase import pdfform
-from reportlab.pdfbase.pdfmetrics import registerFont
-from reportlab.pdfbase.ttfonts import TTFont
+
+# The canvas stack (pdfgen, pdfdoc, acroform) is imported inside reportlab_canvas()
+# so spec-only consumers and worker processes don't pay for it at import time.
+# check_startup.py keeps this module under its import-time budget.
 
 # Wiley University Brand Colors
 WILDCAT_PURPLE = colors.HexColor('#3D2C68')
@@ -23,21 +30,412 @@ CARBON = colors.HexColor('#414042')
 SILVER = colors.HexColor('#B1B6C1')
 LIGHT_STONE = colors.HexColor('#E2E2E2')
 
-# Forms directory
-FORMS_DIR = '/Users/runellking/Desktop/wiley-business-finance-website/forms'
+# Forms directory (the site's forms/ folder unless WILEY_FORMS_DIR is set)
+FORMS_DIR = os.environ.get(
+    'WILEY_FORMS_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'forms'),
+)
 
-# Ensure forms directory exists
-os.makedirs(FORMS_DIR, exist_ok=True)
+# Compiled spec cache (see compiled_forms()), .build-cache/specs unless WILEY_SPEC_CACHE_DIR is set
+SPEC_CACHE_DIR = os.environ.get(
+    'WILEY_SPEC_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.build-cache', 'specs'),
+)
+
+# Trailer document ID as written by reportlab: /ID [<32 hex><32 hex>]
+PDF_ID_PATTERN = re.compile(rb'/ID\s*\[<([0-9a-fA-F]{32})><([0-9a-fA-F]{32})>\]')
+
+
+def content_document_id(data):
+    """Replace the PDF trailer ID with an MD5 of the rest of the file.
+
+    The ID keeps its length, so xref offsets stay valid. Identical content
+    always gets the same ID and different forms never share one.
+    """
+    match = PDF_ID_PATTERN.search(data)
+    if not match:
+        return data
+    digest = hashlib.md5(data[:match.start()] + data[match.end():]).hexdigest().encode('ascii')
+    return (data[:match.start(1)] + digest + data[match.end(1):match.start(2)]
+            + digest + data[match.end(2):])
+
+
+def subtree_hash(value):
+    """Short SHA-1 of a spec subtree in canonical JSON"""
+    return hashlib.sha1(json.dumps(value, sort_keys=True, separators=(',', ':')).encode('utf-8')).hexdigest()[:16]
+
+
+def spec_hash(title, department, fields, instructions):
+    """Revision hash of one form spec (the form hash spec_diff.py reports)"""
+    return subtree_hash([title, department, instructions, [subtree_hash(f) for f in fields]])
+
+
+# Form ID code: a QR code in the footer band of every page holding
+# SLUG/HASH/PAGE in QR alphanumeric mode (upper case), so the longest slug
+# still fits a version 2 symbol. form_id.py reads it back.
+FORM_ID_SIZE = 0.5 * inch
+FORM_ID_BOTTOM = 0.2 * inch
+FORM_ID_RIGHT = 0.75 * inch + 1.5 * inch     # from the right page edge, clear of the footer text
+FORM_ID_QUIET = 0.1 * inch                   # clear space above the code, 4+ modules at version 1 or 2
+FORM_ID_HASH_LENGTH = 8
+
+# Lowest point any field may reach, on every page: above the form ID code
+# and its quiet zone (and so above the footer line on the last page)
+FIELD_FLOOR = FORM_ID_BOTTOM + FORM_ID_SIZE + FORM_ID_QUIET
+
+
+def form_id_payload(slug, digest, page):
+    """'VEHICLE-INSPECTION-CHECKLIST/1A2B3C4D/2'"""
+    return f"{slug}/{digest[:FORM_ID_HASH_LENGTH]}/{page}".upper()
+
+
+@functools.lru_cache(maxsize=256)
+def form_id_modules(payload):
+    """QR module rows (True is dark) for a payload, low error correction"""
+    from reportlab.graphics.barcode import qrencoder
+
+    code = qrencoder.QRCode(None, qrencoder.QRErrorCorrectLevel.L)
+    code.addData(payload)
+    code.make()
+    return tuple(tuple(bool(dark) for dark in row) for row in code.modules)
+
+
+WIDGET_NAME_PATTERN = re.compile(r'field_(\d+)(.*)', re.DOTALL)
+
+# Positional y arguments of the canvas calls _draw_field() makes
+Y_ARGUMENTS = {'rect': (1,), 'line': (1, 3), 'drawString': (1,), 'drawRightString': (1,)}
+
+
+class _CallRecorder:
+    """Canvas stand-in that records drawing and acroForm calls"""
+
+    def __init__(self, calls, prefix=''):
+        self._calls = calls
+        self._prefix = prefix
+
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self._calls.append((self._prefix + name, args, kwargs))
+        return record
+
+
+class FragmentCanvas(_CallRecorder):
+    """What _draw_field() draws on while a component is laid out"""
+
+    def __init__(self):
+        super().__init__([])
+        self.acroForm = _CallRecorder(self._calls, 'acroForm.')
+
+    def getPageNumber(self):
+        return 1
+
+
+class LayoutCanvas(FragmentCanvas):
+    """What _draw_form() draws on when a form is compiled: every call, across pages"""
 
-class WileyFormGenerator:
     def __init__(self):
+        super().__init__()
+        self._page = 1
+
+    def getPageNumber(self):
+        return self._page
+
+    def showPage(self):
+        self._calls.append(('showPage', (), {}))
+        self._page += 1
+
+    def stringWidth(self, text, font_name, font_size):
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+
+        return stringWidth(text, font_name, font_size)
+
+
+FIELD_TYPES = ('text', 'textarea', 'date', 'checkbox', 'radio', 'signature', 'section', 'row')
+
+# Inch sizes -> points, shared so equal sizes are one float object
+_POINTS = {}
+
+
+def _points(inches):
+    points = _POINTS.get(inches)
+    if points is None:
+        points = _POINTS[inches] = inches * inch
+    return points
+
+
+class Field:
+    """One field of a form spec with its defaults resolved and checked once
+
+    Sizes are in points: height is the box height every type offsets by,
+    area_height a textarea's box, depth how far below its label the field
+    draws (what _draw_fields() keeps above FIELD_FLOOR). A row's items are
+    Fields too, with suffix set to the widget name suffix ('_' + label).
+    """
+
+    __slots__ = ('type', 'label', 'width', 'height', 'area_height', 'depth', 'required', 'options', 'fields',
+                 'suffix')
+
+    def __init__(self, spec, row_item=False):
+        field_type = spec.get('type', 'text')
+        label = spec.get('label', '')
+        if field_type not in FIELD_TYPES:
+            raise ValueError(f"unknown type {field_type!r}")
+        if field_type == 'radio' and not spec.get('options'):
+            raise ValueError("radio without options")
+        if field_type == 'row' and not spec.get('fields'):
+            raise ValueError("row without fields")
+        if field_type not in ('section', 'row') and not label:
+            raise ValueError("no label")
+        self.type = field_type
+        self.label = label
+        self.width = _points(spec.get('width', 2 if row_item else 4))
+        self.height = _points(spec.get('height', 0.3))
+        self.area_height = _points(spec.get('height', 1))
+        self.required = spec.get('required', False)
+        self.options = tuple(spec.get('options', ()))
+        self.fields = tuple(Field(item, row_item=True) for item in spec.get('fields', ()))
+        self.suffix = '_' + label.replace(' ', '_') if row_item else None
+        self.depth = self._depth()
+
+    def _depth(self):
+        """Distance from the label baseline to the lowest thing _draw_field() draws"""
+        if self.type == 'section':
+            return 3
+        if self.type == 'textarea':
+            return self.area_height + 5
+        if self.type == 'checkbox':
+            return self.height
+        if self.type == 'radio':
+            return self.height + (len(self.options) - 1) * 20
+        if self.type == 'signature':
+            return self.height + 13
+        return self.height + 5
+
+
+# component key -> the block's Fields, shared by every form that uses it
+_COMPONENT_FIELDS = {}
+
+
+def build_fields(fields):
+    """Fields for a spec's field list (returned as is if already built)
+
+    A component() block maps to one shared tuple of Fields, registered like
+    the block itself so _fragment_at() recognises it.
+    """
+    if fields and isinstance(fields[0], Field):
+        return fields
+    built = []
+    n = 0
+    while n < len(fields):
+        entry = _COMPONENT_STARTS.get(id(fields[n]))
+        if entry is not None:
+            key, block = entry
+            if all(a is b for a, b in zip(fields[n:n + len(block)], block)) and n + len(block) <= len(fields):
+                models = _COMPONENT_FIELDS.get(key)
+                if models is None:
+                    models = _COMPONENT_FIELDS[key] = tuple(Field(spec) for spec in block)
+                    _COMPONENT_STARTS[id(models[0])] = (key, models)
+                built.extend(models)
+                n += len(block)
+                continue
+        built.append(Field(fields[n]))
+        n += 1
+    return built
+
+
+class Fragment:
+    """A component block laid out once at y = 0, placed at any y and field number"""
+
+    def __init__(self, calls, widgets, tops, end, lowest):
+        self.calls = calls        # (method, args, kwargs, widget (index, suffix) or None)
+        self.widgets = widgets    # (index, suffix, kind, x, y, width, height)
+        self.tops = tops          # y of each field relative to the first, for page-break checks
+        self.end = end            # y after the last field
+        self.lowest = lowest      # y of the lowest thing drawn, kept above FIELD_FLOOR
+
+    @classmethod
+    def record(cls, generator, block):
+        """Lay block out on a FragmentCanvas with _draw_field()"""
+        c = FragmentCanvas()
+        saved_rects, generator.widget_rects = generator.widget_rects, []
+        tops = []
+        y = lowest = 0
+        try:
+            for index, field in enumerate(build_fields(block)):
+                tops.append(y)
+                lowest = min(lowest, y - field.depth)
+                y = generator._draw_field(c, field, f"field_{index}", y)
+            rects = generator.widget_rects
+        finally:
+            generator.widget_rects = saved_rects
+
+        calls = []
+        for method, args, kwargs in c._calls:
+            widget = None
+            if 'name' in kwargs:
+                index, suffix = WIDGET_NAME_PATTERN.match(kwargs['name']).groups()
+                widget = (int(index), suffix)
+            calls.append((method, args, kwargs, widget))
+        widgets = []
+        for _, name, kind, x, y_rect, w, h in rects:
+            index, suffix = WIDGET_NAME_PATTERN.match(name).groups()
+            widgets.append((int(index), suffix, kind, x, y_rect, w, h))
+        return cls(calls, widgets, tops, y, lowest)
+
+    def __len__(self):
+        return len(self.tops)
+
+    def fits(self, y, bottom):
+        """True if no field of the block would start below bottom (where _draw_fields breaks the page)
+        or reach below FIELD_FLOOR"""
+        return y + self.lowest >= FIELD_FLOOR and all(y + top >= bottom for top in self.tops)
+
+    def place(self, generator, c, field_num, y):
+        """Replay the block onto c at y, numbering widgets from field_num; return y for the next field"""
+        for method, args, kwargs, widget in self.calls:
+            if method.startswith('acroForm.'):
+                kwargs = dict(kwargs, y=kwargs['y'] + y,
+                              name=f"field_{field_num + widget[0]}{widget[1]}")
+                getattr(c.acroForm, method[9:])(**kwargs)
+            else:
+                positions = Y_ARGUMENTS.get(method)
+                if positions:
+                    args = tuple(a + y if i in positions else a for i, a in enumerate(args))
+                getattr(c, method)(*args, **kwargs)
+        page = c.getPageNumber()
+        for index, suffix, kind, x, y_rect, w, h in self.widgets:
+            generator.widget_rects.append((page, f"field_{field_num + index}{suffix}", kind, x, y_rect + y, w, h))
+        return self.end + y
+
+
+# Fragments by (component key, margin, page width), shared by all generators
+_FRAGMENTS = {}
+
+
+def reportlab_canvas(buffer, deterministic):
+    """reportlab's canvas: the reference backend"""
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(buffer, pagesize=letter, invariant=int(deterministic))
+    # reportlab's AcroForm has no signature fields; give it the same call as pdf_writer's
+    c.acroForm.signature = functools.partial(_reportlab_signature, c.acroForm)
+    return c
+
+
+def _reportlab_signature(form, name, x, y, width, height):
+    """Add an unsigned signature field (/FT /Sig widget) to a reportlab AcroForm"""
+    from reportlab.pdfbase.pdfdoc import PDFArray, PDFDictionary, PDFName, PDFString
+
+    field = PDFDictionary(dict(
+        FT=PDFName('Sig'),
+        T=PDFString(name),
+        Rect=PDFArray((x, y, x + width, y + height)),
+        P=form.canv._doc.thisPageRef(),
+        Subtype=PDFName('Widget'),
+        Type=PDFName('Annot'),
+        F=4,
+    ))
+    form.canv._addAnnotation(field)
+    form.fields.append(form.getRef(field))
+    form.sigFlags = 1    # SignaturesExist
+
+
+def native_canvas(buffer, deterministic):
+    """pdf_writer.NativeCanvas: writes only what the forms use (always reproducible)"""
+    from pdf_writer import NativeCanvas
+
+    return NativeCanvas(buffer, pagesize=letter)
+
+
+# Canvas factories render_form() can draw with
+BACKENDS = {'reportlab': reportlab_canvas, 'native': native_canvas}
+
+
+class WileyFormGenerator:
+    def __init__(self, deterministic=None, backend='reportlab'):
         self.width, self.height = letter
         self.margin = 0.75 * inch
+        # Deterministic mode pins timestamps (SOURCE_DATE_EPOCH, or reportlab's
+        # fixed invariant date) and derives document IDs from content, so
+        # regenerating unchanged forms produces byte-identical files.
+        if deterministic is None:
+            deterministic = bool(os.environ.get('SOURCE_DATE_EPOCH'))
+        self.deterministic = deterministic
+        self.backend = BACKENDS[backend]
+        # (page, name, kind, x, y, width, height) of every widget drawn for
+        # the current form, for check_layout.py
+        self.widget_rects = []
+        # Place component() blocks from cached fragments (False draws them
+        # field by field; the output is the same)
+        self.use_fragments = True
+        # (slug, spec hash) stamped on each page as a form ID code, if set
+        self.form_id = None
+
+    def render_form(self, title, department, fields, instructions=None, slug=None):
+        """Render a branded fillable PDF form and return its bytes
+
+        With a slug, every page carries a form ID code (see form_id.py).
+        """
+        buffer = io.BytesIO()
+        c = self.backend(buffer, self.deterministic)
+        self.form_id = slug and (slug, spec_hash(title, department, fields, instructions))
+        self._draw_form(c, title, department, fields, instructions)
+        c.save()
+        data = buffer.getvalue()
+        if self.deterministic:
+            data = content_document_id(data)
+        return data
+
+    def render_compiled(self, form):
+        """render_form() for a compiled form (see compiled_forms()): replays its laid-out calls
+
+        Falls back to render_form() if this generator's page geometry differs
+        from the one the form was laid out for, or fragments are turned off.
+        """
+        spec = form['spec']
+        if form['geometry'] != (self.width, self.height, self.margin) or not self.use_fragments:
+            return self.render_form(spec['title'], spec['department'], spec['fields'], spec['instructions'],
+                                    slug=spec['slug'])
+        buffer = io.BytesIO()
+        c = self.backend(buffer, self.deterministic)
+        self.form_id = (spec['slug'], form['hash'])
+        self.widget_rects = list(form['widget_rects'])
+        for method, args, kwargs in form['calls']:
+            if method == 'formId':
+                self._draw_form_id(c)
+            elif method.startswith('acroForm.'):
+                getattr(c.acroForm, method[9:])(*args, **kwargs)
+            else:
+                getattr(c, method)(*args, **kwargs)
+        c.save()
+        data = buffer.getvalue()
+        if self.deterministic:
+            data = content_document_id(data)
+        return data
 
     def create_form(self, filename, title, department, fields, instructions=None):
         """Create a branded fillable PDF form"""
+        self.write_form(filename, self.render_form(title, department, fields, instructions,
+                                                   slug=os.path.splitext(filename)[0]))
+
+    def write_form(self, filename, data):
+        """Write a rendered form into FORMS_DIR"""
+        os.makedirs(FORMS_DIR, exist_ok=True)
         filepath = os.path.join(FORMS_DIR, filename)
-        c = canvas.Canvas(filepath, pagesize=letter)
+
+        # Leave unchanged files alone so their mtime and CDN cache survive
+        if os.path.exists(filepath):
+            with open(filepath, 'rb') as existing:
+                if existing.read() == data:
+                    print(f"Unchanged: {filename}")
+                    return
+        with open(filepath, 'wb') as f:
+            f.write(data)
+        print(f"Created: {filename}")
+
+    def _draw_form(self, c, title, department, fields, instructions=None):
+        """Draw every page of a form onto the canvas"""
+        self.widget_rects = []
 
         # Draw header
         self._draw_header(c, title, department)
@@ -53,8 +451,24 @@ class WileyFormGenerator:
         # Draw footer
         self._draw_footer(c)
 
-        c.save()
-        print(f"Created: {filename}")
+    def _record_widget(self, c, name, kind, x, y, width, height):
+        """Remember where a widget was placed"""
+        self.widget_rects.append((c.getPageNumber(), name, kind, x, y, width, height))
+
+    def _fragment_at(self, fields, field_num):
+        """Cached Fragment if a component() block starts at fields[field_num], else None"""
+        entry = _COMPONENT_STARTS.get(id(fields[field_num])) if self.use_fragments else None
+        if entry is None:
+            return None
+        key, block = entry
+        if not all(a is b for a, b in zip(fields[field_num:field_num + len(block)], block)) \
+                or field_num + len(block) > len(fields):
+            return None
+        cache_key = (key, self.margin, self.width)
+        fragment = _FRAGMENTS.get(cache_key)
+        if fragment is None:
+            fragment = _FRAGMENTS[cache_key] = Fragment.record(self, block)
+        return fragment
 
     def _draw_header(self, c, title, department):
         """Draw the form header with Wiley branding"""
@@ -92,6 +506,8 @@ class WileyFormGenerator:
         c.line(self.margin, self.height - 1.7 * inch,
                self.margin + 2.5 * inch, self.height - 1.7 * inch)
 
+        self._draw_form_id(c)
+
     def _draw_instructions(self, c, instructions, y_start):
         """Draw instruction text"""
         c.setFillColor(GRAY)
@@ -121,187 +537,212 @@ class WileyFormGenerator:
         return y - 10
 
     def _draw_fields(self, c, fields, y_start):
-        """Draw form fields"""
+        """Draw form fields (spec dicts or Fields)"""
+        fields = build_fields(fields)
         y = y_start - 20
         field_num = 0
+        page_top = self.height - 1.5 * inch
 
-        for field in fields:
-            if y < 1.5 * inch:
-                # New page needed
+        while field_num < len(fields):
+            # New page when the next field would start in the bottom band or
+            # reach the form ID code (unless it is already at the top of a page)
+            if y < 1.5 * inch or (y - fields[field_num].depth < FIELD_FLOOR and y < page_top):
                 c.showPage()
                 self._draw_header_minimal(c)
-                y = self.height - 1.5 * inch
-
-            field_type = field.get('type', 'text')
-            label = field.get('label', '')
-            width = field.get('width', 4) * inch
-            height = field.get('height', 0.3) * inch
-            required = field.get('required', False)
-            options = field.get('options', [])
-
-            # Draw label (skip for section and row types which handle their own labels)
-            if field_type not in ('section', 'row'):
-                c.setFillColor(CARBON)
-                c.setFont("Helvetica-Bold", 10)
-                label_text = label + (" *" if required else "")
-                c.drawString(self.margin, y, label_text)
-
-            field_y = y - height - 5
-            field_name = f"field_{field_num}"
+                y = page_top
 
-            if field_type == 'text':
-                # Text input field
-                c.setStrokeColor(SILVER)
-                c.setFillColor(colors.white)
-                c.rect(self.margin, field_y, width, height, fill=1, stroke=1)
+            # Shared components are placed from their cached fragment when
+            # the whole block fits on this page
+            fragment = self._fragment_at(fields, field_num)
+            if fragment is not None and fragment.fits(y, 1.5 * inch):
+                y = fragment.place(self, c, field_num, y)
+                field_num += len(fragment)
+                continue
 
-                # Add fillable field
-                form = c.acroForm
-                form.textfield(
-                    name=field_name,
-                    x=self.margin + 2,
-                    y=field_y + 2,
-                    width=width - 4,
-                    height=height - 4,
-                    borderWidth=0,
-                    fontSize=10,
-                    textColor=CARBON,
-                )
-
-            elif field_type == 'textarea':
-                # Multi-line text area
-                text_height = field.get('height', 1) * inch
-                c.setStrokeColor(SILVER)
-                c.setFillColor(colors.white)
-                c.rect(self.margin, field_y - text_height + height, width, text_height, fill=1, stroke=1)
-
-                form = c.acroForm
-                form.textfield(
-                    name=field_name,
-                    x=self.margin + 2,
-                    y=field_y - text_height + height + 2,
-                    width=width - 4,
-                    height=text_height - 4,
-                    borderWidth=0,
-                    fontSize=10,
-                    textColor=CARBON,
-                    fieldFlags='multiline',
-                )
-                field_y = field_y - text_height + height
+            y = self._draw_field(c, fields[field_num], f"field_{field_num}", y)
+            field_num += 1
 
-            elif field_type == 'checkbox':
-                # Checkbox
+    def _draw_field(self, c, field, field_name, y):
+        """Draw one Field with its label at y; return y for the next field"""
+        field_type = field.type
+        label = field.label
+        width = field.width
+        height = field.height
+        required = field.required
+        options = field.options
+
+        # Draw label (skip for section and row types which handle their own labels)
+        if field_type not in ('section', 'row'):
+            c.setFillColor(CARBON)
+            c.setFont("Helvetica-Bold", 10)
+            label_text = label + (" *" if required else "")
+            c.drawString(self.margin, y, label_text)
+
+        field_y = y - height - 5
+
+        if field_type == 'text':
+            # Text input field
+            c.setStrokeColor(SILVER)
+            c.setFillColor(colors.white)
+            c.rect(self.margin, field_y, width, height, fill=1, stroke=1)
+            self._record_widget(c, field_name, field_type, self.margin, field_y, width, height)
+
+            # Add fillable field
+            form = c.acroForm
+            form.textfield(
+                name=field_name,
+                x=self.margin + 2,
+                y=field_y + 2,
+                width=width - 4,
+                height=height - 4,
+                borderWidth=0,
+                fontSize=10,
+                textColor=CARBON,
+            )
+
+        elif field_type == 'textarea':
+            # Multi-line text area
+            text_height = field.area_height
+            c.setStrokeColor(SILVER)
+            c.setFillColor(colors.white)
+            c.rect(self.margin, field_y - text_height + height, width, text_height, fill=1, stroke=1)
+            self._record_widget(c, field_name, field_type, self.margin, field_y - text_height + height,
+                                width, text_height)
+
+            form = c.acroForm
+            form.textfield(
+                name=field_name,
+                x=self.margin + 2,
+                y=field_y - text_height + height + 2,
+                width=width - 4,
+                height=text_height - 4,
+                borderWidth=0,
+                fontSize=10,
+                textColor=CARBON,
+                fieldFlags='multiline',
+            )
+            field_y = field_y - text_height + height
+
+        elif field_type == 'checkbox':
+            # Checkbox
+            self._record_widget(c, field_name, field_type, self.margin, field_y + 5, 12, 12)
+            form = c.acroForm
+            form.checkbox(
+                name=field_name,
+                x=self.margin,
+                y=field_y + 5,
+                size=12,
+                borderColor=SILVER,
+                fillColor=colors.white,
+                textColor=WILDCAT_PURPLE,
+                checked=False,
+            )
+
+        elif field_type == 'radio':
+            # Radio buttons
+            for i, option in enumerate(options):
+                opt_y = field_y - (i * 20)
+                self._record_widget(c, f"{field_name}={option}", field_type, self.margin, opt_y + 5, 12, 12)
                 form = c.acroForm
-                form.checkbox(
+                form.radio(
                     name=field_name,
+                    value=option,
                     x=self.margin,
-                    y=field_y + 5,
+                    y=opt_y + 5,
                     size=12,
                     borderColor=SILVER,
                     fillColor=colors.white,
                     textColor=WILDCAT_PURPLE,
-                    checked=False,
+                    selected=(i == 0),
                 )
+                c.setFillColor(GRAY)
+                c.setFont("Helvetica", 9)
+                c.drawString(self.margin + 20, opt_y + 7, option)
+            field_y = field_y - (len(options) * 20)
+
+        elif field_type == 'date':
+            # Date field with format hint
+            c.setStrokeColor(SILVER)
+            c.setFillColor(colors.white)
+            c.rect(self.margin, field_y, 1.5 * inch, height, fill=1, stroke=1)
+            self._record_widget(c, field_name, field_type, self.margin, field_y, 1.5 * inch, height)
+
+            c.setFillColor(GRAY)
+            c.setFont("Helvetica", 8)
+            c.drawString(self.margin + 1.6 * inch, field_y + 8, "(MM/DD/YYYY)")
+
+            form = c.acroForm
+            form.textfield(
+                name=field_name,
+                x=self.margin + 2,
+                y=field_y + 2,
+                width=1.5 * inch - 4,
+                height=height - 4,
+                borderWidth=0,
+                fontSize=10,
+                textColor=CARBON,
+            )
+
+        elif field_type == 'signature':
+            # Signature line
+            sig_width = 3 * inch
+            # Signature line, "Sign above" and the date line beside it
+            self._record_widget(c, field_name, field_type, self.margin, field_y - 8, sig_width + 2.5 * inch, 30)
+            c.setStrokeColor(CARBON)
+            c.setLineWidth(1)
+            c.line(self.margin, field_y + 10, self.margin + sig_width, field_y + 10)
+            c.setFillColor(GRAY)
+            c.setFont("Helvetica", 8)
+            c.drawString(self.margin, field_y - 5, "Sign above")
+            # The field is signed with sign_forms.py or in a viewer
+            c.acroForm.signature(name=field_name, x=self.margin, y=field_y + 10, width=sig_width, height=12)
+
+            # Date next to signature
+            c.drawString(self.margin + sig_width + 0.5 * inch, field_y + 15, "Date:")
+            c.line(self.margin + sig_width + 0.9 * inch, field_y + 10,
+                   self.margin + sig_width + 2.5 * inch, field_y + 10)
+
+        elif field_type == 'section':
+            # Section header
+            c.setFillColor(WILEY_PURPLE)
+            c.setFont("Helvetica-Bold", 11)
+            c.drawString(self.margin, y, label)
+            c.setStrokeColor(WILEY_PURPLE)
+            c.setLineWidth(1)
+            c.line(self.margin, y - 3, self.width - self.margin, y - 3)
+            field_y = y - 10
+
+        elif field_type == 'row':
+            # Multiple fields in a row
+            x_offset = self.margin
+            for rf in field.fields:
+                rf_label = rf.label
+                rf_width = rf.width
+
+                c.setFillColor(CARBON)
+                c.setFont("Helvetica-Bold", 9)
+                c.drawString(x_offset, y, rf_label)
 
-            elif field_type == 'radio':
-                # Radio buttons
-                for i, option in enumerate(options):
-                    opt_y = field_y - (i * 20)
-                    form = c.acroForm
-                    form.radio(
-                        name=field_name,
-                        value=option,
-                        x=self.margin,
-                        y=opt_y + 5,
-                        size=12,
-                        borderColor=SILVER,
-                        fillColor=colors.white,
-                        textColor=WILDCAT_PURPLE,
-                        selected=(i == 0),
-                    )
-                    c.setFillColor(GRAY)
-                    c.setFont("Helvetica", 9)
-                    c.drawString(self.margin + 20, opt_y + 7, option)
-                field_y = field_y - (len(options) * 20)
-
-            elif field_type == 'date':
-                # Date field with format hint
                 c.setStrokeColor(SILVER)
                 c.setFillColor(colors.white)
-                c.rect(self.margin, field_y, 1.5 * inch, height, fill=1, stroke=1)
-
-                c.setFillColor(GRAY)
-                c.setFont("Helvetica", 8)
-                c.drawString(self.margin + 1.6 * inch, field_y + 8, "(MM/DD/YYYY)")
+                c.rect(x_offset, field_y, rf_width - 10, height, fill=1, stroke=1)
+                self._record_widget(c, field_name + rf.suffix, 'text',
+                                    x_offset, field_y, rf_width - 10, height)
 
                 form = c.acroForm
                 form.textfield(
-                    name=field_name,
-                    x=self.margin + 2,
+                    name=field_name + rf.suffix,
+                    x=x_offset + 2,
                     y=field_y + 2,
-                    width=1.5 * inch - 4,
+                    width=rf_width - 14,
                     height=height - 4,
                     borderWidth=0,
                     fontSize=10,
                     textColor=CARBON,
                 )
+                x_offset += rf_width
 
-            elif field_type == 'signature':
-                # Signature line
-                sig_width = 3 * inch
-                c.setStrokeColor(CARBON)
-                c.setLineWidth(1)
-                c.line(self.margin, field_y + 10, self.margin + sig_width, field_y + 10)
-                c.setFillColor(GRAY)
-                c.setFont("Helvetica", 8)
-                c.drawString(self.margin, field_y - 5, "Sign above")
-
-                # Date next to signature
-                c.drawString(self.margin + sig_width + 0.5 * inch, field_y + 15, "Date:")
-                c.line(self.margin + sig_width + 0.9 * inch, field_y + 10,
-                       self.margin + sig_width + 2.5 * inch, field_y + 10)
-
-            elif field_type == 'section':
-                # Section header
-                c.setFillColor(WILEY_PURPLE)
-                c.setFont("Helvetica-Bold", 11)
-                c.drawString(self.margin, y, label)
-                c.setStrokeColor(WILEY_PURPLE)
-                c.setLineWidth(1)
-                c.line(self.margin, y - 3, self.width - self.margin, y - 3)
-                field_y = y - 10
-
-            elif field_type == 'row':
-                # Multiple fields in a row
-                row_fields = field.get('fields', [])
-                x_offset = self.margin
-                for rf in row_fields:
-                    rf_label = rf.get('label', '')
-                    rf_width = rf.get('width', 2) * inch
-
-                    c.setFillColor(CARBON)
-                    c.setFont("Helvetica-Bold", 9)
-                    c.drawString(x_offset, y, rf_label)
-
-                    c.setStrokeColor(SILVER)
-                    c.setFillColor(colors.white)
-                    c.rect(x_offset, field_y, rf_width - 10, height, fill=1, stroke=1)
-
-                    form = c.acroForm
-                    form.textfield(
-                        name=f"{field_name}_{rf_label.replace(' ', '_')}",
-                        x=x_offset + 2,
-                        y=field_y + 2,
-                        width=rf_width - 14,
-                        height=height - 4,
-                        borderWidth=0,
-                        fontSize=10,
-                        textColor=CARBON,
-                    )
-                    x_offset += rf_width
-
-            y = field_y - 30
-            field_num += 1
+        return field_y - 30
 
     def _draw_header_minimal(self, c):
         """Draw minimal header for continuation pages"""
@@ -312,6 +753,34 @@ class WileyFormGenerator:
         c.setLineWidth(1)
         c.line(self.margin, self.height - 0.6 * inch, self.width - self.margin, self.height - 0.6 * inch)
 
+        self._draw_form_id(c)
+
+    def _draw_form_id(self, c, page=None):
+        """Stamp the form ID code for the current page (slug, spec hash, page number)"""
+        if not self.form_id:
+            return
+        if isinstance(c, LayoutCanvas):
+            # Compiled forms keep one call per code; render_compiled() draws it
+            c._calls.append(('formId', (), {}))
+            return
+        modules = form_id_modules(form_id_payload(*self.form_id, page or c.getPageNumber()))
+        size = FORM_ID_SIZE / len(modules)
+        left = self.width - FORM_ID_RIGHT
+        top = FORM_ID_BOTTOM + FORM_ID_SIZE
+        c.setFillColor(colors.black)
+        # One rect per run of dark modules in a row
+        for r, row in enumerate(modules):
+            col = 0
+            while col < len(row):
+                if not row[col]:
+                    col += 1
+                    continue
+                end = col
+                while end < len(row) and row[end]:
+                    end += 1
+                c.rect(left + col * size, top - (r + 1) * size, (end - col) * size, size, fill=1, stroke=0)
+                col = end
+
     def _draw_footer(self, c):
         """Draw form footer"""
         # Footer line
@@ -334,9 +803,223 @@ class WileyFormGenerator:
         c.drawRightString(self.width - self.margin, 0.35 * inch, "* Required fields")
 
 
-def create_all_forms():
-    """Generate all Business & Finance forms"""
+class FormSpecCollector:
+    """Stands in for WileyFormGenerator and records each form spec instead of drawing it"""
+
+    def __init__(self):
+        self.forms = []
+
+    def create_form(self, filename, title, department, fields, instructions=None):
+        """Record a form spec"""
+        self.forms.append({
+            'slug': os.path.splitext(filename)[0],
+            'filename': filename,
+            'title': title,
+            'department': department,
+            'fields': fields,
+            'instructions': instructions,
+        })
+
+
+def collect_form_specs():
+    """Run create_all_forms() and return the spec of every form, in order, without rendering"""
+    collector = FormSpecCollector()
+    create_all_forms(collector)
+    return collector.forms
+
+
+def load_form_specs():
+    """Return the spec of every form in create_all_forms(), in order, without rendering
+
+    Specs come from the compiled spec cache, so this is a file read when
+    generate_forms.py has not changed.
+    """
+    return [dict(form['spec']) for form in compiled_forms()]
+
+
+def validate_form_spec(spec):
+    """Raise ValueError if a spec has a field _draw_field() cannot draw"""
+    for n, field in enumerate(spec['fields']):
+        try:
+            Field(field)
+        except ValueError as error:
+            raise ValueError(f"{spec['slug']} field {n} ({field.get('label', field.get('type'))!r}): {error}")
+
+
+def spec_cache_key():
+    """Hash of everything a compiled form depends on: this module's source and reportlab"""
+    import reportlab
+
+    with open(os.path.abspath(__file__), 'rb') as f:
+        source = f.read()
+    version = f"{reportlab.Version}/{sys.version_info[0]}.{sys.version_info[1]}/{pickle.HIGHEST_PROTOCOL}"
+    return hashlib.sha256(source + version.encode('ascii')).hexdigest()[:16]
+
+
+def compile_forms():
+    """Validated, laid-out forms: {'key', 'forms', 'components'}
+
+    Each form has its spec, spec hash, page count, the canvas and acroForm
+    calls _draw_form() makes ('formId' where the form ID code goes) and the widget rects,
+    laid out for the default generator. 'components' keeps the component()
+    blocks the specs share, so their identity survives pickling.
+    """
+    specs = collect_form_specs()
+    slugs = set()
     generator = WileyFormGenerator()
+    forms = []
+    for spec in specs:
+        if spec['slug'] in slugs:
+            raise ValueError(f"duplicate form {spec['slug']!r}")
+        slugs.add(spec['slug'])
+        validate_form_spec(spec)
+        digest = spec_hash(spec['title'], spec['department'], spec['fields'], spec['instructions'])
+        c = LayoutCanvas()
+        generator.form_id = (spec['slug'], digest)
+        generator._draw_form(c, spec['title'], spec['department'], spec['fields'], spec['instructions'])
+        forms.append({
+            'spec': spec,
+            'hash': digest,
+            'pages': c.getPageNumber(),
+            'calls': c._calls,
+            'widget_rects': generator.widget_rects,
+            'geometry': (generator.width, generator.height, generator.margin),
+        })
+    return {'key': spec_cache_key(), 'forms': forms, 'components': dict(_COMPONENTS)}
+
+
+def _read_spec_cache(path):
+    """Compiled forms from a cache file, with their component blocks registered"""
+    with open(path, 'rb') as f:
+        compiled = pickle.load(f)
+    for key, block in compiled['components'].items():
+        _COMPONENTS.setdefault(key, block)
+        _COMPONENT_STARTS[id(block[0])] = (key, block)
+    return compiled
+
+
+_compiled = None
+
+
+def compiled_forms():
+    """Compiled forms (see compile_forms()), loaded from .build-cache/specs/ when
+    this module is unchanged, else compiled and saved"""
+    global _compiled
+    key = spec_cache_key()
+    if _compiled is not None and _compiled['key'] == key:
+        return _compiled['forms']
+    path = os.path.join(SPEC_CACHE_DIR, f"{key}.pickle")
+    try:
+        _compiled = _read_spec_cache(path)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, KeyError):
+        _compiled = compile_forms()
+        os.makedirs(SPEC_CACHE_DIR, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            pickle.dump(_compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+        for name in os.listdir(SPEC_CACHE_DIR):
+            if name.endswith('.pickle') and name != os.path.basename(path):
+                os.remove(os.path.join(SPEC_CACHE_DIR, name))
+    return _compiled['forms']
+
+
+def field_key(label, max_length=48):
+    """'Routing Number (9 digits)' -> 'routing_number_9_digits', cut at a word boundary"""
+    key = re.sub(r'[^a-z0-9]+', '_', label.lower()).strip('_') or 'field'
+    if len(key) > max_length:
+        key = key[:max_length + 1].rsplit('_', 1)[0]
+    return key
+
+
+def input_fields(fields):
+    """Flatten a form's fields into the values a submission carries, in form order
+
+    Each entry has the PDF field name _draw_fields() gives the widget (None
+    for signatures, which are signed rather than filled), a snake_case key unique
+    within the form, and the spec's type, label, required flag and options.
+    Row sub-fields are text fields.
+    """
+    inputs = []
+    seen = set()
+
+    def add(name, field_type, spec):
+        label = spec.get('label', '')
+        key = base = field_key(label)
+        n = 2
+        while key in seen:
+            key = f"{base}_{n}"
+            n += 1
+        seen.add(key)
+        inputs.append({
+            'name': name,
+            'key': key,
+            'type': field_type,
+            'label': label,
+            'required': spec.get('required', False),
+            'options': spec.get('options', []),
+        })
+
+    for field_num, field in enumerate(fields):
+        field_type = field.get('type', 'text')
+        field_name = f"field_{field_num}"
+        if field_type == 'section':
+            continue
+        if field_type == 'row':
+            for rf in field.get('fields', []):
+                add(f"{field_name}_{rf.get('label', '').replace(' ', '_')}", 'text', rf)
+        else:
+            add(None if field_type == 'signature' else field_name, field_type, field)
+    return inputs
+
+
+# Blocks many forms share. component() returns the same field dicts every
+# time it is called with the same arguments, so _draw_fields() can recognise
+# a block by identity and place it from a Fragment laid out once per process.
+_COMPONENT_BUILDERS = {
+    'employee_info': lambda: (
+        {'type': 'section', 'label': 'Employee Information'},
+        {'type': 'row', 'fields': [
+            {'label': 'Name', 'width': 3},
+            {'label': 'Employee ID', 'width': 2},
+        ]},
+    ),
+    'student_info': lambda name_label='Name': (
+        {'type': 'section', 'label': 'Student Information'},
+        {'type': 'row', 'fields': [
+            {'label': name_label, 'width': 3},
+            {'label': 'Student ID', 'width': 2},
+        ]},
+    ),
+    'approval_ladder': lambda first='Supervisor': (
+        {'type': 'section', 'label': 'Approvals'},
+        {'type': 'signature', 'label': first},
+        {'type': 'signature', 'label': 'Comptroller'},
+        {'type': 'signature', 'label': 'Division Vice President'},
+        {'type': 'signature', 'label': 'Business & Finance Vice President'},
+        {'type': 'signature', 'label': 'President'},
+    ),
+}
+
+_COMPONENTS = {}
+# id(first field of a block) -> (component key, block)
+_COMPONENT_STARTS = {}
+
+
+def component(name, **params):
+    """Fields of a shared block, to splice into a spec with *component(...)"""
+    key = (name, tuple(sorted(params.items())))
+    block = _COMPONENTS.get(key)
+    if block is None:
+        block = _COMPONENTS[key] = _COMPONENT_BUILDERS[name](**params)
+        _COMPONENT_STARTS[id(block[0])] = (key, block)
+    return block
+
+
+def create_all_forms(generator=None):
+    """Generate all Business & Finance forms"""
+    if generator is None:
+        generator = WileyFormGenerator()
 
     # ==================== BUSINESS OFFICE FORMS ====================
 
@@ -401,12 +1084,7 @@ def create_all_forms():
             {'type': 'textarea', 'label': 'Additional Notes/Explanation', 'width': 6, 'height': 0.8},
             {'type': 'section', 'label': 'Employee Certification'},
             {'type': 'signature', 'label': 'Employee Signature'},
-            {'type': 'section', 'label': 'Approvals'},
-            {'type': 'signature', 'label': 'Supervisor'},
-            {'type': 'signature', 'label': 'Comptroller'},
-            {'type': 'signature', 'label': 'Division Vice President'},
-            {'type': 'signature', 'label': 'Business & Finance Vice President'},
-            {'type': 'signature', 'label': 'President'},
+            *component('approval_ladder'),
         ],
         "Submit this form with original receipts for all expenses over $25. Allow 2-3 weeks for processing."
     )
@@ -417,11 +1095,7 @@ def create_all_forms():
         "Expense Report",
         "Business Office",
         [
-            {'type': 'section', 'label': 'Employee Information'},
-            {'type': 'row', 'fields': [
-                {'label': 'Name', 'width': 3},
-                {'label': 'Employee ID', 'width': 2},
-            ]},
+            *component('employee_info'),
             {'type': 'row', 'fields': [
                 {'label': 'Department', 'width': 3},
                 {'label': 'Budget Code', 'width': 2},
@@ -450,12 +1124,7 @@ def create_all_forms():
             {'type': 'section', 'label': 'Certification'},
             {'type': 'checkbox', 'label': 'I certify that these expenses are accurate and were incurred for university business.'},
             {'type': 'signature', 'label': 'Employee Signature'},
-            {'type': 'section', 'label': 'Approvals'},
-            {'type': 'signature', 'label': 'Supervisor'},
-            {'type': 'signature', 'label': 'Comptroller'},
-            {'type': 'signature', 'label': 'Division Vice President'},
-            {'type': 'signature', 'label': 'Business & Finance Vice President'},
-            {'type': 'signature', 'label': 'President'},
+            *component('approval_ladder'),
         ],
         "Attach all original receipts. Expenses over $75 require itemized receipts."
     )
@@ -492,12 +1161,7 @@ def create_all_forms():
             {'type': 'checkbox', 'label': 'W-9 on file'},
             {'type': 'section', 'label': 'Requestor Certification'},
             {'type': 'signature', 'label': 'Requestor Signature'},
-            {'type': 'section', 'label': 'Approvals'},
-            {'type': 'signature', 'label': 'Budget Manager'},
-            {'type': 'signature', 'label': 'Comptroller'},
-            {'type': 'signature', 'label': 'Division Vice President'},
-            {'type': 'signature', 'label': 'Business & Finance Vice President'},
-            {'type': 'signature', 'label': 'President'},
+            *component('approval_ladder', first='Budget Manager'),
         ],
         "Attach invoice and any supporting documentation. W-9 must be on file before payment can be processed."
     )
@@ -524,12 +1188,7 @@ def create_all_forms():
             {'type': 'text', 'label': 'Change Returned', 'width': 2},
             {'type': 'section', 'label': 'Requestor Certification'},
             {'type': 'signature', 'label': 'Requestor Signature'},
-            {'type': 'section', 'label': 'Approvals'},
-            {'type': 'signature', 'label': 'Supervisor'},
-            {'type': 'signature', 'label': 'Comptroller'},
-            {'type': 'signature', 'label': 'Division Vice President'},
-            {'type': 'signature', 'label': 'Business & Finance Vice President'},
-            {'type': 'signature', 'label': 'President'},
+            *component('approval_ladder'),
         ],
         "Petty cash requests are limited to $100. Attach all receipts. Unused funds must be returned within 5 business days."
     )
@@ -606,11 +1265,7 @@ def create_all_forms():
         "Key Request Form",
         "Facilities Management",
         [
-            {'type': 'section', 'label': 'Employee Information'},
-            {'type': 'row', 'fields': [
-                {'label': 'Name', 'width': 3},
-                {'label': 'Employee ID', 'width': 2},
-            ]},
+            *component('employee_info'),
             {'type': 'row', 'fields': [
                 {'label': 'Department', 'width': 3},
                 {'label': 'Position/Title', 'width': 2.5},
@@ -721,11 +1376,7 @@ def create_all_forms():
         "Verification Worksheet",
         "Financial Aid",
         [
-            {'type': 'section', 'label': 'Student Information'},
-            {'type': 'row', 'fields': [
-                {'label': 'Student Name', 'width': 3},
-                {'label': 'Student ID', 'width': 2},
-            ]},
+            *component('student_info', name_label='Student Name'),
             {'type': 'row', 'fields': [
                 {'label': 'Date of Birth', 'width': 2},
                 {'label': 'Phone', 'width': 2},
@@ -758,11 +1409,7 @@ def create_all_forms():
         "Dependency Override Appeal",
         "Financial Aid",
         [
-            {'type': 'section', 'label': 'Student Information'},
-            {'type': 'row', 'fields': [
-                {'label': 'Name', 'width': 3},
-                {'label': 'Student ID', 'width': 2},
-            ]},
+            *component('student_info'),
             {'type': 'row', 'fields': [
                 {'label': 'Date of Birth', 'width': 2},
                 {'label': 'Phone', 'width': 2},
@@ -791,11 +1438,7 @@ def create_all_forms():
         "Satisfactory Academic Progress (SAP) Appeal",
         "Financial Aid",
         [
-            {'type': 'section', 'label': 'Student Information'},
-            {'type': 'row', 'fields': [
-                {'label': 'Name', 'width': 3},
-                {'label': 'Student ID', 'width': 2},
-            ]},
+            *component('student_info'),
             {'type': 'row', 'fields': [
                 {'label': 'Phone', 'width': 2},
                 {'label': 'Email', 'width': 3},
@@ -825,11 +1468,7 @@ def create_all_forms():
         "Special Circumstances Form",
         "Financial Aid",
         [
-            {'type': 'section', 'label': 'Student Information'},
-            {'type': 'row', 'fields': [
-                {'label': 'Name', 'width': 3},
-                {'label': 'Student ID', 'width': 2},
-            ]},
+            *component('student_info'),
             {'type': 'text', 'label': 'Email', 'width': 4, 'required': True},
             {'type': 'text', 'label': 'Phone', 'width': 2.5},
             {'type': 'section', 'label': 'Reason for Request'},
@@ -863,11 +1502,7 @@ def create_all_forms():
         "Institutional Scholarship Application",
         "Financial Aid",
         [
-            {'type': 'section', 'label': 'Student Information'},
-            {'type': 'row', 'fields': [
-                {'label': 'Name', 'width': 3},
-                {'label': 'Student ID', 'width': 2},
-            ]},
+            *component('student_info'),
             {'type': 'row', 'fields': [
                 {'label': 'Date of Birth', 'width': 2},
                 {'label': 'Classification', 'width': 2},
@@ -902,11 +1537,7 @@ def create_all_forms():
         "Payment Plan Enrollment",
         "Student Accounts",
         [
-            {'type': 'section', 'label': 'Student Information'},
-            {'type': 'row', 'fields': [
-                {'label': 'Student Name', 'width': 3},
-                {'label': 'Student ID', 'width': 2},
-            ]},
+            *component('student_info', name_label='Student Name'),
             {'type': 'text', 'label': 'Email', 'width': 4, 'required': True},
             {'type': 'text', 'label': 'Phone', 'width': 2.5, 'required': True},
             {'type': 'section', 'label': 'Semester'},
@@ -934,11 +1565,7 @@ def create_all_forms():
         "Third-Party Billing Authorization",
         "Student Accounts",
         [
-            {'type': 'section', 'label': 'Student Information'},
-            {'type': 'row', 'fields': [
-                {'label': 'Student Name', 'width': 3},
-                {'label': 'Student ID', 'width': 2},
-            ]},
+            *component('student_info', name_label='Student Name'),
             {'type': 'text', 'label': 'Email', 'width': 4, 'required': True},
             {'type': 'text', 'label': 'Phone', 'width': 2.5},
             {'type': 'section', 'label': 'Third-Party Sponsor Information'},
@@ -976,11 +1603,7 @@ def create_all_forms():
         "Tuition/Fee Appeal Form",
         "Student Accounts",
         [
-            {'type': 'section', 'label': 'Student Information'},
-            {'type': 'row', 'fields': [
-                {'label': 'Name', 'width': 3},
-                {'label': 'Student ID', 'width': 2},
-            ]},
+            *component('student_info'),
             {'type': 'text', 'label': 'Email', 'width': 4, 'required': True},
             {'type': 'text', 'label': 'Phone', 'width': 2.5},
             {'type': 'section', 'label': 'Appeal Details'},
@@ -1008,11 +1631,7 @@ def create_all_forms():
         "1098-T Electronic Consent Form",
         "Student Accounts",
         [
-            {'type': 'section', 'label': 'Student Information'},
-            {'type': 'row', 'fields': [
-                {'label': 'Name', 'width': 3},
-                {'label': 'Student ID', 'width': 2},
-            ]},
+            *component('student_info'),
             {'type': 'text', 'label': 'Social Security Number (last 4 digits)', 'width': 2},
             {'type': 'text', 'label': 'Email', 'width': 4, 'required': True},
             {'type': 'section', 'label': 'Consent Selection'},
@@ -1308,11 +1927,7 @@ def create_all_forms():
         "Driver Authorization Form",
         "Transportation & Fleet",
         [
-            {'type': 'section', 'label': 'Employee Information'},
-            {'type': 'row', 'fields': [
-                {'label': 'Name', 'width': 3},
-                {'label': 'Employee ID', 'width': 2},
-            ]},
+            *component('employee_info'),
             {'type': 'text', 'label': 'Department', 'width': 3, 'required': True},
             {'type': 'row', 'fields': [
                 {'label': 'Phone', 'width': 2},
@@ -1730,11 +2345,7 @@ def create_all_forms():
         "System/Account Access Request",
         "Information Technology",
         [
-            {'type': 'section', 'label': 'Employee Information'},
-            {'type': 'row', 'fields': [
-                {'label': 'Name', 'width': 3},
-                {'label': 'Employee ID', 'width': 2},
-            ]},
+            *component('employee_info'),
             {'type': 'row', 'fields': [
                 {'label': 'Department', 'width': 3},
                 {'label': 'Position/Title', 'width': 2.5},
@@ -1773,11 +2384,7 @@ def create_all_forms():
         "Meal Plan Change Request",
         "Auxiliary Services",
         [
-            {'type': 'section', 'label': 'Student Information'},
-            {'type': 'row', 'fields': [
-                {'label': 'Name', 'width': 3},
-                {'label': 'Student ID', 'width': 2},
-            ]},
+            *component('student_info'),
             {'type': 'text', 'label': 'Email', 'width': 4, 'required': True},
             {'type': 'text', 'label': 'Phone', 'width': 2.5},
             {'type': 'text', 'label': 'Residence Hall/Room', 'width': 3},
@@ -1875,6 +2482,53 @@ def create_all_forms():
         "Submit application at least 3 weeks before event. All vendors must provide proof of insurance."
     )
 
+
+SPEC_LOAD_SNIPPET = (
+    "import time, generate_forms; start = time.perf_counter(); "
+    "generate_forms.compiled_forms(); print(time.perf_counter() - start)"
+)
+
+
+def spec_cache_timings(generator, repeat=5):
+    """Print cold (source + layout) vs warm (cache file) load times in fresh
+    processes, and render times from specs vs from the compiled layout"""
+    import subprocess
+    import tempfile
+
+    def fresh_load(cache_dir):
+        result = subprocess.run([sys.executable, '-c', SPEC_LOAD_SNIPPET], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)),
+                                env=dict(os.environ, WILEY_SPEC_CACHE_DIR=cache_dir))
+        return float(result.stdout)
+
+    cold = warm = None
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cold = min(cold or 1e9, fresh_load(cache_dir))
+            warm = min(warm or 1e9, fresh_load(cache_dir))
+            size = sum(os.path.getsize(os.path.join(cache_dir, name)) for name in os.listdir(cache_dir))
+    forms = compiled_forms()
+    print(f"{len(forms)} forms, cache {size / 1024:.0f} KB; compiled_forms() in a fresh process, best of {repeat}:")
+    print(f"  cold (create_all_forms + validation + layout): {cold * 1000:7.1f} ms")
+    print(f"  warm (cache file):                              {warm * 1000:7.1f} ms ({cold / warm:.0f}x faster)")
+
+    def best(run):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    direct = best(lambda: [generator.render_form(f['spec']['title'], f['spec']['department'], f['spec']['fields'],
+                                                 f['spec']['instructions'], slug=f['spec']['slug']) for f in forms])
+    replayed = best(lambda: [generator.render_compiled(form) for form in forms])
+    print(f"  render all with {generator.backend.__name__}: from specs {direct * 1000:.1f} ms, "
+          f"from the compiled layout {replayed * 1000:.1f} ms")
+
+
+def print_summary():
+    """Print where the forms went and how many each department has"""
     print("\n" + "="*50)
     print("All 33 forms have been created successfully!")
     print("="*50)
@@ -1891,4 +2545,21 @@ def create_all_forms():
 
 
 if __name__ == "__main__":
-    create_all_forms()
+    parser = argparse.ArgumentParser(description="Generate the Business & Finance PDF forms")
+    parser.add_argument('--deterministic', action='store_true', default=None,
+                        help="byte-reproducible output (implied when SOURCE_DATE_EPOCH is set)")
+    parser.add_argument('--output-dir', default=None, help=f"where to write the PDFs (default: {FORMS_DIR})")
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='reportlab',
+                        help="PDF writer (default: reportlab; native is the minimal pdf_writer.py)")
+    parser.add_argument('--cache-timings', action='store_true',
+                        help="report cold vs warm compiled-spec loading and rendering instead of writing forms")
+    args = parser.parse_args()
+    if args.output_dir:
+        FORMS_DIR = args.output_dir
+    generator = WileyFormGenerator(deterministic=args.deterministic, backend=args.backend)
+    if args.cache_timings:
+        spec_cache_timings(generator)
+        sys.exit(0)
+    for form in compiled_forms():
+        generator.write_form(form['spec']['filename'], generator.render_compiled(form))
+    print_summary()
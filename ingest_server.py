@@ -0,0 +1,551 @@
+#!/usr/bin/env python3
+"""
+Wiley University - Business & Finance Website
+Batched submission ingestion service
+
+A local stand-in for the Google Sheets Apps Script in
+online-forms/GOOGLE_SHEETS_SETUP.md. It accepts the same POST body
+({"formType": ..., "fields": {...}}) and answers with the same
+{"status": "success", "submissionId": "WU-XXX-<ms timestamp>"} response.
+
+Instead of reading the header row and appending one row per request, it
+keeps each form's column list in memory and queues submissions for a
+single writer thread. The writer stores everything that arrived in the
+meantime with one transaction per form (group commit) and then releases
+the waiting requests, so a response still means the row is on disk. If a
+batch fails it is rolled back and retried form by form; the submissions
+that still fail get a 500 and the writer carries on.
+
+Storage is one SQLite table per form type (default) or one CSV file per
+form type.
+
+    python3 ingest_server.py serve --port 8765
+    python3 ingest_server.py loadgen --url http://127.0.0.1:8765/ --clients 32 --seconds 10
+    python3 ingest_server.py bench
+"""
+
+import argparse
+import csv
+import glob
+import http.client
+import json
+import os
+import queue
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STORAGE_DIR = os.path.join(BASE_DIR, 'submissions')
+ONLINE_FORMS_DIR = os.path.join(BASE_DIR, 'online-forms')
+
+MAX_BATCH = 500          # submissions written per transaction at most
+MAX_BODY_BYTES = 256 * 1024
+FIXED_COLUMNS = ('Timestamp', 'Submission ID')
+RESERVED_COLUMNS = frozenset(name.casefold() for name in FIXED_COLUMNS)
+
+# <form name="it-support-request" ...> on an online-forms page
+FORM_NAME_PATTERN = re.compile(r'<form\b[^>]*\bname\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+
+
+class SubmissionIds:
+    """WU-XXX-<ms timestamp> IDs, bumped by a millisecond when two land together"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last = {}
+
+    def next(self, form_type):
+        prefix = form_type[:3].upper()
+        with self._lock:
+            stamp = max(int(time.time() * 1000), self._last.get(prefix, 0) + 1)
+            self._last[prefix] = stamp
+        return f"WU-{prefix}-{stamp}"
+
+
+class Columns:
+    """A form's header row, mapping field names onto distinct column names
+
+    SQLite compares column names case-insensitively, so a field whose name
+    differs only in case from an existing column, or matches one of the fixed
+    columns (a field called "timestamp"), gets a numbered column of its own
+    ("timestamp (2)") instead of colliding. The mapping is worked out from the
+    header alone, so it comes out the same after a restart.
+    """
+
+    def __init__(self, names=FIXED_COLUMNS):
+        self.names = list(names)
+        self._exact = set(self.names)
+        self._folded = {name.casefold() for name in self.names}
+
+    def assign(self, fields):
+        """({column: text} for a submission's fields, [columns this added])"""
+        values, added = {}, []
+        for name, value in fields.items():
+            name = str(name).strip() or 'Unnamed'
+            n = 1
+            while True:
+                column = name if n == 1 else f"{name} ({n})"
+                folded = column.casefold()
+                n += 1
+                if folded in RESERVED_COLUMNS or column in values:
+                    continue
+                if column in self._exact:
+                    break
+                if folded not in self._folded:
+                    self.names.append(column)
+                    self._exact.add(column)
+                    self._folded.add(folded)
+                    added.append(column)
+                    break
+            values[column] = cell(value)
+        return values, added
+
+    def row(self, timestamp, submission_id, values):
+        return [timestamp, submission_id] + [values.get(c, '') for c in self.names[len(FIXED_COLUMNS):]]
+
+
+class SQLiteSink:
+    """One table per form type; new field names become new columns"""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=FULL')
+        self._load_columns()
+
+    def _load_columns(self):
+        self._columns = {}   # form type -> Columns (the cached header map)
+        for (table,) in self.conn.execute("SELECT name FROM sqlite_master WHERE type='table'"):
+            self._columns[table] = Columns(row[1] for row in self.conn.execute(f'PRAGMA table_info({quote(table)})'))
+
+    def write(self, form_type, rows):
+        if not self.conn.in_transaction:
+            self.conn.execute('BEGIN')     # so CREATE and ALTER roll back with the rows
+        columns = self._columns.get(form_type)
+        if columns is None:
+            columns = Columns()
+            self.conn.execute(f"CREATE TABLE {quote(form_type)} "
+                              f"({', '.join(quote(c) + ' TEXT' for c in columns.names)})")
+            self._columns[form_type] = columns
+        assigned = []
+        for timestamp, submission_id, fields in rows:
+            values, added = columns.assign(fields)
+            for name in added:
+                self.conn.execute(f'ALTER TABLE {quote(form_type)} ADD COLUMN {quote(name)} TEXT')
+            assigned.append((timestamp, submission_id, values))
+        placeholders = ', '.join('?' * len(columns.names))
+        self.conn.executemany(
+            f"INSERT INTO {quote(form_type)} ({', '.join(map(quote, columns.names))}) VALUES ({placeholders})",
+            [columns.row(*row) for row in assigned],
+        )
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+        self._load_columns()
+
+    def close(self):
+        self.conn.close()
+
+
+class CSVSink:
+    """One CSV per form type; a field first seen after the header was written rewrites the header"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._files = {}     # form type -> (handle, writer, Columns)
+        self._pending = {}   # form type -> file size before the uncommitted rows
+
+    def _open(self, form_type):
+        path = os.path.join(self.directory, f"{safe_name(form_type)}.csv")
+        columns = Columns()
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, newline='', encoding='utf-8') as f:
+                columns = Columns(next(csv.reader(f)))
+        else:
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                csv.writer(f).writerow(columns.names)
+        handle = open(path, 'a', newline='', encoding='utf-8')
+        self._files[form_type] = (handle, csv.writer(handle), columns)
+        return self._files[form_type]
+
+    def _rewrite_header(self, form_type):
+        """Rewrite a form's CSV under its grown header, padding the existing rows"""
+        handle, _, columns = self._files.pop(form_type)
+        handle.close()
+        path = handle.name
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.reader(f))[1:]
+        with open(path + '.tmp', 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns.names)
+            writer.writerows(row + [''] * (len(columns.names) - len(row)) for row in rows)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+        handle = open(path, 'a', newline='', encoding='utf-8')
+        self._files[form_type] = (handle, csv.writer(handle), columns)
+
+    def write(self, form_type, rows):
+        entry = self._files.get(form_type) or self._open(form_type)
+        columns = entry[2]
+        header = len(columns.names)
+        assigned = [(timestamp, submission_id, columns.assign(fields)[0]) for timestamp, submission_id, fields in rows]
+        if len(columns.names) > header:
+            self._rewrite_header(form_type)
+        handle, writer, _ = self._files[form_type]
+        self._pending.setdefault(form_type, handle.tell())
+        writer.writerows(columns.row(*row) for row in assigned)
+
+    def commit(self):
+        for handle, _, _ in self._files.values():
+            handle.flush()
+            os.fsync(handle.fileno())
+        self._pending.clear()
+
+    def rollback(self):
+        """Drop the uncommitted rows and re-read the headers"""
+        for form_type, size in self._pending.items():
+            handle = self._files.pop(form_type)[0]
+            try:
+                handle.flush()
+            finally:
+                handle.close()
+                os.truncate(handle.name, size)
+        self._pending.clear()
+
+    def close(self):
+        for handle, _, _ in self._files.values():
+            handle.close()
+
+
+def quote(identifier):
+    """SQLite identifier quoting"""
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def safe_name(form_type):
+    """Form type usable as a file name"""
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', form_type) or 'form'
+
+
+def cell(value):
+    """Field value as stored text (checkbox groups arrive as lists)"""
+    if isinstance(value, (list, tuple)):
+        return ', '.join(map(str, value))
+    return '' if value is None else str(value)
+
+
+class WriteError(Exception):
+    """A submission's batch could not be stored"""
+
+
+class Pending:
+    """A queued submission's completion: set once it is committed or has failed"""
+
+    __slots__ = ('done', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error = None
+
+
+class BatchWriter:
+    """Single writer thread that group-commits queued submissions"""
+
+    def __init__(self, sink, max_batch=MAX_BATCH):
+        self.sink = sink
+        self.max_batch = max_batch
+        self.queue = queue.Queue()
+        self.batches = 0
+        self.written = 0
+        self._thread = threading.Thread(target=self._run, name='batch-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, form_type, submission_id, fields):
+        """Queue a submission and wait until it is committed; raise WriteError if it could not be"""
+        pending = Pending()
+        timestamp = datetime.now(timezone.utc).isoformat(timespec='milliseconds')
+        self.queue.put((form_type, (timestamp, submission_id, fields), pending))
+        pending.done.wait()
+        if pending.error is not None:
+            raise WriteError(pending.error)
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            batch = [item]
+            while len(batch) < self.max_batch:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self.queue.put(None)
+                    break
+                batch.append(item)
+
+            by_form = {}
+            for form_type, row, pending in batch:
+                rows, waiters = by_form.setdefault(form_type, ([], []))
+                rows.append(row)
+                waiters.append(pending)
+            if not self._commit(by_form.items()) and len(by_form) > 1:
+                # Retry form by form so one bad form doesn't fail the others
+                for group in by_form.items():
+                    self._commit([group])
+            self.batches += 1
+            for _, _, pending in batch:
+                self.written += pending.error is None
+                pending.done.set()
+
+    def _commit(self, groups):
+        """Write and commit groups of (form type, (rows, waiters)); on an error roll back and fail the waiters"""
+        try:
+            for form_type, (rows, _) in groups:
+                self.sink.write(form_type, rows)
+            self.sink.commit()
+            return True
+        except Exception as error:      # the writer thread must outlive a bad batch
+            try:
+                self.sink.rollback()
+            except Exception:
+                pass
+            for _, (_, waiters) in groups:
+                for pending in waiters:
+                    pending.error = f"{type(error).__name__}: {error}"
+            return False
+
+    def close(self):
+        self.queue.put(None)
+        self._thread.join()
+        self.sink.close()
+
+
+class IngestHandler(BaseHTTPRequestHandler):
+    """Accepts Apps Script style form posts"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'WileyIngest/1.0'
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        body = b'Wiley University Form Handler is running.'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            if length > MAX_BODY_BYTES:
+                raise ValueError('Request body too large')
+            data = json.loads(self.rfile.read(length))
+            form_type, fields = data['formType'], data['fields']
+            if not isinstance(form_type, str) or not form_type or not isinstance(fields, dict):
+                raise ValueError('formType must be a non-empty string and fields an object')
+        except (ValueError, KeyError, TypeError) as error:
+            self._reply(400, {'status': 'error', 'message': str(error)})
+            return
+
+        if form_type not in self.server.form_types:
+            self._reply(400, {'status': 'error', 'message': f"Unknown form type {form_type!r}"})
+            return
+
+        validator = self.server.validator
+        if validator is not None and form_type in validator.forms:
+            errors = validator.validate(form_type, fields)
+            if errors:
+                self._reply(400, {'status': 'error', 'message': errors[0]['message'], 'errors': errors})
+                return
+
+        submission_id = self.server.ids.next(form_type)
+        try:
+            self.server.writer.submit(form_type, submission_id, fields)
+        except WriteError as error:
+            self.log_error("could not store %s: %s", submission_id, error)
+            self._reply(500, {'status': 'error', 'message': 'Submission could not be stored'})
+            return
+        self._reply(200, {'status': 'success', 'submissionId': submission_id})
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def online_form_types(directory=ONLINE_FORMS_DIR):
+    """Form names of the online-forms/*/*.html pages (what they post as formType)"""
+    names = set()
+    for page in glob.glob(os.path.join(directory, '*', '*.html')):
+        with open(page, encoding='utf-8') as f:
+            names.update(FORM_NAME_PATTERN.findall(f.read()))
+    return names
+
+
+def known_form_types():
+    """Slugs of the forms in create_all_forms() plus the online-only forms"""
+    from generate_forms import load_form_specs
+    return {spec['slug'] for spec in load_form_specs()} | online_form_types()
+
+
+def make_server(host, port, storage='sqlite', directory=STORAGE_DIR, max_batch=MAX_BATCH, verbose=False,
+                validate=False, form_types=None):
+    """Create (but don't start) an ingestion server
+
+    Posts are accepted only for form_types (default: known_form_types(), the
+    PDF forms and the online-forms pages), since the form type names a table
+    or file. With validate=True, posts for forms in create_all_forms() are
+    checked against their specs (validate_submissions.py) and rejected with
+    the errors; online-only forms have no spec and are stored as posted.
+    """
+    os.makedirs(directory, exist_ok=True)
+    sink = SQLiteSink(os.path.join(directory, 'submissions.db')) if storage == 'sqlite' else CSVSink(directory)
+    ThreadingHTTPServer.request_queue_size = 128
+    server = ThreadingHTTPServer((host, port), IngestHandler)
+    server.daemon_threads = True
+    server.ids = SubmissionIds()
+    server.writer = BatchWriter(sink, max_batch)
+    server.verbose = verbose
+    server.validator = None
+    if validate:
+        from validate_submissions import Validator
+        server.validator = Validator()
+    if form_types is None:
+        form_types = known_form_types()
+    server.form_types = frozenset(form_types)
+    return server
+
+
+SAMPLE_FORMS = {
+    'work-order-request': ['Name', 'Department', 'Building', 'Room Number', 'Priority', 'Description'],
+    'travel-reimbursement-request': ['Name', 'Employee ID', 'Department', 'Destination', 'Total'],
+    'parking-permit-application': ['Name', 'Student/Employee ID', 'Vehicle Make', 'License Plate', 'Permit Type'],
+}
+
+
+def sample_submission(rng):
+    """A plausible random submission body"""
+    form_type = rng.choice(list(SAMPLE_FORMS))
+    fields = {name: f"{name} {rng.randint(1, 99999)}" for name in SAMPLE_FORMS[form_type]}
+    return json.dumps({'formType': form_type, 'fields': fields}).encode('utf-8')
+
+
+def load_generator(url, clients=32, seconds=10.0):
+    """Post submissions from `clients` keep-alive connections; return (count, errors, elapsed)"""
+    parts = urlsplit(url)
+    deadline = time.perf_counter() + seconds
+    counts = [0] * clients
+    errors = [0] * clients
+
+    def client(index):
+        rng = random.Random(index)
+        conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+        while time.perf_counter() < deadline:
+            try:
+                conn.request('POST', parts.path or '/', sample_submission(rng), {'Content-Type': 'application/json'})
+                response = conn.getresponse()
+                ok = response.status == 200 and json.loads(response.read())['status'] == 'success'
+            except (OSError, http.client.HTTPException, ValueError):
+                conn.close()
+                conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+                ok = False
+            counts[index] += ok
+            errors[index] += not ok
+        conn.close()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts), sum(errors), time.perf_counter() - start
+
+
+def report(label, count, errors, elapsed):
+    print(f"{label}: {count:,} submissions in {elapsed:.1f} s = {count / elapsed:,.0f}/s ({errors} errors)")
+
+
+def benchmark(clients, seconds, storage, directory):
+    """Sustained throughput with group commit vs one commit per submission"""
+    for label, max_batch in (('batched', MAX_BATCH), ('row-at-a-time', 1)):
+        run_dir = os.path.join(directory, f"bench-{label}")
+        if os.path.exists(run_dir):
+            for name in os.listdir(run_dir):
+                os.remove(os.path.join(run_dir, name))
+        server = make_server('127.0.0.1', 0, storage, run_dir, max_batch)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/"
+        count, errors, elapsed = load_generator(url, clients, seconds)
+        server.shutdown()
+        writer = server.writer
+        writer.close()
+        report(f"{label:<14} ({storage})", count, errors, elapsed)
+        print(f"{'':<17}{writer.batches:,} commits, {writer.written / max(writer.batches, 1):.1f} rows per commit")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local batched ingestion service for form submissions")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    serve = sub.add_parser('serve', help="run the ingestion service")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--storage', choices=('sqlite', 'csv'), default='sqlite')
+    serve.add_argument('--dir', default=STORAGE_DIR, help="storage directory (default: submissions/)")
+    serve.add_argument('--verbose', action='store_true', help="log every request")
+    serve.add_argument('--validate', action='store_true', help="reject posts that fail the form's spec")
+
+    loadgen = sub.add_parser('loadgen', help="measure sustained submissions per second against a server")
+    loadgen.add_argument('--url', default='http://127.0.0.1:8765/')
+    loadgen.add_argument('--clients', type=int, default=32)
+    loadgen.add_argument('--seconds', type=float, default=10)
+
+    bench = sub.add_parser('bench', help="start a throwaway server and load it, batched vs row-at-a-time")
+    bench.add_argument('--clients', type=int, default=32)
+    bench.add_argument('--seconds', type=float, default=5)
+    bench.add_argument('--storage', choices=('sqlite', 'csv'), default='sqlite')
+    bench.add_argument('--dir', default=os.path.join(STORAGE_DIR, 'bench'))
+
+    args = parser.parse_args()
+    if args.command == 'serve':
+        server = make_server(args.host, args.port, args.storage, args.dir, verbose=args.verbose,
+                             validate=args.validate)
+        print(f"Listening on http://{args.host}:{args.port}/ ({args.storage} in {args.dir})")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            server.writer.close()
+    elif args.command == 'loadgen':
+        report('loadgen', *load_generator(args.url, args.clients, args.seconds))
+    else:
+        benchmark(args.clients, args.seconds, args.storage, args.dir)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
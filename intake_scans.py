@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+"""
+Wiley University - Business & Finance Website
+Intake of scanned paper forms
+
+Reads hand-filled, scanned copies of a form without OCR. The widget rects
+come from laying the form out (check_layout.LayoutRecorder), so each scanned
+page only has to be registered to page coordinates:
+
+- page 1: the purple header bar (_draw_header) gives the page edges and the
+  bar's bottom edge
+- continuation pages: the rule under the minimal header gives the margins
+- last page: the footer line gives the margins and a second y reference
+
+A scale and offset per axis are fitted to those marks (scans are assumed
+deskewed, as scanner drivers do). Every widget rect is then cropped and its
+share of ink pixels compared with the same rect on the blank form, so that
+pre-printed marks such as the default radio dot don't count:
+
+- checkboxes: checked when ink rose by more than MARK_THRESHOLD
+- radio groups: the option with the largest rise above MARK_THRESHOLD
+- text, date and signature areas: "ink" when more than INK_AREA of new ink
+  was written in them (for signatures, only above the signature line)
+
+Pages are read in parallel. Each scan is routed by the form ID code on the
+page (form_id.py), which gives the form, its revision and the page number in
+one lookup, so a batch may mix forms. Scans of a revision that is no longer
+current are reported, not read. With --form every scan is read as that form,
+and its page number comes from a -pN suffix in the file name, else from its
+position in the list (a header bar always starts a new copy). Needs Pillow,
+plus pypdfium2 or pdftoppm to render the blank form.
+
+    python3 intake_scans.py scans/*.png > intake.jsonl
+    python3 intake_scans.py --form vehicle-inspection-checklist scans/*.png
+    python3 intake_scans.py --form vehicle-inspection-checklist --bench 50    # synthetic scans, accuracy + pages/s
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image, ImageDraw
+except ImportError:
+    Image = None
+
+import visual_regression
+from check_layout import LayoutRecorder
+from form_id import FormIdError, form_index, read_form_id
+from generate_forms import WileyFormGenerator, load_form_specs
+from reportlab.lib.units import inch
+
+BASELINE_DPI = 150
+SCAN_DPI = 150             # synthetic scans for --bench
+COLUMNS = 64               # column buckets for the row profile
+CENTRAL = (0.25, 0.75)     # part of the scan width a registration line must cover
+
+# Registration marks in page coordinates (points from the bottom edge)
+HEADER_BAR_BOTTOM = 1.2 * inch     # below the top edge (_draw_header)
+HEADER_RULE = 0.6 * inch           # below the top edge (_draw_header_minimal)
+FOOTER_RULE = 0.75 * inch          # above the bottom edge (_draw_footer)
+
+# Points shaved off each side of a widget rect before measuring, to stay clear of borders
+INSETS = {'checkbox': 2, 'radio': 1, 'text': 3, 'textarea': 3, 'date': 3, 'signature': 0}
+# A signature rect also holds "Sign above" and the date line; only the space above
+# the signature line (x, y, width, height relative to the rect) is read
+SIGNING_AREA = (0, 20, 3 * inch, 10)
+MARK_THRESHOLD = 0.06      # rise in ink share that marks a checkbox or radio option
+INK_AREA = 12              # new ink (pt²) that counts a text or signature area as written in
+INK_LEVEL = 0.55           # pixels darker than this share of paper white are ink
+
+PAGE_SUFFIX = re.compile(r'-p(\d+)\.\w+$')
+
+
+class IntakeError(Exception):
+    """A scanned page that can't be registered or read"""
+
+
+def form_layout(slug):
+    """Widget rects of a form by page, plus each rect's ink share on the blank form"""
+    spec = next((spec for spec in load_form_specs() if spec['slug'] == slug), None)
+    if spec is None:
+        raise IntakeError(f"Unknown form {slug!r}")
+    recorder = LayoutRecorder()
+    recorder.create_form(spec['filename'], spec['title'], spec['department'], spec['fields'], spec['instructions'])
+    _, pages, rects = recorder.layouts[0]
+    layout = {'slug': slug, 'pages': pages, 'width': recorder.width, 'height': recorder.height,
+              'margin': recorder.margin, 'rects': {page: [] for page in range(1, pages + 1)}}
+    for page, name, kind, x, y, w, h in rects:
+        layout['rects'][page].append(measured_rect((name, kind, x, y, w, h)))
+
+    data = WileyFormGenerator(deterministic=True).render_form(
+        spec['title'], spec['department'], spec['fields'], spec['instructions'], slug=spec['slug'])
+    layout['baseline'] = {}
+    for page, path in blank_pages(data, BASELINE_DPI).items():
+        with Image.open(path) as image:
+            image = image.convert('L')
+            scale = BASELINE_DPI / 72
+            transform = (scale, 0, -scale, layout['height'] * scale)
+            white = paper_white(image)
+            for rect in layout['rects'][page]:
+                layout['baseline'][page, rect[0]] = ink_share(image, pixel_box(transform, rect), white)
+    return layout
+
+
+def blank_pages(data, dpi):
+    """{page number: raster path} of a PDF, through the visual_regression raster cache"""
+    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as f:
+        f.write(data)
+    try:
+        os.makedirs(visual_regression.CACHE_DIR, exist_ok=True)
+        return {task[2] + 1: visual_regression.render_page(task)[0]
+                for task in visual_regression.page_tasks([f.name], dpi)}
+    finally:
+        os.unlink(f.name)
+
+
+# ---- Registration --------------------------------------------------------
+
+def paper_white(image):
+    """Median grey level: the paper on a form page"""
+    histogram = image.histogram()
+    half = sum(histogram) / 2
+    seen = 0
+    for level, count in enumerate(histogram):
+        seen += count
+        if seen >= half:
+            return level
+    return 255
+
+
+def dark_run(image, row, threshold, max_gap=3):
+    """(start, end) of the longest run of pixels darker than threshold in a row, bridging small gaps"""
+    pixels = image.crop((0, row, image.size[0], row + 1)).tobytes()
+    best = (0, 0)
+    start = last = None
+    for x, value in enumerate(pixels):
+        if value < threshold:
+            if start is None or x - last > max_gap + 1:
+                start = x
+            last = x
+            if last + 1 - start > best[1] - best[0]:
+                best = (start, last + 1)
+    return best
+
+
+def runs(flags):
+    """[(start, end)] of consecutive True entries"""
+    found = []
+    start = None
+    for index, flag in enumerate(list(flags) + [False]):
+        if flag and start is None:
+            start = index
+        elif not flag and start is not None:
+            found.append((start, index))
+            start = None
+    return found
+
+
+def find_marks(image, white):
+    """Header bar (top, bottom rows, x run) and thin full-width rules (centre row, x run) on a scan"""
+    width, height = image.size
+    profile = image.resize((COLUMNS, height), Image.BOX).tobytes()
+    lo, hi = int(COLUMNS * CENTRAL[0]), int(COLUMNS * CENTRAL[1])
+    right = int(COLUMNS * 0.6)
+    dark = white * INK_LEVEL
+    rule_level = white - max(8, white * 0.03)
+    max_rule_rows = max(4, round(3 * width / 612))      # a rule is at most ~3 pt thick
+
+    rows = [profile[row * COLUMNS:(row + 1) * COLUMNS] for row in range(height)]
+    # The bar's white lettering stays left of `right`; a rule crosses the whole central band
+    bar_rows = [row < height // 4 and max(values[right:hi]) < dark for row, values in enumerate(rows)]
+    rule_rows = [max(values[lo:hi]) < rule_level for values in rows]
+
+    bar = None
+    for top, bottom in runs(bar_rows):
+        if bottom - top > max_rule_rows * 3:
+            # Measure the ends just above the bottom edge, below the lettering
+            bar = (top, bottom, dark_run(image, bottom - max(2, (bottom - top) // 10), dark))
+            break
+
+    rules = []
+    for top, bottom in runs(rule_rows):
+        if bottom - top > max_rule_rows or (bar and top < bar[1] and bottom > bar[0]):
+            continue
+        weights = [(row, white - sum(rows[row][lo:hi]) / (hi - lo)) for row in range(top, bottom)]
+        total = sum(w for _, w in weights)
+        centre = sum((row + 0.5) * w for row, w in weights) / total
+        darkest_row, strongest = max(weights, key=lambda item: item[1])
+        rules.append((centre, dark_run(image, darkest_row, white - strongest / 2)))
+    return bar, rules
+
+
+def fit_line(pairs):
+    """Least-squares (slope, intercept) of pixel = slope * page + intercept"""
+    n = len(pairs)
+    mean_page = sum(p for p, _ in pairs) / n
+    mean_pixel = sum(q for _, q in pairs) / n
+    var = sum((p - mean_page) ** 2 for p, _ in pairs)
+    slope = sum((p - mean_page) * (q - mean_pixel) for p, q in pairs) / var
+    return slope, mean_pixel - slope * mean_page
+
+
+def register(image, white, layout, page):
+    """(x scale, x offset, y scale, y offset) mapping page points to scan pixels, and the RMS residual"""
+    width, height = image.size
+    page_width, page_height, margin = layout['width'], layout['height'], layout['margin']
+    bar, rules = find_marks(image, white)
+    xs, ys = [], []
+
+    if page == 1:
+        if bar is None:
+            raise IntakeError("no header bar found on page 1")
+        top, bottom, (left, right) = bar
+        if left > 0 and right < width:
+            xs += [(0, left), (page_width, right)]
+        if top > 0:
+            ys.append((page_height, top))
+        ys.append((page_height - HEADER_BAR_BOTTOM, bottom))
+    else:
+        header = [rule for rule in rules if rule[0] < height * 0.2]
+        if not header:
+            raise IntakeError(f"no header rule found on page {page}")
+        centre, (left, right) = header[0]
+        xs += [(margin, left), (page_width - margin, right)]
+        ys.append((page_height - HEADER_RULE, centre))
+
+    if page == layout['pages']:
+        footer = [rule for rule in rules if rule[0] > height * 0.8]
+        if not footer:
+            raise IntakeError(f"no footer line found on page {page}")
+        centre, (left, right) = footer[-1]
+        xs += [(margin, left), (page_width - margin, right)]
+        ys.append((FOOTER_RULE, centre))
+
+    if len({p for p, _ in xs}) < 2:
+        raise IntakeError(f"no horizontal registration on page {page}")
+    ax, bx = fit_line(xs)
+    if max(p for p, _ in ys) - min(p for p, _ in ys) >= 4 * inch:
+        ay, by = fit_line(ys)
+    else:
+        ay = -ax                     # one y reference: assume the scan kept the aspect ratio
+        by = sum(q - ay * p for p, q in ys) / len(ys)
+    residuals = [ax * p + bx - q for p, q in xs] + [ay * p + by - q for p, q in ys]
+    return (ax, bx, ay, by), (sum(r * r for r in residuals) / len(residuals)) ** 0.5
+
+
+def measured_rect(rect):
+    """The part of a widget rect that is read: the signing area of a signature, else the rect"""
+    name, kind, x, y, w, h = rect
+    if kind == 'signature':
+        dx, dy, w, h = SIGNING_AREA
+        return name, kind, x + dx, y + dy, w, h
+    return rect
+
+
+def pixel_box(transform, rect):
+    """Scan pixel box of a widget rect, inset to clear its border"""
+    ax, bx, ay, by = transform
+    _, kind, x, y, w, h = rect
+    inset = INSETS.get(kind, 2)
+    return (round(ax * (x + inset) + bx), round(ay * (y + h - inset) + by),
+            round(ax * (x + w - inset) + bx), round(ay * (y + inset) + by))
+
+
+def ink_share(image, box, white):
+    """Share of ink pixels in a box"""
+    histogram = image.crop(box).histogram()
+    total = sum(histogram)
+    return sum(histogram[:int(white * INK_LEVEL)]) / total if total else 0.0
+
+
+# ---- Reading -------------------------------------------------------------
+
+_layout = None
+
+
+def _init_worker(layout):
+    global _layout
+    _layout = layout
+
+
+def read_page(task):
+    """Worker: register one scan and measure every widget; return a page result dict"""
+    path, page = task
+    result = {'file': path, 'page': page}
+    try:
+        with Image.open(path) as image:
+            image = image.convert('L')
+            white = paper_white(image)
+            transform, residual = register(image, white, _layout, page)
+            result['residual'] = round(residual, 2)
+            result['widgets'] = []
+            for rect in _layout['rects'][page]:
+                name, kind, _, _, w, h = rect
+                inset = INSETS.get(kind, 2)
+                rise = ink_share(image, pixel_box(transform, rect), white) - _layout['baseline'][page, name]
+                result['widgets'].append((name, kind, rise, rise * (w - 2 * inset) * (h - 2 * inset)))
+    except (IntakeError, OSError) as error:
+        result['error'] = str(error)
+    return result
+
+
+def assign_pages(paths, pages):
+    """[(path, page number)] from -pN suffixes, else from order"""
+    tasks = []
+    for index, path in enumerate(paths):
+        match = PAGE_SUFFIX.search(path)
+        tasks.append((path, int(match.group(1)) if match else index % pages + 1))
+    return tasks
+
+
+def decide(widgets):
+    """Checked boxes, selected radio options and written-in areas from ink rises (share, pt²)"""
+    values = {'checked': {}, 'selected': {}, 'ink': {}}
+    best = {}
+    for name, kind, rise, area in widgets:
+        if kind == 'checkbox':
+            values['checked'][name] = rise > MARK_THRESHOLD
+        elif kind == 'radio':
+            group, option = name.split('=', 1)
+            values['selected'].setdefault(group, None)
+            if rise > MARK_THRESHOLD and rise > best.get(group, 0):
+                best[group] = rise
+                values['selected'][group] = option
+        else:
+            values['ink'][name] = area > INK_AREA
+    return values
+
+
+def _identify(path):
+    """Worker: (slug, short spec hash, page) from a scan's form ID code, or the error text"""
+    try:
+        with Image.open(path) as image:
+            return read_form_id(image)
+    except (FormIdError, OSError) as error:
+        return str(error)
+
+
+def route(paths, workers=None):
+    """Group scans by the form ID on each page: ({slug: [(path, page)]}, [(path, error)])"""
+    index = form_index()
+    groups, unrouted = {}, []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for path, found in zip(paths, pool.map(_identify, paths, chunksize=4)):
+            if isinstance(found, str):
+                unrouted.append((path, found))
+            elif found[:2] not in index:
+                unrouted.append((path, f"{found[0]} revision {found[1]} is not the current form"))
+            else:
+                groups.setdefault(found[0], []).append((path, found[2]))
+    return groups, unrouted
+
+
+def intake(slug, paths, workers=None, pages=None):
+    """Read scans of one form; return (copies, pages read, seconds)
+
+    Page numbers come from pages (as read off the form ID codes) when
+    given, else from the file names or order.
+    """
+    layout = form_layout(slug)
+    tasks = list(zip(paths, pages)) if pages else assign_pages(paths, layout['pages'])
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(layout,)) as pool:
+        results = list(pool.map(read_page, tasks, chunksize=4))
+    elapsed = time.perf_counter() - start
+
+    copies = []
+    for result in results:
+        if result['page'] == 1 or not copies:
+            copies.append({'formType': slug, 'pages': [], 'widgets': [], 'errors': [], 'residual': 0.0})
+        copy = copies[-1]
+        copy['pages'].append(result['file'])
+        if 'error' in result:
+            copy['errors'].append(f"{os.path.basename(result['file'])}: {result['error']}")
+        else:
+            copy['widgets'] += result['widgets']
+            copy['residual'] = max(copy['residual'], result['residual'])
+    for copy in copies:
+        copy.update(decide(copy.pop('widgets')))
+    return copies, len(results), elapsed
+
+
+# ---- Synthetic scans -----------------------------------------------------
+
+def _make_scan(task):
+    """Worker: mark a blank page at random, then scale, shift and add noise; return the truth"""
+    blank_path, out_path, layout, page, seed = task
+    rng = random.Random(seed)
+    scale = SCAN_DPI / 72
+    transform = (scale, 0, -scale, layout['height'] * scale)
+    truth = {}
+    with Image.open(blank_path) as blank:
+        image = blank.convert('L')
+    draw = ImageDraw.Draw(image)
+    groups = {}
+    for rect in layout['rects'][page]:
+        name, kind = rect[:2]
+        if kind == 'radio':
+            groups.setdefault(name.split('=', 1)[0], []).append(rect)
+            continue
+        left, top, right, bottom = pixel_box(transform, rect)
+        mark = rng.random() < 0.5
+        truth[name] = mark
+        if mark and kind == 'checkbox':
+            draw.line((left, top, right, bottom), fill=20, width=3)
+            draw.line((left, bottom, right, top), fill=20, width=3)
+        elif mark:
+            points = [(rng.uniform(left, right), rng.uniform(top, bottom)) for _ in range(6)]
+            draw.line(points, fill=30, width=2)
+    for group, rects in groups.items():
+        choice = rng.choice(rects + [None])
+        truth[group] = choice[0].split('=', 1)[1] if choice else None
+        if choice:
+            left, top, right, bottom = pixel_box(transform, choice)
+            draw.ellipse((left, top + (bottom - top) * 0.35, left + (right - left) * 0.65, bottom), fill=25)
+
+    stretch = rng.uniform(0.97, 1.03)
+    size = (round(image.size[0] * stretch), round(image.size[1] * stretch))
+    sheet = Image.new('L', (round(image.size[0] * 1.06), round(image.size[1] * 1.06)), 255)
+    sheet.paste(image.resize(size, Image.BILINEAR),
+                (rng.randint(5, sheet.size[0] - size[0] - 5), rng.randint(5, sheet.size[1] - size[1] - 5)))
+    sheet = Image.blend(sheet, Image.effect_noise(sheet.size, 40), 0.08)
+    sheet.save(out_path)
+    return truth
+
+
+def benchmark(slug, copies, workers):
+    """Route and read synthetic scans of copies filled at random; report accuracy and pages per second"""
+    layout = form_layout(slug)
+    spec = next(spec for spec in load_form_specs() if spec['slug'] == slug)
+    blank = blank_pages(WileyFormGenerator(deterministic=True).render_form(
+        spec['title'], spec['department'], spec['fields'], spec['instructions'], slug=spec['slug']), SCAN_DPI)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tasks = [(blank[page], os.path.join(tmp_dir, f"scan-{n:04d}-p{page}.png"), layout, page, n * 100 + page)
+                 for n in range(copies) for page in range(1, layout['pages'] + 1)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            truths = list(pool.map(_make_scan, tasks, chunksize=4))
+        start = time.perf_counter()
+        groups, unrouted = route([task[1] for task in tasks], workers)
+        routing = time.perf_counter() - start
+        routed = groups.get(slug, [])
+        if len(routed) != len(tasks):
+            print(f"{len(tasks) - len(routed)} pages not routed to {slug}: {unrouted[:3]}")
+            return 1
+        paths, page_numbers = zip(*routed)
+        results, pages, elapsed = intake(slug, paths, workers, page_numbers)
+
+    expected = {}
+    for n in range(copies):
+        expected[n] = {}
+        for page in range(layout['pages']):
+            expected[n].update(truths[n * layout['pages'] + page])
+    wrong = total = errors = 0
+    for n, copy in enumerate(results):
+        errors += len(copy['errors'])
+        found = {**copy['checked'], **copy['selected'], **copy['ink']}
+        for name, value in expected[n].items():
+            total += 1
+            wrong += found.get(name) != value
+    worst = max(copy['residual'] for copy in results)
+    print(f"Routed {len(tasks)} pages by form ID in {routing:.2f} s = {len(tasks) / routing:.1f} pages/s")
+    print(f"{pages} scanned pages ({copies} copies of {slug}) in {elapsed:.2f} s = {pages / elapsed:.1f} pages/s")
+    print(f"{total - wrong}/{total} widget readings correct ({wrong} wrong), {errors} pages not registered, "
+          f"worst registration residual {worst:.2f} px")
+    return 1 if wrong or errors else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read checkboxes, radio choices and ink from scanned forms")
+    parser.add_argument('scans', nargs='*', help="page images, in page order within each copy")
+    parser.add_argument('--form', metavar='SLUG',
+                        help="read every scan as this form (pages from *-pN.png names or order) instead of by its form ID")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--bench', type=int, metavar='N', help="read N synthetic randomly filled copies")
+    args = parser.parse_args()
+
+    if Image is None:
+        sys.exit("Pillow is required (pip install pillow)")
+    if visual_regression.renderer() is None:
+        sys.exit("No PDF rasterizer found (pip install pypdfium2, or install poppler-utils)")
+    try:
+        if args.bench:
+            if not args.form:
+                parser.error("--bench needs --form")
+            return benchmark(args.form, args.bench, args.workers)
+        if not args.scans:
+            parser.error("scan images required (or --bench N)")
+        if args.form:
+            groups, unrouted = {args.form: [(path, None) for path in args.scans]}, []
+        else:
+            groups, unrouted = route(args.scans, args.workers)
+        results = []
+        for slug, routed in groups.items():
+            paths, pages = zip(*routed)
+            results.append(intake(slug, paths, args.workers, None if args.form else pages))
+    except IntakeError as error:
+        sys.exit(str(error))
+    for path, error in unrouted:
+        print(f"Not routed: {path}: {error}", file=sys.stderr)
+    copies = [copy for result in results for copy in result[0]]
+    for copy in copies:
+        print(json.dumps(copy))
+    pages = sum(result[1] for result in results)
+    elapsed = sum(result[2] for result in results)
+    print(f"Read {pages} pages ({len(copies)} copies) in {elapsed:.2f} s = {pages / max(elapsed, 1e-9):.1f} pages/s",
+          file=sys.stderr)
+    return 1 if unrouted or any(copy['errors'] for copy in copies) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Wiley University - Business & Finance Website
+HTML/CSS minification and precompression
+
+Minifies every .html and .css file under the built site (dist/ by default,
+after build_assets.py) in place and writes .gz and .br siblings next to each
+one. Files are processed in parallel and results are cached in
+.build-cache/minify/ by content hash, so unchanged pages cost a copy.
+
+Hashed assets listed in asset-manifest.json were minified by build_assets.py
+before their hash was taken; they are only precompressed here, so the bytes
+served always match the name.
+
+Brotli output needs the `brotli` package; without it only .gz files are written.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from build_assets import BASE_DIR, DIST_DIR, MANIFEST_NAME
+
+CACHE_DIR = os.path.join(BASE_DIR, '.build-cache', 'minify')
+EXTENSIONS = ('.html', '.css')
+
+# Cache entries are keyed by input hash plus this file's own hash, so
+# changing the minifier invalidates everything it produced before.
+with open(__file__, 'rb') as _self:
+    MINIFIER_VERSION = hashlib.sha256(_self.read()).hexdigest()[:12]
+
+# Elements whose whitespace is significant or that aren't HTML text
+RAW_ELEMENTS = ('pre', 'textarea', 'script', 'style')
+
+# Block-level tags: whitespace next to them never renders
+BLOCK_TAGS = (
+    'html|head|body|title|meta|link|script|style|noscript|header|footer|nav|main|section|article|aside|'
+    'div|p|h[1-6]|ul|ol|li|dl|dt|dd|table|thead|tbody|tfoot|tr|th|td|form|fieldset|legend|'
+    'br|hr|blockquote|figure|figcaption|option|optgroup|select'
+)
+
+TAG_PATTERN = re.compile(r'''<!--.*?-->|<!?/?[a-zA-Z](?:[^>"']|"[^"]*"|'[^']*')*>''', re.DOTALL)
+RAW_PATTERN = re.compile(r'(<(%s)\b[^>]*>)(.*?)(</\2\s*>)' % '|'.join(RAW_ELEMENTS), re.DOTALL | re.IGNORECASE)
+BLOCK_SPACE_PATTERN = re.compile(r'\s*(</?(?:%s)\b(?:[^>"\']|"[^"]*"|\'[^\']*\')*>)\s*' % BLOCK_TAGS, re.IGNORECASE)
+CSS_TOKEN_PATTERN = re.compile(r'''"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|/\*.*?\*/''', re.DOTALL)
+
+
+def minify_css(css):
+    """Strip comments and redundant whitespace from CSS, leaving strings intact"""
+    strings = []
+
+    def protect(match):
+        if match.group(0).startswith('/*'):
+            return ' '
+        strings.append(match.group(0))
+        return f'\x00{len(strings) - 1}\x00'
+
+    css = CSS_TOKEN_PATTERN.sub(protect, css)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    css = css.replace(';}', '}').strip()
+    return re.sub(r'\x00(\d+)\x00', lambda m: strings[int(m.group(1))], css)
+
+
+def _collapse_tag(tag):
+    """Collapse whitespace between attributes without touching quoted values"""
+    parts = re.split(r'''("[^"]*"|'[^']*')''', tag)
+    for i in range(0, len(parts), 2):
+        parts[i] = re.sub(r'\s+', ' ', parts[i])
+        parts[i] = re.sub(r'\s+(/?>)$', r'\1', parts[i])
+    return ''.join(parts)
+
+
+def _minify_markup(html):
+    """Minify markup that contains no raw elements"""
+    out = []
+    pos = 0
+    for match in TAG_PATTERN.finditer(html):
+        out.append(re.sub(r'\s+', ' ', html[pos:match.start()]))
+        tag = match.group(0)
+        if tag.startswith('<!--'):
+            # Keep IE conditional comments, drop the rest
+            if tag.startswith('<!--[if'):
+                out.append(tag)
+        else:
+            out.append(_collapse_tag(tag))
+        pos = match.end()
+    out.append(re.sub(r'\s+', ' ', html[pos:]))
+    return BLOCK_SPACE_PATTERN.sub(r'\1', ''.join(out))
+
+
+def minify_html(html):
+    """Minify HTML, leaving <pre>/<textarea>/<script> content as written"""
+    out = []
+    pos = 0
+    for match in RAW_PATTERN.finditer(html):
+        out.append(_minify_markup(html[pos:match.start()]))
+        open_tag, name, body, close_tag = match.groups()
+        if name.lower() == 'style':
+            body = minify_css(body)
+        out.append(_collapse_tag(open_tag) + body + close_tag)
+        pos = match.end()
+    out.append(_minify_markup(html[pos:]))
+    return ''.join(out).strip() + '\n'
+
+
+def _cache_paths(digest):
+    base = os.path.join(CACHE_DIR, f"{digest}-{MINIFIER_VERSION}")
+    return base + '.min', base + '.gz', base + '.br'
+
+
+def process_file(path, keep=False):
+    """Minify (unless keep) and precompress one file; return (path, before, after, gz, br, cached)"""
+    with open(path, 'rb') as f:
+        source = f.read()
+    digest = hashlib.sha256(source + (b'\x00keep' if keep else b'')).hexdigest()
+    min_path, gz_path, br_path = _cache_paths(digest)
+    cached = os.path.exists(min_path) and os.path.exists(gz_path) and (brotli is None or os.path.exists(br_path))
+
+    if not cached:
+        if keep:
+            minified = source
+        else:
+            text = source.decode('utf-8')
+            minified = (minify_css(text) + '\n' if path.endswith('.css') else minify_html(text)).encode('utf-8')
+        if len(minified) >= len(source):
+            minified = source
+        for cache_path, data in (
+            (min_path, minified),
+            (gz_path, gzip.compress(minified, compresslevel=9, mtime=0)),
+            (br_path, brotli.compress(minified, quality=11) if brotli else None),
+        ):
+            if data is None:
+                continue
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, cache_path)
+
+    shutil.copyfile(min_path, path)
+    shutil.copyfile(gz_path, path + '.gz')
+    br_size = 0
+    if brotli:
+        shutil.copyfile(br_path, path + '.br')
+        br_size = os.path.getsize(br_path)
+    return path, len(source), os.path.getsize(min_path), os.path.getsize(gz_path), br_size, cached
+
+
+def find_files(root):
+    """Every HTML/CSS file under root"""
+    files = []
+    for dirpath, _, filenames in os.walk(root):
+        files.extend(os.path.join(dirpath, name) for name in filenames if name.endswith(EXTENSIONS))
+    return sorted(files)
+
+
+def hashed_files(root):
+    """Absolute paths of the content-hashed assets in root's asset manifest"""
+    path = os.path.join(root, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        return {os.path.join(root, *target.split('/')) for target in json.load(f).values()}
+
+
+def minify_site(root=DIST_DIR, workers=None):
+    """Minify and precompress the site under root; return per-file results"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    files = find_files(root)
+    hashed = hashed_files(root)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(process_file, files, [path in hashed for path in files], chunksize=8))
+    return results
+
+
+def print_report(results, root):
+    """Print bytes saved by file type and overall"""
+    totals = {}
+    for path, before, after, gz_size, br_size, cached in results:
+        ext = os.path.splitext(path)[1]
+        t = totals.setdefault(ext, [0, 0, 0, 0, 0, 0])
+        for i, value in enumerate((1, before, after, gz_size, br_size, int(cached))):
+            t[i] += value
+
+    print(f"{'type':<6} {'files':>5} {'original':>11} {'minified':>11} {'gzip':>11} {'brotli':>11} {'cached':>6}")
+    grand = [0] * 6
+    for ext, t in sorted(totals.items()):
+        br_column = f"{t[4]:>11,}" if t[4] else f"{'-':>11}"
+        print(f"{ext:<6} {t[0]:>5} {t[1]:>11,} {t[2]:>11,} {t[3]:>11,} {br_column} {t[5]:>6}")
+        grand = [a + b for a, b in zip(grand, t)]
+
+    original, minified, gz_size, br_size = grand[1:5]
+    print(f"\nMinified {grand[0]} files under {root}: "
+          f"{original - minified:,} bytes saved ({(original - minified) / max(original, 1):.1%})")
+    print(f"Over the wire: {original - gz_size:,} bytes saved with gzip"
+          + (f", {original - br_size:,} with brotli" if br_size else " (pip install -r requirements.txt for .br files)"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Minify and precompress the built site's HTML and CSS")
+    parser.add_argument('root', nargs='?', default=DIST_DIR, help="site directory (default: dist/)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.root):
+        sys.exit(f"{args.root} not found - run build_assets.py first")
+    results = minify_site(args.root, args.workers)
+    print_report(results, args.root)
+
+
+if __name__ == "__main__":
+    main()
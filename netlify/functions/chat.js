@@ -5,134 +5,17 @@
 
 const Anthropic = require('@anthropic-ai/sdk');
 
-// Site knowledge base - curated content for accurate responses
-const SITE_KNOWLEDGE = {
-    institution: {
-        name: "Wiley University",
-        location: "711 Wiley Avenue, Marshall, Texas 75670",
-        founded: 1873,
-        mainPhone: "(903) 927-3300",
-        mainFax: "(903) 927-3301",
-        mainEmail: "businessoffice@wileyc.edu",
-        website: "https://wiley-business-finance.netlify.app"
-    },
+// Site knowledge base - generated from the department pages and form specs
+// by build_knowledge.py; loaded once per cold start.
+const SITE_KNOWLEDGE = require('./knowledge.json');
+
+// Facts that don't live on any page
+const GENERAL_INFO = {
     officeHours: {
         regular: "Monday - Friday, 8:00 AM - 5:00 PM",
         weekend: "Closed Saturday and Sunday",
         note: "Hours may vary during holidays and university breaks"
     },
-    departments: {
-        auxiliaryServices: {
-            name: "Auxiliary Services",
-            description: "Bookstore, dining services, ID cards, mail services, and vending operations",
-            contact: "Mr. Johnny Johnson",
-            email: "auxiliary@wileyc.edu",
-            phone: "(903) 927-3300",
-            page: "/departments/auxiliary-services.html",
-            services: ["Wildcat Campus Store (Bookstore)", "Dining Services", "Wiley ID Cards", "Mail Services", "Vending Services"]
-        },
-        businessOffice: {
-            name: "Business Office",
-            description: "Accounts payable, payroll, purchasing, travel reimbursement, and vendor management",
-            contact: "Shae Bogue, Controller",
-            email: "businessoffice@wileyc.edu",
-            phone: "(903) 927-3300",
-            page: "/departments/business-office.html",
-            services: ["Accounts Payable", "Payroll", "Purchasing", "Travel Reimbursement", "Vendor Management", "Budget Management"]
-        },
-        facilitiesManagement: {
-            name: "Facilities Management",
-            description: "Building maintenance, custodial services, grounds keeping, and work orders",
-            email: "facilities@wileyc.edu",
-            phone: "(903) 927-3300",
-            page: "/departments/facilities-management.html",
-            services: ["Work Orders", "Building Maintenance", "Custodial Services", "Grounds Keeping", "Key Requests", "Space Setup"]
-        },
-        financialAid: {
-            name: "Financial Aid",
-            description: "Grants, loans, scholarships, work-study, and financial counseling services",
-            director: "Ms. Elisha Warford, Director",
-            email: "financialaid@wileyc.edu",
-            phone: "(903) 927-3217",
-            fax: "(903) 927-3366",
-            page: "/departments/financial-aid.html",
-            services: ["Federal Pell Grant", "TEXAS Grant", "Federal Direct Loans", "Scholarships", "Work-Study Program", "Financial Aid Counseling"],
-            deadlines: {
-                fafsa: "Complete FAFSA at studentaid.gov - Priority deadline varies by semester",
-                documents: "Submit all required documents within 2 weeks of request"
-            }
-        },
-        informationTechnology: {
-            name: "Information Technology",
-            description: "Help desk, email, WiFi, computer labs, software, and technical support",
-            cto: "Mr. Darren Ashley, CTO",
-            helpDesk: "(903) 927-3300",
-            email: "helpdesk@wileyc.edu",
-            page: "/departments/information-technology.html",
-            services: ["Help Desk Support", "Email/Microsoft 365", "WiFi (WileyWiFi)", "Computer Labs", "Software Support", "Classroom Technology"],
-            supportForm: "/online-forms/information-technology/it-support-request.html"
-        },
-        riskManagement: {
-            name: "Risk Management",
-            description: "Insurance, liability, safety compliance, and incident reporting",
-            contact: "Mr. Johnny Johnson",
-            email: "riskmanagement@wileyc.edu",
-            phone: "(903) 927-3300",
-            page: "/departments/risk-management.html",
-            services: ["Insurance Certificates", "Contract Review", "Incident Reporting", "Workers Compensation", "Vehicle Use Requests", "Liability Waivers"]
-        },
-        studentAccounts: {
-            name: "Student Accounts",
-            description: "Tuition billing, payment plans, refunds, and 1098-T tax forms",
-            bursar: "Amia Jones-Richardson, Bursar",
-            email: "studentaccounts@wileyc.edu",
-            phone: "(903) 927-3300",
-            page: "/departments/student-accounts.html",
-            services: ["Tuition Billing", "Payment Plans", "Refunds", "1098-T Tax Forms", "Account Balances"],
-            paymentLink: "https://www.wileyc.edu/students/payment-options"
-        },
-        transportationFleet: {
-            name: "Transportation & Fleet Management",
-            description: "Parking permits, shuttle services, fleet vehicles, and citation appeals",
-            email: "transportation@wileyc.edu",
-            phone: "(903) 927-3300",
-            page: "/departments/transportation-fleet.html",
-            services: ["Parking Permits", "Shuttle Services", "Fleet Vehicle Reservations", "Citation Appeals"],
-            parkingContact: {
-                name: "Chief J. M. Reynolds",
-                title: "Director of Campus Safety",
-                department: "Department of Public Safety/Police Department",
-                phone: "(903) 665-0281"
-            }
-        }
-    },
-    leadership: {
-        svp: {
-            name: "George Stiell",
-            title: "Senior Vice President for Business & Finance",
-            email: "george.stiell@wileyc.edu"
-        },
-        controller: {
-            name: "Shae Bogue",
-            title: "Controller",
-            email: "shae.bogue@wileyc.edu"
-        },
-        bursar: {
-            name: "Amia Jones-Richardson",
-            title: "Bursar",
-            email: "amia.jones@wileyc.edu"
-        }
-    },
-    forms: {
-        page: "/forms-resources.html",
-        categories: [
-            "Business Office Forms (Expense Reports, Travel, Vendor Payments)",
-            "Financial Aid Forms (FAFSA, Scholarships, Appeals)",
-            "Facilities Forms (Work Orders, Key Requests)",
-            "IT Forms (Support Requests, Equipment Checkout)",
-            "Risk Management Forms (Incident Reports, Insurance)"
-        ]
-    },
     quickLinks: {
         payBill: "https://www.wileyc.edu/students/payment-options",
         forms: "/forms-resources.html",
@@ -141,11 +24,82 @@ const SITE_KNOWLEDGE = {
     }
 };
 
+// Everything the prompt carries when no search index is available
+const FULL_KNOWLEDGE = {
+    institution: SITE_KNOWLEDGE.institution,
+    ...GENERAL_INFO,
+    leadership: SITE_KNOWLEDGE.leadership,
+    departments: SITE_KNOWLEDGE.departments
+};
+
+// Passage search index built by build_search_index.py (loaded once per cold start).
+// Without it the full SITE_KNOWLEDGE object is sent with every request.
+let SEARCH_INDEX = null;
+try {
+    SEARCH_INDEX = require('./search-index.json');
+} catch (e) {
+    console.warn('search-index.json not found - run build_search_index.py; using full knowledge base');
+}
+
+const SEARCH_TOP_K = 5;
+const SEARCH_STOPWORDS = new Set(SEARCH_INDEX ? SEARCH_INDEX.tokenizer.stopwords : []);
+
+// Must match tokenize() in build_search_index.py
+function tokenize(text) {
+    const terms = [];
+    for (let term of text.toLowerCase().match(/[a-z0-9]+/g) || []) {
+        if (SEARCH_STOPWORDS.has(term)) continue;
+        if (term.length > 4 && term.endsWith('s') && !term.endsWith('ss')) {
+            term = term.slice(0, -1);
+        }
+        terms.push(term);
+    }
+    return terms;
+}
+
+// BM25 lookup: postings are flat [docId, weight, docId, weight, ...] arrays
+function searchPassages(query, k = SEARCH_TOP_K) {
+    const scores = new Map();
+    for (const term of new Set(tokenize(query))) {
+        const postings = SEARCH_INDEX.terms[term];
+        if (!postings) continue;
+        for (let i = 0; i < postings.length; i += 2) {
+            scores.set(postings[i], (scores.get(postings[i]) || 0) + postings[i + 1]);
+        }
+    }
+    return [...scores.entries()]
+        .sort((a, b) => b[1] - a[1] || a[0] - b[0])
+        .slice(0, k)
+        .map(([docId]) => SEARCH_INDEX.docs[docId]);
+}
+
+// Facts every answer may need, whatever the question: the department
+// directory without per-department detail, which comes from the passages
+const CORE_KNOWLEDGE = {
+    institution: SITE_KNOWLEDGE.institution,
+    ...GENERAL_INFO,
+    leadership: SITE_KNOWLEDGE.leadership,
+    departments: SITE_KNOWLEDGE.departments.map(({ name, page, contact }) => ({ name, page, contact }))
+};
+
+// Knowledge section of the system prompt for the current conversation
+function buildKnowledge(messages) {
+    if (!SEARCH_INDEX) {
+        return JSON.stringify(FULL_KNOWLEDGE);
+    }
+    // Search on the last two user turns so follow-up questions keep their topic
+    const query = messages.filter(msg => msg.role === 'user').slice(-2).map(msg => msg.content).join(' ');
+    const passages = searchPassages(query)
+        .map(([url, title, section, text]) => `[${title} - ${section}](${url})\n${text}`)
+        .join('\n\n');
+    return `${JSON.stringify(CORE_KNOWLEDGE)}\n\n### Relevant Site Content\n${passages || 'No matching pages.'}`;
+}
+
 // System prompt for Claude
-const SYSTEM_PROMPT = `You are Wiley Assistant, a helpful AI assistant for Wiley University's Business & Finance Division website. Your role is to help students, faculty, and staff navigate services, find information, and answer questions about business and financial matters at the university.
+const buildSystemPrompt = (knowledge) => `You are Wiley Assistant, a helpful AI assistant for Wiley University's Business & Finance Division website. Your role is to help students, faculty, and staff navigate services, find information, and answer questions about business and financial matters at the university.
 
 ## Your Knowledge Base
-${JSON.stringify(SITE_KNOWLEDGE, null, 2)}
+${knowledge}
 
 ## Guidelines
 
@@ -308,7 +262,7 @@ exports.handler = async (event, context) => {
         const response = await anthropic.messages.create({
             model: 'claude-3-5-sonnet-20241022',
             max_tokens: 1024,
-            system: SYSTEM_PROMPT + pageContext,
+            system: buildSystemPrompt(buildKnowledge(messages)) + pageContext,
             messages: messages
         });
 
@@ -0,0 +1,300 @@
+"""
+Wiley University - Business & Finance Website
+Field values for the generated PDF forms
+
+Fills the AcroForm fields of a PDF written by generate_forms.py without
+re-rendering it: the form is parsed once into a FormTemplate, and each
+fill appends an incremental update (replacement widget objects with the
+new /V, fresh appearance streams for text, a new xref section and trailer)
+to the unchanged template bytes. Viewers show the values as typed in;
+the blank form underneath is byte-for-byte the template.
+
+Only what reportlab writes is supported: classic xref tables, uncompressed
+object dictionaries, text fields, checkboxes and radio groups.
+"""
+
+import hashlib
+import re
+import zlib
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+OBJECT_PATTERN = re.compile(rb'(?:^|[\r\n])(\d+) 0 obj\b')
+NAME_PATTERN = re.compile(rb'/T \(((?:\\.|[^\\)])*)\)')
+STATE_PATTERN = re.compile(rb'/(.+?) (\d+) 0 R')
+TEXT_VALUE_PATTERN = re.compile(rb'/V \(((?:\\.|[^\\)])*)\)')
+NAME_VALUE_PATTERN = re.compile(rb'/V /([^\s/<>\[\]()]+)')
+# Text drawn into an appearance stream by _text_appearance() (string bodies never hold a raw newline)
+APPEARANCE_TEXT_PATTERN = re.compile(rb'^BT\n(?:.*\n)*?ET\n', re.MULTILINE)
+CHECKED_VALUES = ('1', 'on', 'yes', 'true', 'x', 'checked')
+MULTILINE_FLAG = 1 << 12
+
+PDF_STRING_ESCAPES = {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'\b', b'f': b'\f'}
+
+
+def pdf_string(text):
+    """Text -> PDF literal string body (WinAnsi, unsupported characters become '?')"""
+    data = str(text).encode('cp1252', errors='replace')
+    return data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)').replace(b'\r', b'\\r').replace(b'\n', b'\\n')
+
+
+def unescape_string(data):
+    """PDF literal string body -> text"""
+    out = bytearray()
+    i = 0
+    while i < len(data):
+        char = data[i:i + 1]
+        if char == b'\\' and i + 1 < len(data):
+            following = data[i + 1:i + 2]
+            if following.isdigit():
+                octal = re.match(rb'[0-7]{1,3}', data[i + 1:i + 4]).group(0)
+                out.append(int(octal, 8) & 0xFF)
+                i += 1 + len(octal)
+                continue
+            out += PDF_STRING_ESCAPES.get(following, following)
+            i += 2
+        else:
+            out += char
+            i += 1
+    return out.decode('cp1252', errors='replace')
+
+
+def decode_name(name):
+    """PDF name bytes (no slash) with #xx escapes resolved"""
+    return re.sub(rb'#([0-9A-Fa-f]{2})', lambda m: bytes([int(m.group(1), 16)]), name)
+
+
+class PdfFile:
+    """Object offsets and trailer of a reportlab PDF (last definition of an object wins)"""
+
+    def __init__(self, data):
+        self.data = data
+        self.offsets = {int(m.group(1)): m.end() for m in OBJECT_PATTERN.finditer(data)}
+        tail = data[data.rindex(b'trailer'):]
+        self.size = int(re.search(rb'/Size (\d+)', tail).group(1))
+        self.root = re.search(rb'/Root (\d+ 0 R)', tail).group(1)
+        info = re.search(rb'/Info (\d+ 0 R)', tail)
+        self.info = info.group(1) if info else None
+        document_id = re.search(rb'/ID\s*\[\s*<([0-9a-fA-F]+)>', tail)
+        self.document_id = document_id.group(1) if document_id else None
+        self.startxref = int(re.search(rb'startxref\s+(\d+)', tail).group(1))
+
+    def object(self, number):
+        """Body of an object, between 'n 0 obj' and 'endobj'"""
+        start = self.offsets[number]
+        return self.data[start:self.data.index(b'endobj', start)].strip()
+
+    def stream(self, number):
+        """(dictionary, decoded stream data) of a stream object"""
+        body = self.object(number)
+        start = re.search(rb'>>\s*stream\r?\n', body)
+        dictionary = body[:start.start() + 2]
+        length = re.search(rb'/Length (\d+)(?! \d+ R)', dictionary)
+        if length:
+            data = body[start.end():start.end() + int(length.group(1))]
+        else:
+            data = body[start.end():body.rindex(b'endstream')].rstrip(b'\r\n')
+        if b'/FlateDecode' in dictionary:
+            data = zlib.decompress(data)
+        return dictionary, data
+
+
+def incremental_update(pdf, objects, document_id=None):
+    """Bytes of an update section that replaces/adds {number: body}, to append to pdf.data"""
+    out = bytearray(b'\n')
+    base = len(pdf.data)
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = base + len(out)
+        out += b'%d 0 obj\n' % number + objects[number] + b'\nendobj\n'
+
+    xref_offset = base + len(out)
+    out += b'xref\n'
+    numbers = sorted(offsets)
+    run_start = 0
+    for i in range(1, len(numbers) + 1):
+        if i == len(numbers) or numbers[i] != numbers[i - 1] + 1:
+            out += b'%d %d\n' % (numbers[run_start], i - run_start)
+            for number in numbers[run_start:i]:
+                out += b'%010d 00000 n \n' % offsets[number]
+            run_start = i
+
+    size = max(pdf.size, max(numbers) + 1)
+    trailer = b'/Size %d /Root %s /Prev %d' % (size, pdf.root, pdf.startxref)
+    if pdf.info:
+        trailer += b' /Info ' + pdf.info
+    if pdf.document_id:
+        new_id = (document_id or hashlib.md5(bytes(out)).hexdigest()).encode('ascii')
+        trailer += b' /ID [<' + pdf.document_id + b'><' + new_id + b'>]'
+    out += b'trailer\n<< ' + trailer + b' >>\nstartxref\n%d\n%%%%EOF\n' % xref_offset
+    return bytes(out)
+
+
+class FormTemplate:
+    """A generated form parsed once, ready to be filled many times"""
+
+    def __init__(self, data):
+        self.pdf = PdfFile(data)
+        self.fields = {}
+        kids = set()
+        for number in self.pdf.offsets:
+            body = self.pdf.object(number)
+            if b'/FT /Tx' not in body and b'/FT /Btn' not in body:
+                continue
+            name = NAME_PATTERN.search(body)
+            if name is None:
+                continue   # radio kid, picked up through its parent
+            name = unescape_string(name.group(1))
+            if b'/FT /Tx' in body:
+                self.fields[name] = self._text_field(number, body)
+            elif b'/Kids' in body:
+                field = self._radio_group(number, body)
+                kids.update(kid for kid, _, _ in field['kids'])
+                self.fields[name] = field
+            else:
+                self.fields[name] = {'type': 'checkbox', 'number': number, 'body': body,
+                                     'on': self._on_state(body)}
+
+    def _text_field(self, number, body):
+        ap_number = int(re.search(rb'/AP\s*<<\s*/N (\d+) 0 R', body).group(1))
+        dictionary, content = self.pdf.stream(ap_number)
+        width, height = (float(v) for v in re.search(rb'/BBox \[ ?[\d.]+ [\d.]+ ([\d.]+) ([\d.]+) ?\]', dictionary).groups())
+        appearance = re.search(rb'/DA \(([^)]*)\)', body).group(1)
+        max_length = re.search(rb'/MaxLen (\d+)', body)
+        flags = re.search(rb'/Ff (\d+)', body)
+        return {
+            'type': 'text',
+            'number': number,
+            'body': body,
+            'ap': ap_number,
+            'ap_dictionary': re.sub(rb'/Filter \[ ?/FlateDecode ?\] ?', b'', dictionary),
+            'ap_content': APPEARANCE_TEXT_PATTERN.sub(b'', content),   # blank, also on a filled copy
+            'width': width,
+            'height': height,
+            'appearance': appearance,
+            'font_size': float(re.search(rb'([\d.]+) Tf', appearance).group(1)),
+            'max_length': int(max_length.group(1)) if max_length else None,
+            'multiline': bool(flags and int(flags.group(1)) & MULTILINE_FLAG),
+        }
+
+    def _on_state(self, body):
+        states = STATE_PATTERN.findall(re.search(rb'/N\s*<<(.*?)>>', body, re.DOTALL).group(1))
+        return next(name for name, _ in states if name != b'Off')
+
+    def _radio_group(self, number, body):
+        kids = []
+        for kid in re.findall(rb'(\d+) 0 R', re.search(rb'/Kids \[(.*?)\]', body).group(1)):
+            kid_body = self.pdf.object(int(kid))
+            kids.append((int(kid), kid_body, self._on_state(kid_body)))
+        return {'type': 'radio', 'number': number, 'body': body, 'kids': kids}
+
+    def _text_appearance(self, field, value):
+        """Appearance stream content showing value in a text field"""
+        size = field['font_size']
+        lines = []
+        if field['multiline']:
+            for paragraph in value.splitlines() or ['']:
+                line = ''
+                for word in paragraph.split(' '):
+                    candidate = f"{line} {word}" if line else word
+                    if line and stringWidth(candidate, 'Helvetica', size) > field['width'] - 4:
+                        lines.append(line)
+                        line = word
+                    else:
+                        line = candidate
+                lines.append(line)
+            y = field['height'] - 2 - size
+        else:
+            lines = [value]
+            y = (field['height'] - size) / 2 + 0.22 * size
+
+        text = [b'BT', field['appearance'], b'2 %.2f Td' % y]
+        for i, line in enumerate(lines):
+            if i:
+                if y - i * size * 1.15 < 1:
+                    break
+                text.append(b'0 %.2f Td' % (-size * 1.15))
+            text.append(b'(' + pdf_string(line) + b') Tj')
+        text.append(b'ET\n')
+        content = field['ap_content']
+        cut = content.rindex(b'Q')
+        return content[:cut] + b'\n'.join(text) + content[cut:]
+
+    def canonical(self, name, value):
+        """The value a field would store for value: truncated text, a checkbox
+        state or a radio option name; None if it is not a field or sets nothing"""
+        field = self.fields.get(name)
+        if field is None or value is None:
+            return None
+        if field['type'] == 'text':
+            value = str(value)
+            if field['max_length']:
+                value = value[:field['max_length']]
+            return value or None
+        if field['type'] == 'checkbox':
+            on = decode_name(field['on']).decode('cp1252')
+            checked = value is True or str(value).strip().lower() in CHECKED_VALUES or str(value) == on
+            return on if checked else 'Off'
+        wanted = str(value).encode('cp1252', errors='replace')
+        return next((decode_name(on).decode('cp1252') for _, _, on in field['kids'] if decode_name(on) == wanted), None)
+
+    def values(self):
+        """{field name: value} currently set: non-empty text, every checkbox state and radio choice"""
+        values = {}
+        for name, field in self.fields.items():
+            if field['type'] == 'text':
+                value = TEXT_VALUE_PATTERN.search(field['body'])
+                if value and value.group(1):
+                    values[name] = unescape_string(value.group(1))
+            else:
+                value = NAME_VALUE_PATTERN.search(field['body'])
+                if value:
+                    values[name] = decode_name(value.group(1)).decode('cp1252')
+        return values
+
+    def fill_objects(self, values, first_number):
+        """{number: body} replacing the widgets for values ({field name: value})"""
+        objects = {}
+        number = first_number
+        for name, value in values.items():
+            value = self.canonical(name, value)
+            if value is None:
+                continue
+            field = self.fields[name]
+            if field['type'] == 'text':
+                content = self._text_appearance(field, value)
+                objects[number] = (re.sub(rb'/Length \d+', b'/Length %d' % len(content), field['ap_dictionary'])
+                                   + b'\nstream\n' + content + b'\nendstream')
+                entry = b'/V (' + pdf_string(value) + b')'
+                body, replaced = TEXT_VALUE_PATTERN.subn(lambda _: entry, field['body'], count=1)
+                if not replaced:
+                    body = body[:body.rindex(b'>>')] + entry + b' ' + body[body.rindex(b'>>'):]
+                objects[field['number']] = re.sub(rb'(/AP\s*<<\s*/N )\d+ 0 R', rb'\g<1>%d 0 R' % number, body, count=1)
+                number += 1
+            elif field['type'] == 'checkbox':
+                state = field['on'] if value != 'Off' else b'Off'
+                body = re.sub(rb'/AS /\S+', b'/AS /' + state, field['body'], count=1)
+                objects[field['number']] = re.sub(rb'/V /\S+', b'/V /' + state, body, count=1)
+            else:
+                choice = next(on for _, _, on in field['kids'] if decode_name(on).decode('cp1252') == value)
+                body = field['body']
+                for _, _, on in field['kids']:
+                    if b'/V /' + on in body:
+                        body = body.replace(b'/V /' + on, b'/V /' + choice, 1)
+                        break
+                objects[field['number']] = body
+                for kid, body, on in field['kids']:
+                    state = on if on == choice else b'Off'
+                    for current in (on, b'Off'):
+                        if b'/AS /' + current + b' ' in body:
+                            body = body.replace(b'/AS /' + current + b' ', b'/AS /' + state + b' ', 1)
+                            break
+                    objects[kid] = body
+        return objects
+
+    def fill(self, values, document_id=None):
+        """Template bytes plus an incremental update setting values ({field name: value})"""
+        objects = self.fill_objects(values, self.pdf.size)
+        if not objects:
+            return self.pdf.data
+        return self.pdf.data + incremental_update(self.pdf, objects, document_id)
@@ -0,0 +1,301 @@
+"""
+Wiley University - Business & Finance Website
+Minimal native PDF writer for the form generator
+
+NativeCanvas implements only the canvas calls WileyFormGenerator makes
+(colors, fonts, line width, rect, line, drawString / drawRightString,
+stringWidth, showPage, save) and acroForm textfield / checkbox / radio /
+signature, and writes the PDF directly: standard 14 fonts, Flate-compressed
+page content, widget dictionaries and appearance streams laid out like
+reportlab's, so pdf_fields.FormTemplate can fill either backend's output.
+
+Output is always reproducible: there are no timestamps, and the trailer ID
+is an MD5 of the file. Importing this module does not load reportlab's
+canvas stack; font metrics come from reportlab's per-font width tables.
+"""
+
+import hashlib
+import importlib
+import re
+import zlib
+
+# Text field background reportlab uses when no fillColor is given
+DEFAULT_FIELD_BACKGROUND = (0.8, 0.843, 1)
+TEXT_MAX_LENGTH = 100      # reportlab's default /MaxLen
+MULTILINE_FLAG = 1 << 12
+REQUIRED_FLAG = 1 << 1
+RADIO_FLAGS = (1 << 15) | (1 << 14) | REQUIRED_FLAG    # radio, no toggle to off
+
+FONT_RESOURCES = {'Helvetica': 'F1', 'Helvetica-Bold': 'F2', 'Helvetica-Oblique': 'F3'}
+
+# reportlab's check mark for a 12 pt box (ZapfDingbats '4' outline)
+CHECK_PATH = (
+    b'7.059192 8.494429 m 8.074513 9.735376 l 8.525766 10.23677 9.541086 10.48747 10.21797 10.48747 c '
+    b'10.30571 10.28691 l 9.139972 8.908078 l 6.53273 5.461003 l 4.727716 2.665738 l 4.288997 1.913649 l '
+    b'4.226323 1.788301 4.151114 1.637883 4.025766 1.562674 c 3.862813 1.487465 3.486769 1.487465 3.311281 '
+    b'1.487465 c 2.910167 1.487465 2.822423 1.487465 2.73468 1.550139 c 2.609331 1.637883 2.546657 1.81337 '
+    b'2.458914 1.988858 c 2.183148 2.56546 1.69429 3.818942 1.69429 4.445682 c 1.69429 4.658774 1.819638 '
+    b'4.759053 1.982591 4.871866 c 2.245822 5.059889 2.621866 5.272981 2.947772 5.272981 c 3.198468 5.272981 '
+    b'3.223538 5.059889 3.298747 4.859331 c 3.549443 4.270195 l 3.587047 4.169916 3.699861 3.818942 3.837744 '
+    b'3.818942 c 3.963092 3.818942 4.11351 4.107242 4.163649 4.194986 c 7.059192 8.494429 l h f'
+)
+KAPPA = 0.5522847498
+
+_WIDTHS = {}
+_ENCODING = []
+
+
+def fmt(value):
+    """Number -> PDF operand, at most 6 decimals and no trailing zeros"""
+    if value == int(value):
+        return b'%d' % value
+    return (b'%.6f' % value).rstrip(b'0').rstrip(b'.')
+
+
+def color_operands(color):
+    """reportlab Color or (r, g, b) -> b'r g b'"""
+    rgb = (color.red, color.green, color.blue) if hasattr(color, 'red') else color
+    return b' '.join(fmt(round(v, 6)) for v in rgb)
+
+
+def pdf_name(text):
+    """Option text -> PDF name (without the slash), #-escaping delimiters and spaces"""
+    return re.sub(rb'[^!-~]|[#%()/<>\[\]{}]', lambda m: b'#%02X' % m.group(0)[0],
+                  str(text).encode('cp1252', errors='replace'))
+
+
+def pdf_string(text):
+    data = str(text).encode('cp1252', errors='replace')
+    return data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+def string_width(text, font_name, font_size):
+    """Width of text in a standard 14 font, as reportlab's stringWidth computes it"""
+    widths = _WIDTHS.get(font_name)
+    if widths is None:
+        if not _ENCODING:
+            _ENCODING.extend(importlib.import_module('reportlab.pdfbase._fontdata_enc_winansi').WinAnsiEncoding)
+        module = importlib.import_module('reportlab.pdfbase._fontdata_widths_' + font_name.lower().replace('-', ''))
+        glyphs = module.widths
+        widths = _WIDTHS[font_name] = [glyphs.get(name, 0) if name else 0 for name in _ENCODING]
+    return sum(widths[b] for b in str(text).encode('cp1252', errors='replace')) * font_size / 1000
+
+
+def circle(radius, center):
+    """Bezier path of a circle around (center, center)"""
+    r, k = radius, radius * KAPPA
+    curves = (((r, k), (k, r), (0, r)), ((-k, r), (-r, k), (-r, 0)),
+              ((-r, -k), (-k, -r), (0, -r)), ((k, -r), (r, -k), (r, 0)))
+    lines = [b'1 0 0 1 %s %s cm' % (fmt(center), fmt(center)), b'%s 0 m' % fmt(r)]
+    for curve in curves:
+        lines.append(b' '.join(fmt(v) for point in curve for v in point) + b' c')
+    return b'\n'.join(lines)
+
+
+class _AcroForm:
+    """canvas.acroForm: records widgets on the current page"""
+
+    def __init__(self, canvas):
+        self._canvas = canvas
+
+    def textfield(self, name, x, y, width, height, borderWidth=1, fontSize=12, textColor=None,
+                  fillColor=None, maxlen=TEXT_MAX_LENGTH, fieldFlags='', value=''):
+        c = self._canvas
+        ap = c._add_stream(
+            b'/BBox [ 0 0 %s %s ] /FormType 1 /Matrix [ 1 0 0 1 0 0 ] /Resources << /ProcSet [/PDF /Text] '
+            b'/Font <</Helv %d 0 R>> >> /Subtype /Form /Type /XObject' % (fmt(width), fmt(height), c._helv),
+            b'%s rg\n0 0 %s %s re\nf\n/Tx BMC \nq\n0 0 %s %s re\nW\nn\n0 g\n0 G\nQ\nEMC\n' % (
+                color_operands(fillColor or DEFAULT_FIELD_BACKGROUND), fmt(width), fmt(height),
+                fmt(width), fmt(height)))
+        flags = MULTILINE_FLAG if 'multiline' in fieldFlags.split() else 0
+        c._widget(
+            b'/AP << /N %d 0 R >> /DA (/Helv %s Tf %s rg) /DV () /F 4 /FT /Tx /Ff %d '
+            b'/MK << /BG [ %s ] >> /MaxLen %d /P %%(page)s /Rect [ %s %s %s %s ] /Subtype /Widget /T (%s) '
+            b'/Type /Annot /V (%s)' % (
+                ap, fmt(fontSize), color_operands(textColor or (0, 0, 0)), flags,
+                color_operands(fillColor or DEFAULT_FIELD_BACKGROUND), maxlen,
+                fmt(x), fmt(y), fmt(x + width), fmt(y + height), pdf_string(name), pdf_string(value)),
+            field=True)
+
+    def _box(self, size, borderColor, fillColor):
+        s = fmt(size)
+        return b'q\n1 g 1 G %s rg 0 0 %s %s re f\n%s RG 1 w 0.5 0.5 %s %s re s\nQ' % (
+            color_operands(fillColor), s, s, color_operands(borderColor), fmt(size - 1), fmt(size - 1))
+
+    def checkbox(self, name, x, y, size=20, borderColor=None, fillColor=None, textColor=None, checked=False):
+        c = self._canvas
+        off = self._box(size, borderColor, fillColor)
+        mark = color_operands(textColor)
+        on = off + b'\nq %s rg %s RG\n%s 0 0 %s 0 0 cm\n%s\nQ' % (mark, mark, fmt(size / 12), fmt(size / 12), CHECK_PATH)
+        states = self._states(size, {b'Yes': on, b'Off': off})
+        state = b'Yes' if checked else b'Off'
+        c._widget(
+            b'/AP << /N << %s >> >> /AS /%s /F 4 /FT /Btn /Ff %d /MK << /BC [ %s ] /BG [ %s ] /CA (4) >> '
+            b'/P %%(page)s /Rect [ %s %s %s %s ] /Subtype /Widget /T (%s) /Type /Annot /V /%s' % (
+                states, state, REQUIRED_FLAG, color_operands(borderColor), color_operands(fillColor),
+                fmt(x), fmt(y), fmt(x + size), fmt(y + size), pdf_string(name), state),
+            field=True)
+
+    def radio(self, name, value, x, y, size=20, borderColor=None, fillColor=None, textColor=None, selected=False):
+        c = self._canvas
+        r = size * 0.3
+        off = b'q 1 g 1 G %s rg\n%s\nf\nQ\nq\n%s RG 1 w\n%s\ns\nQ' % (
+            color_operands(fillColor), circle(r, r), color_operands(borderColor), circle(r - 0.3, r))
+        mark = color_operands(textColor)
+        on = off + b'\nq %s rg %s RG\n%s\nf\nQ' % (mark, mark, circle(size * 0.125, r))
+        option = pdf_name(value)
+        group = c._radios.get(name)
+        if group is None:
+            group = c._radios[name] = {'number': c._reserve(), 'kids': [], 'value': option}
+            c._fields.append(group['number'])
+        if selected:
+            group['value'] = option
+        kid = c._widget(
+            b'/AP << /N << %s >> >> /AS /%s /F 4 /FT /Btn /MK << /BC [ %s ] /BG [ %s ] /CA (l) >> '
+            b'/P %%(page)s /Parent %d 0 R /Rect [ %s %s %s %s ] /Subtype /Widget /Type /Annot' % (
+                self._states(size, {option: on, b'Off': off}), option if selected else b'Off',
+                color_operands(borderColor), color_operands(fillColor), group['number'],
+                fmt(x), fmt(y), fmt(x + size), fmt(y + size)))
+        group['kids'].append(kid)
+
+    def signature(self, name, x, y, width, height):
+        c = self._canvas
+        c._widget(b'/F 4 /FT /Sig /P %%(page)s /Rect [ %s %s %s %s ] /Subtype /Widget /T (%s) /Type /Annot' % (
+            fmt(x), fmt(y), fmt(x + width), fmt(y + height), pdf_string(name)), field=True)
+        c._signatures = True
+
+    def _states(self, size, appearances):
+        """b'/Name n 0 R ...' for a widget's appearance states"""
+        s = fmt(size)
+        return b' '.join(b'/%s %d 0 R' % (state, self._canvas._add_stream(
+            b'/BBox [ 0 0 %s %s ] /FormType 1 /Matrix [ 1 0 0 1 0 0 ] /Resources << /ProcSet [/PDF] >> '
+            b'/Subtype /Form /Type /XObject' % (s, s), content, compress=True))
+            for state, content in appearances.items())
+
+
+class NativeCanvas:
+    """Drop-in for the subset of reportlab.pdfgen.canvas.Canvas the form generator uses"""
+
+    def __init__(self, file, pagesize):
+        self._file = file
+        self._width, self._height = pagesize
+        self._objects = [None]           # object bodies by number (index 0 unused)
+        self._pages = []
+        self._fields = []
+        self._radios = {}
+        self._signatures = False
+        self._pages_number = self._reserve()
+        self._helv = self._add(b'<< /BaseFont /Helvetica /Encoding /WinAnsiEncoding /Name /Helv '
+                               b'/Subtype /Type1 /Type /Font >>')
+        self._fonts = {name: self._add(b'<< /BaseFont /%s /Encoding /WinAnsiEncoding /Name /%s /Subtype /Type1 '
+                                       b'/Type /Font >>' % (name.encode(), resource.encode()))
+                       for name, resource in FONT_RESOURCES.items()}
+        self._font, self._font_size = 'Helvetica', 12
+        self.acroForm = _AcroForm(self)
+        self._start_page()
+
+    # -- objects ---------------------------------------------------------
+
+    def _reserve(self):
+        self._objects.append(None)
+        return len(self._objects) - 1
+
+    def _add(self, body, number=None):
+        if number is None:
+            number = self._reserve()
+        self._objects[number] = body
+        return number
+
+    def _add_stream(self, dictionary, content, compress=False):
+        if compress:
+            content = zlib.compress(content)
+            dictionary += b' /Filter [ /FlateDecode ]'
+        return self._add(b'<< %s /Length %d >>\nstream\n%s\nendstream' % (dictionary, len(content), content))
+
+    def _widget(self, body, field=False):
+        number = self._add(b'<< ' + body.replace(b'%(page)s', b'%d 0 R' % self._page_number) + b' >>')
+        self._annots.append(number)
+        if field:
+            self._fields.append(number)
+        return number
+
+    # -- pages -----------------------------------------------------------
+
+    def _start_page(self):
+        self._page_number = self._reserve()
+        self._ops = []
+        self._annots = []
+
+    def getPageNumber(self):
+        return len(self._pages) + 1
+
+    def showPage(self):
+        content = self._add_stream(b'', b'\n'.join(self._ops), compress=True)
+        annots = b' /Annots [ %s ]' % b' '.join(b'%d 0 R' % n for n in self._annots) if self._annots else b''
+        fonts = b' '.join(b'/%s %d 0 R' % (FONT_RESOURCES[name].encode(), n) for name, n in self._fonts.items())
+        self._add(b'<<%s /Contents %d 0 R /MediaBox [ 0 0 %s %s ] /Parent %d 0 R /Resources << /Font << %s >> '
+                  b'/ProcSet [ /PDF /Text ] >> /Type /Page >>' % (
+                      annots, content, fmt(self._width), fmt(self._height), self._pages_number, fonts),
+                  self._page_number)
+        self._pages.append(self._page_number)
+        self._start_page()
+
+    # -- drawing ---------------------------------------------------------
+
+    def setFillColor(self, color):
+        self._ops.append(color_operands(color) + b' rg')
+
+    def setStrokeColor(self, color):
+        self._ops.append(color_operands(color) + b' RG')
+
+    def setLineWidth(self, width):
+        self._ops.append(fmt(width) + b' w')
+
+    def setFont(self, name, size):
+        self._font, self._font_size = name, size
+
+    def stringWidth(self, text, font_name=None, font_size=None):
+        return string_width(text, font_name or self._font, font_size or self._font_size)
+
+    def rect(self, x, y, width, height, stroke=1, fill=0):
+        operator = b'B' if fill and stroke else b'f' if fill else b'S' if stroke else b'n'
+        self._ops.append(b'%s %s %s %s re %s' % (fmt(x), fmt(y), fmt(width), fmt(height), operator))
+
+    def line(self, x1, y1, x2, y2):
+        self._ops.append(b'%s %s m %s %s l S' % (fmt(x1), fmt(y1), fmt(x2), fmt(y2)))
+
+    def drawString(self, x, y, text):
+        self._ops.append(b'BT /%s %s Tf %s %s Td (%s) Tj ET' % (
+            FONT_RESOURCES[self._font].encode(), fmt(self._font_size), fmt(x), fmt(y), pdf_string(text)))
+
+    def drawRightString(self, x, y, text):
+        self.drawString(x - self.stringWidth(text), y, text)
+
+    # -- output ----------------------------------------------------------
+
+    def save(self):
+        if self._ops or self._annots or not self._pages:
+            self.showPage()
+        self._objects.pop()              # the page reserved after the last showPage()
+        for name, group in self._radios.items():
+            self._add(b'<< /FT /Btn /Ff %d /Kids [ %s ] /T (%s) /V /%s >>' % (
+                RADIO_FLAGS, b' '.join(b'%d 0 R' % n for n in group['kids']), pdf_string(name), group['value']),
+                group['number'])
+        self._add(b'<< /Count %d /Kids [ %s ] /Type /Pages >>' % (
+            len(self._pages), b' '.join(b'%d 0 R' % n for n in self._pages)), self._pages_number)
+        acroform = self._add(b'<< /DA (/Helv 0 Tf 0 g) /DR << /Font << /Helv %d 0 R >> >> /Fields [ %s ]%s >>' % (
+            self._helv, b' '.join(b'%d 0 R' % n for n in self._fields), b' /SigFlags 1' if self._signatures else b''))
+        root = self._add(b'<< /AcroForm %d 0 R /Pages %d 0 R /Type /Catalog >>' % (acroform, self._pages_number))
+
+        out = bytearray(b'%PDF-1.4\n%\x93\x8c\x8b\x9e\n')
+        offsets = []
+        for number, body in enumerate(self._objects[1:], 1):
+            offsets.append(len(out))
+            out += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+        xref = len(out)
+        out += b'xref\n0 %d\n0000000000 65535 f \n' % len(self._objects)
+        out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+        document_id = hashlib.md5(bytes(out)).hexdigest().encode('ascii')
+        out += b'trailer\n<< /ID [<%s><%s>] /Root %d 0 R /Size %d >>\nstartxref\n%d\n%%%%EOF\n' % (
+            document_id, document_id, root, len(self._objects), xref)
+        self._file.write(bytes(out))
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Wiley University - Business & Finance Website
+Print batches of blank forms, imposed N-up
+
+Builds a single print-ready PDF with many blank copies of one form. Each
+page of the form is drawn once, from its compiled layout (see
+generate_forms.compiled_forms()), into a reportlab form XObject. Every copy
+on every sheet is then a reference to that XObject, scaled into its cell,
+so a sheet costs a few hundred bytes however many copies it holds.
+
+Paper copies have no fields. Checkboxes and radio buttons are drawn as
+static outlines where their widgets would be, and text fields already have
+their boxes drawn on the page. The form ID code stays on every page.
+
+Cells are laid out in the grid and sheet orientation that gives the largest
+copies. Each cell gets crop marks at its trim corners, and optionally a
+serial number in the header. The sheets run page 1 of copies 1..N, page 2
+of copies 1..N, and so on, then the next N copies.
+
+    python3 print_batch.py work-order-request --copies 500 --up 4 --serial-start 1
+    python3 print_batch.py vehicle-inspection-checklist --copies 200 --up 2 --sheet tabloid
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import TABLOID, letter
+from reportlab.lib.units import inch
+
+from generate_forms import WILDCAT_PURPLE, WileyFormGenerator, compiled_forms, content_document_id
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(BASE_DIR, 'print-batches')
+SHEETS = {'letter': letter, 'tabloid': TABLOID}
+MARK_SPACE = 0.25 * inch     # around each trim box, for its crop marks
+MARK_OFFSET = 3              # gap between the trim corner and its marks
+MARK_WIDTH = 0.25
+
+
+def find_form(slug):
+    """Compiled form for a slug"""
+    for form in compiled_forms():
+        if form['spec']['slug'] == slug:
+            return form
+    raise KeyError(f"Unknown form {slug!r}")
+
+
+def grid(up, page_size, sheet_size, margin):
+    """(columns, rows, scale, sheet size) with the largest copies for up cells per sheet"""
+    best = None
+    for sheet in (sheet_size, sheet_size[::-1]):
+        for columns in range(1, up + 1):
+            if up % columns:
+                continue
+            rows = up // columns
+            scale = min((sheet[0] / columns - 2 * margin) / page_size[0],
+                        (sheet[1] / rows - 2 * margin) / page_size[1], 1)
+            if best is None or scale > best[2] + 1e-9:
+                best = (columns, rows, scale, sheet)
+    return best
+
+
+def _draw_widget_outline(c, method, kwargs):
+    """Static stand-in for a checkbox or radio widget"""
+    size = kwargs['size']
+    c.setLineWidth(1)
+    c.setStrokeColor(kwargs.get('borderColor', colors.black))
+    c.setFillColor(kwargs.get('fillColor', colors.white))
+    if method == 'acroForm.checkbox':
+        c.rect(kwargs['x'] + 0.5, kwargs['y'] + 0.5, size - 1, size - 1, fill=1, stroke=1)
+    else:
+        c.circle(kwargs['x'] + size / 2, kwargs['y'] + size / 2, size / 2 - 0.5, fill=1, stroke=1)
+
+
+def define_pages(c, form, generator):
+    """Draw each page of a compiled form into a form XObject; return their names"""
+    names = []
+    page = 1
+    generator.form_id = (form['spec']['slug'], form['hash'])
+
+    def begin():
+        names.append(f"page{page}")
+        c.beginForm(names[-1], 0, 0, generator.width, generator.height)
+
+    begin()
+    for method, args, kwargs in form['calls']:
+        if method == 'showPage':
+            c.endForm()
+            page += 1
+            begin()
+        elif method == 'formId':
+            generator._draw_form_id(c, page)
+        elif method in ('acroForm.checkbox', 'acroForm.radio'):
+            _draw_widget_outline(c, method, kwargs)
+        elif not method.startswith('acroForm.'):
+            getattr(c, method)(*args, **kwargs)
+    c.endForm()
+    return names
+
+
+def crop_marks(c, x0, y0, x1, y1, length):
+    """Corner marks outside the trim box (x0, y0)-(x1, y1)"""
+    c.setLineWidth(MARK_WIDTH)
+    c.setStrokeColor(colors.black)
+    for x, dx in ((x0, -1), (x1, 1)):
+        for y, dy in ((y0, -1), (y1, 1)):
+            c.line(x + dx * MARK_OFFSET, y, x + dx * (MARK_OFFSET + length), y)
+            c.line(x, y + dy * MARK_OFFSET, x, y + dy * (MARK_OFFSET + length))
+
+
+def draw_serial(c, generator, page, serial):
+    """Serial number in the page header: white in the title bar, purple on continuation pages"""
+    c.setFont("Helvetica-Bold", 9)
+    if page == 1:
+        c.setFillColor(colors.white)
+        c.drawRightString(generator.width - generator.margin, generator.height - 0.55 * inch, serial)
+    else:
+        c.setFillColor(WILDCAT_PURPLE)
+        c.drawRightString(generator.width - generator.margin, generator.height - 0.5 * inch, serial)
+
+
+def print_batch(slug, copies, up=4, sheet='letter', marks=True, serial_start=None, serial_prefix='No. '):
+    """(PDF bytes, sheets, pages per copy) of copies of a form imposed up per sheet"""
+    from reportlab.pdfgen import canvas
+
+    form = find_form(slug)
+    generator = WileyFormGenerator(deterministic=True)
+    page_size = (generator.width, generator.height)
+    margin = MARK_SPACE if marks else 0
+    columns, rows, scale, sheet_size = grid(up, page_size, SHEETS[sheet], margin)
+
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=sheet_size, invariant=1)
+    c.setTitle(f"{form['spec']['title']} - print batch of {copies}")
+    names = define_pages(c, form, generator)
+
+    cell_width, cell_height = sheet_size[0] / columns, sheet_size[1] / rows
+    trim_width, trim_height = page_size[0] * scale, page_size[1] * scale
+    sheets = 0
+    for first in range(0, copies, up):
+        batch = range(first, min(first + up, copies))
+        for page, name in enumerate(names, 1):
+            for slot, copy in enumerate(batch):
+                column, row = slot % columns, slot // columns
+                x = column * cell_width + (cell_width - trim_width) / 2
+                y = sheet_size[1] - (row + 1) * cell_height + (cell_height - trim_height) / 2
+                c.saveState()
+                c.translate(x, y)
+                c.scale(scale, scale)
+                c.doForm(name)
+                if serial_start is not None:
+                    draw_serial(c, generator, page, f"{serial_prefix}{serial_start + copy:06d}")
+                c.restoreState()
+                if marks:
+                    crop_marks(c, x, y, x + trim_width, y + trim_height, MARK_SPACE - MARK_OFFSET - 3)
+            c.showPage()
+            sheets += 1
+    c.save()
+    return content_document_id(buffer.getvalue()), sheets, len(names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print-ready PDF of many blank copies of a form, imposed N-up")
+    parser.add_argument('slug', help="form slug, e.g. work-order-request")
+    parser.add_argument('--copies', type=int, default=100)
+    parser.add_argument('--up', type=int, default=4, help="copies per sheet (default: 4; 1 repeats full pages)")
+    parser.add_argument('--sheet', choices=sorted(SHEETS), default='letter')
+    parser.add_argument('--no-crop-marks', action='store_true')
+    parser.add_argument('--serial-start', type=int, help="number the copies from this serial")
+    parser.add_argument('--serial-prefix', default='No. ')
+    parser.add_argument('--out', help="output PDF (default: print-batches/<slug>-<copies>x<up>up.pdf)")
+    args = parser.parse_args()
+    if args.copies < 1 or args.up < 1:
+        parser.error("--copies and --up must be positive")
+
+    start = time.perf_counter()
+    try:
+        data, sheets, pages = print_batch(args.slug, args.copies, args.up, args.sheet, not args.no_crop_marks,
+                                          args.serial_start, args.serial_prefix)
+    except KeyError as error:
+        sys.exit(error.args[0])
+    elapsed = time.perf_counter() - start
+    out = args.out or os.path.join(OUTPUT_DIR, f"{args.slug}-{args.copies}x{args.up}up.pdf")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'wb') as f:
+        f.write(data)
+    print(f"{args.copies:,} copies of {args.slug} ({pages} page{'s' if pages > 1 else ''} each) on {sheets:,} "
+          f"{args.sheet} sheets: {len(data) / 1024:.0f} KB ({len(data) / sheets / 1024:.1f} KB per sheet) "
+          f"in {elapsed:.2f} s -> {out}")
+
+    form = find_form(args.slug)['spec']
+    generator = WileyFormGenerator(deterministic=True)
+    sample = min(args.copies, 20)
+    start = time.perf_counter()
+    for _ in range(sample):
+        single = generator.render_form(form['title'], form['department'], form['fields'], form['instructions'],
+                                       slug=form['slug'])
+    per_render = (time.perf_counter() - start) / sample
+    print(f"{args.copies:,} full renders instead: about {len(single) * args.copies / 1e6:.1f} MB "
+          f"in {per_render * args.copies:.1f} s (from {sample} renders of {len(single) / 1024:.1f} KB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+Wiley University - Business & Finance Website
+Publish generated PDFs to S3-compatible object storage
+
+Uploads forms/*.pdf to a bucket over the S3 API (AWS, MinIO, R2, ...),
+skipping files whose MD5 already matches the remote object's ETag (one
+paginated ListObjectsV2 call, no per-file HEAD). Uploads run on a fixed
+number of keep-alive connections with asyncio, carry Content-MD5 so the
+server rejects corrupted bodies, are checked against the returned ETag,
+and are retried with exponential backoff on errors, 5xx and throttling.
+
+Standard library only (SigV4 signing included). Credentials come from
+AWS_ACCESS_KEY_ID / AWS_SECRET_ACCESS_KEY.
+
+    python3 publish_forms.py --endpoint http://127.0.0.1:9000 --bucket wiley-forms
+    python3 publish_forms.py serve-standin --port 9000        # local S3 stand-in for testing
+    python3 publish_forms.py bench                            # stand-in + two publishes, with injected failures
+"""
+
+import argparse
+import asyncio
+import base64
+import glob
+import hashlib
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlsplit
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FORMS_DIR = os.path.join(BASE_DIR, 'forms')
+
+CONCURRENCY = 8
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 0.2         # seconds, doubled per attempt, with jitter
+TIMEOUT = 30
+RETRY_STATUSES = frozenset((408, 429, 500, 502, 503, 504))
+S3_NS = '{http://s3.amazonaws.com/doc/2006-03-01/}'
+
+
+class PublishError(Exception):
+    """A request failed for good"""
+
+
+# ---- SigV4 ----------------------------------------------------------------
+
+def _hmac(key, message):
+    return hmac.new(key, message.encode('utf-8'), hashlib.sha256).digest()
+
+
+def sign_request(method, host, path, query, headers, payload_hash, access_key, secret_key, region,
+                 service='s3', now=None):
+    """Add x-amz-date, x-amz-content-sha256 and Authorization (AWS Signature Version 4) to headers"""
+    now = now or datetime.now(timezone.utc)
+    amz_date = now.strftime('%Y%m%dT%H%M%SZ')
+    headers['host'] = host
+    headers['x-amz-date'] = amz_date
+    headers['x-amz-content-sha256'] = payload_hash
+
+    canonical_query = '&'.join(f"{quote(k, safe='-_.~')}={quote(v, safe='-_.~')}" for k, v in sorted(query.items()))
+    signed = sorted(name.lower() for name in headers)
+    lowered = {name.lower(): str(value).strip() for name, value in headers.items()}
+    canonical_headers = ''.join(f"{name}:{lowered[name]}\n" for name in signed)
+    signed_headers = ';'.join(signed)
+    canonical_request = '\n'.join((method, quote(path, safe='/-_.~'), canonical_query, canonical_headers,
+                                   signed_headers, payload_hash))
+
+    scope = f"{amz_date[:8]}/{region}/{service}/aws4_request"
+    string_to_sign = '\n'.join(('AWS4-HMAC-SHA256', amz_date, scope,
+                                hashlib.sha256(canonical_request.encode('utf-8')).hexdigest()))
+    key = _hmac(_hmac(_hmac(_hmac(f"AWS4{secret_key}".encode('utf-8'), amz_date[:8]), region), service),
+                'aws4_request')
+    signature = hmac.new(key, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+    headers['Authorization'] = (f"AWS4-HMAC-SHA256 Credential={access_key}/{scope}, "
+                                f"SignedHeaders={signed_headers}, Signature={signature}")
+    return headers
+
+
+# ---- HTTP/1.1 over asyncio streams ------------------------------------------
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection, reopened when it drops"""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method, target, headers, body=b''):
+        """(status, headers, body)"""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), TIMEOUT)
+        lines = [f"{method} {target} HTTP/1.1"] + [f"{k}: {v}" for k, v in headers.items()]
+        lines.append(f"Content-Length: {len(body)}")
+        try:
+            self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+            await self.writer.drain()
+            return await asyncio.wait_for(self._read_response(method), TIMEOUT)
+        except BaseException:
+            self.close()
+            raise
+
+    async def _read_response(self, method):
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = (await self.reader.readline()).decode('latin-1').rstrip('\r\n')
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        body = b''
+        if method == 'HEAD' or status in (204, 304):
+            pass
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                body += await self.reader.readexactly(size)
+                await self.reader.readline()
+        else:
+            body = await self.reader.readexactly(int(headers.get('content-length', 0)))
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status, headers, body
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class S3Client:
+    """Just enough of the S3 API to list and put objects"""
+
+    def __init__(self, endpoint, bucket, access_key, secret_key, region='us-east-1', concurrency=CONCURRENCY):
+        parts = urlsplit(endpoint)
+        if parts.scheme != 'http':
+            # asyncio.open_connection(ssl=...) would do; the local stand-in and MinIO run plain HTTP
+            raise PublishError("only http:// endpoints are supported")
+        self.host = parts.netloc
+        self.hostname, self.port = parts.hostname, parts.port or 80
+        self.bucket = bucket
+        self.access_key, self.secret_key, self.region = access_key, secret_key, region
+        self.pool = asyncio.Queue()
+        for _ in range(concurrency):
+            self.pool.put_nowait(Connection(self.hostname, self.port))
+        self.retries = 0
+
+    async def call(self, method, key='', query=None, headers=None, body=b''):
+        """Signed request with retries; return (status, headers, body)"""
+        query = query or {}
+        path = f"/{self.bucket}/{key}" if key else f"/{self.bucket}"
+        target = quote(path, safe='/-_.~') + ('?' + '&'.join(f"{quote(k, safe='-_.~')}={quote(v, safe='-_.~')}"
+                                                             for k, v in sorted(query.items())) if query else '')
+        payload_hash = hashlib.sha256(body).hexdigest()
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            request_headers = sign_request(method, self.host, path, query, dict(headers or {}), payload_hash,
+                                           self.access_key, self.secret_key, self.region)
+            connection = await self.pool.get()
+            try:
+                status, response_headers, response_body = await connection.request(method, target, request_headers, body)
+                if status not in RETRY_STATUSES:
+                    return status, response_headers, response_body
+                error = f"HTTP {status}"
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as exc:
+                error = f"{type(exc).__name__}: {exc}"
+            finally:
+                self.pool.put_nowait(connection)
+            if attempt == MAX_ATTEMPTS:
+                raise PublishError(f"{method} {path}: {error} after {attempt} attempts")
+            self.retries += 1
+            await asyncio.sleep(BACKOFF_BASE * 2 ** (attempt - 1) * (0.5 + random.random()))
+
+    async def create_bucket(self):
+        status, _, body = await self.call('PUT')
+        if status not in (200, 409):
+            raise PublishError(f"create bucket: HTTP {status} {body[:200]!r}")
+
+    async def list_etags(self, prefix):
+        """{key: etag} for every object under prefix"""
+        etags = {}
+        token = None
+        while True:
+            query = {'list-type': '2', 'prefix': prefix}
+            if token:
+                query['continuation-token'] = token
+            status, _, body = await self.call('GET', query=query)
+            if status == 404:
+                return etags
+            if status != 200:
+                raise PublishError(f"list {prefix!r}: HTTP {status} {body[:200]!r}")
+            root = ET.fromstring(body)
+            for item in root.iter(f"{S3_NS}Contents"):
+                etags[item.findtext(f"{S3_NS}Key")] = item.findtext(f"{S3_NS}ETag", '').strip('"')
+            token = root.findtext(f"{S3_NS}NextContinuationToken")
+            if root.findtext(f"{S3_NS}IsTruncated") != 'true' or not token:
+                return etags
+
+    async def put(self, key, data, content_type, cache_control=None):
+        """Upload one object, verified by Content-MD5 and the returned ETag"""
+        digest = hashlib.md5(data).digest()
+        headers = {'Content-Type': content_type, 'Content-MD5': base64.b64encode(digest).decode('ascii')}
+        if cache_control:
+            headers['Cache-Control'] = cache_control
+        status, response_headers, body = await self.call('PUT', key, headers=headers, body=data)
+        if status != 200:
+            raise PublishError(f"PUT {key}: HTTP {status} {body[:200]!r}")
+        etag = response_headers.get('etag', '').strip('"')
+        if etag and etag != digest.hex():
+            raise PublishError(f"PUT {key}: ETag {etag} does not match the uploaded MD5 {digest.hex()}")
+
+    def close(self):
+        while not self.pool.empty():
+            self.pool.get_nowait().close()
+
+
+# ---- Publishing -----------------------------------------------------------
+
+async def publish(client, paths, prefix, cache_control=None, dry_run=False, create_bucket=False):
+    """Upload files whose MD5 differs from the remote ETag; return a stats dict"""
+    stats = {'uploaded': 0, 'skipped': 0, 'failed': 0, 'bytes': 0, 'errors': []}
+    if create_bucket and not dry_run:
+        await client.create_bucket()
+    remote = await client.list_etags(prefix)
+
+    pending = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            data = f.read()
+        key = prefix + os.path.basename(path)
+        if remote.get(key) == hashlib.md5(data).hexdigest():
+            stats['skipped'] += 1
+        else:
+            pending.append((key, data))
+
+    async def upload(key, data):
+        try:
+            if not dry_run:
+                await client.put(key, data, 'application/pdf', cache_control)
+            stats['uploaded'] += 1
+            stats['bytes'] += len(data)
+        except PublishError as error:
+            stats['failed'] += 1
+            stats['errors'].append(str(error))
+
+    await asyncio.gather(*(upload(key, data) for key, data in pending))
+    stats['retries'] = client.retries
+    return stats
+
+
+def print_stats(stats, elapsed):
+    for error in stats['errors']:
+        print(f"  error: {error}")
+    rate = stats['bytes'] / max(elapsed, 1e-9) / 1e6
+    print(f"Uploaded {stats['uploaded']} ({stats['bytes'] / 1e6:.2f} MB), skipped {stats['skipped']} unchanged, "
+          f"{stats['failed']} failed, {stats['retries']} retries in {elapsed:.2f} s "
+          f"({stats['uploaded'] / max(elapsed, 1e-9):.0f} files/s, {rate:.1f} MB/s)")
+
+
+async def run_publish(endpoint, bucket, prefix, paths, concurrency, **options):
+    client = S3Client(endpoint, bucket, os.environ.get('AWS_ACCESS_KEY_ID', 'local'),
+                      os.environ.get('AWS_SECRET_ACCESS_KEY', 'local'),
+                      os.environ.get('AWS_REGION', 'us-east-1'), concurrency)
+    try:
+        start = time.perf_counter()
+        stats = await publish(client, paths, prefix, **options)
+        return stats, time.perf_counter() - start
+    finally:
+        client.close()
+
+
+# ---- Local stand-in ---------------------------------------------------------
+
+class StandinHandler(BaseHTTPRequestHandler):
+    """Directory-backed subset of the S3 API: create bucket, put object, ListObjectsV2
+
+    Signatures are not checked. A share of requests (fail_rate) is answered
+    with 503 SlowDown to exercise the client's retries.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def _reply(self, status, body=b'', headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _split(self):
+        parts = urlsplit(self.path)
+        bucket, _, key = parts.path.lstrip('/').partition('/')
+        return bucket, key, parse_qs(parts.query)
+
+    def _throttled(self):
+        if random.random() < self.server.fail_rate:
+            self._reply(503, b'<Error><Code>SlowDown</Code></Error>')
+            return True
+        return False
+
+    def do_PUT(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self._throttled():
+            return
+        bucket, key, _ = self._split()
+        bucket_dir = os.path.join(self.server.root, bucket)
+        if not key:
+            os.makedirs(bucket_dir, exist_ok=True)
+            self._reply(200)
+            return
+        if not os.path.isdir(bucket_dir):
+            self._reply(404, b'<Error><Code>NoSuchBucket</Code></Error>')
+            return
+        digest = hashlib.md5(body).digest()
+        expected = self.headers.get('Content-MD5')
+        if expected and base64.b64decode(expected) != digest:
+            self._reply(400, b'<Error><Code>BadDigest</Code></Error>')
+            return
+        path = os.path.join(bucket_dir, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(body)
+        self._reply(200, headers={'ETag': f'"{digest.hex()}"'})
+
+    def do_GET(self):
+        if self._throttled():
+            return
+        bucket, _, query = self._split()
+        bucket_dir = os.path.join(self.server.root, bucket)
+        if not os.path.isdir(bucket_dir):
+            self._reply(404, b'<Error><Code>NoSuchBucket</Code></Error>')
+            return
+        prefix = query.get('prefix', [''])[0]
+        after = query.get('continuation-token', [''])[0]
+        keys = []
+        for dirpath, _, filenames in os.walk(bucket_dir):
+            for name in filenames:
+                key = os.path.relpath(os.path.join(dirpath, name), bucket_dir).replace(os.sep, '/')
+                if key.startswith(prefix) and key > after:
+                    keys.append(key)
+        keys.sort()
+        page, truncated = keys[:self.server.page_size], len(keys) > self.server.page_size
+        root = ET.Element('ListBucketResult', xmlns=S3_NS[1:-1])
+        for key in page:
+            with open(os.path.join(bucket_dir, key), 'rb') as f:
+                data = f.read()
+            item = ET.SubElement(root, 'Contents')
+            ET.SubElement(item, 'Key').text = key
+            ET.SubElement(item, 'ETag').text = f'"{hashlib.md5(data).hexdigest()}"'
+            ET.SubElement(item, 'Size').text = str(len(data))
+        ET.SubElement(root, 'IsTruncated').text = 'true' if truncated else 'false'
+        if truncated:
+            ET.SubElement(root, 'NextContinuationToken').text = page[-1]
+        self._reply(200, ET.tostring(root, xml_declaration=True, encoding='utf-8'),
+                    {'Content-Type': 'application/xml'})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_standin(root, port=0, fail_rate=0.0, page_size=1000):
+    """Create (but don't start) a stand-in server storing buckets under root"""
+    os.makedirs(root, exist_ok=True)
+    server = ThreadingHTTPServer(('127.0.0.1', port), StandinHandler)
+    server.daemon_threads = True
+    server.root, server.fail_rate, server.page_size = root, fail_rate, page_size
+    return server
+
+
+def benchmark(concurrency, fail_rate):
+    """Publish all forms to a fresh stand-in twice: cold (all uploads) and warm (all skipped)"""
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as root:
+        server = make_standin(root, fail_rate=fail_rate, page_size=10)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        endpoint = f"http://127.0.0.1:{server.server_address[1]}"
+        paths = sorted(glob.glob(os.path.join(FORMS_DIR, '*.pdf')))
+        try:
+            for label in ('cold', 'warm'):
+                stats, elapsed = asyncio.run(run_publish(endpoint, 'wiley-forms', 'forms/', paths, concurrency,
+                                                         create_bucket=True))
+                print(f"{label}: ", end='')
+                print_stats(stats, elapsed)
+        finally:
+            server.shutdown()
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] in ('serve-standin', 'bench'):
+        command = sys.argv.pop(1)
+        parser = argparse.ArgumentParser(prog=f"publish_forms.py {command}")
+        parser.add_argument('--fail-rate', type=float, default=0.0 if command == 'serve-standin' else 0.05,
+                            help="share of requests answered with 503")
+        if command == 'serve-standin':
+            parser.add_argument('--port', type=int, default=9000)
+            parser.add_argument('--dir', default=os.path.join(BASE_DIR, '.build-cache', 's3-standin'))
+            args = parser.parse_args()
+            server = make_standin(args.dir, args.port, args.fail_rate)
+            print(f"S3 stand-in on http://127.0.0.1:{args.port} storing in {args.dir}")
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+        else:
+            parser.add_argument('--concurrency', type=int, default=CONCURRENCY)
+            args = parser.parse_args()
+            benchmark(args.concurrency, args.fail_rate)
+        return 0
+
+    parser = argparse.ArgumentParser(description="Upload changed PDFs to S3-compatible storage "
+                                                 "(subcommands: serve-standin, bench)")
+    parser.add_argument('paths', nargs='*', help="files to publish (default: forms/*.pdf)")
+    parser.add_argument('--endpoint', default=os.environ.get('S3_ENDPOINT', 'http://127.0.0.1:9000'))
+    parser.add_argument('--bucket', default=os.environ.get('S3_BUCKET', 'wiley-forms'))
+    parser.add_argument('--prefix', default='forms/', help="key prefix (default: forms/)")
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY, help="parallel connections")
+    parser.add_argument('--cache-control', help="Cache-Control header for uploaded objects")
+    parser.add_argument('--create-bucket', action='store_true', help="create the bucket if it doesn't exist")
+    parser.add_argument('--dry-run', action='store_true', help="only report what would be uploaded")
+    args = parser.parse_args()
+
+    paths = args.paths or sorted(glob.glob(os.path.join(FORMS_DIR, '*.pdf')))
+    try:
+        stats, elapsed = asyncio.run(run_publish(
+            args.endpoint, args.bucket, args.prefix, paths, args.concurrency,
+            cache_control=args.cache_control, dry_run=args.dry_run, create_bucket=args.create_bucket))
+    except (PublishError, OSError) as error:
+        sys.exit(f"Publish failed: {error}")
+    print_stats(stats, elapsed)
+    return 1 if stats['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Wiley University - Business & Finance Website
+Batch digital signing of the generated PDF forms
+
+Fills an empty signature field (/FT /Sig, written by generate_forms.py for
+every signature line) with a detached PKCS#7 signature. Each signature is an
+incremental update: a signature dictionary with a fixed-size /Contents
+placeholder, the widget with its new /V and the AcroForm with /SigFlags 3 are
+appended, the /ByteRange is patched in place, and the covered bytes are
+signed. The original bytes are never rewritten, so earlier signatures and
+prefilled values stay valid.
+
+Files are split across a process pool; each worker loads the key and
+certificate once. Without --key/--cert a self-signed test certificate is
+created in .build-cache/signing/ on first use (not for production signing).
+
+    python3 sign_forms.py forms/*.pdf --out signed/
+    python3 sign_forms.py --bench 500
+"""
+
+import argparse
+import datetime
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from pdf_fields import NAME_PATTERN, PdfFile, incremental_update, pdf_string, unescape_string
+
+try:
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.hazmat.primitives.serialization import pkcs7
+except ImportError:
+    x509 = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(BASE_DIR, 'signed')
+CREDENTIALS_DIR = os.path.join(BASE_DIR, '.build-cache', 'signing')
+TEST_SUBJECT = 'Wiley University Business Office (test signer)'
+BENCH_FORM = 'travel-reimbursement-request'
+SIGNATURE_SPACE = 8192        # bytes reserved for the DER signature
+CHUNK_SIZE = 50
+BYTE_RANGE_PLACEHOLDER = b'/ByteRange [0 0000000000 0000000000 0000000000]'
+
+
+def test_credentials(directory=CREDENTIALS_DIR):
+    """(key path, certificate path) of the self-signed test signer, created if missing"""
+    key_path = os.path.join(directory, 'test-key.pem')
+    cert_path = os.path.join(directory, 'test-cert.pem')
+    if os.path.exists(key_path) and os.path.exists(cert_path):
+        return key_path, cert_path
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([
+        x509.NameAttribute(x509.NameOID.COMMON_NAME, TEST_SUBJECT),
+        x509.NameAttribute(x509.NameOID.ORGANIZATION_NAME, 'Wiley University'),
+    ])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (x509.CertificateBuilder()
+            .subject_name(name).issuer_name(name)
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(days=1))
+            .not_valid_after(now + datetime.timedelta(days=365))
+            .add_extension(x509.KeyUsage(True, True, False, False, False, False, False, False, False), critical=True)
+            .sign(key, hashes.SHA256()))
+    os.makedirs(directory, exist_ok=True)
+    with open(key_path, 'wb') as f:
+        f.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                  serialization.NoEncryption()))
+    with open(cert_path, 'wb') as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    return key_path, cert_path
+
+
+def load_credentials(key_path, cert_path):
+    """(private key, certificate) from PEM files"""
+    with open(key_path, 'rb') as f:
+        key = serialization.load_pem_private_key(f.read(), password=None)
+    with open(cert_path, 'rb') as f:
+        cert = x509.load_pem_x509_certificate(f.read())
+    return key, cert
+
+
+def signature_fields(pdf):
+    """[(object number, field name, signed)] for every signature field"""
+    fields = []
+    for number in sorted(pdf.offsets):
+        body = pdf.object(number)
+        if b'/FT /Sig' in body:
+            name = NAME_PATTERN.search(body)
+            fields.append((number, unescape_string(name.group(1)) if name else '', b'/V ' in body))
+    return fields
+
+
+def _acroform(pdf):
+    """(object number, body) of the document's AcroForm dictionary"""
+    catalog = pdf.object(int(pdf.root.split()[0]))
+    number = int(re.search(rb'/AcroForm (\d+) 0 R', catalog).group(1))
+    return number, pdf.object(number)
+
+
+def _with_entry(body, key, value):
+    """Dictionary body with key set to value (replaced if present)"""
+    if re.search(rb'/' + key + rb' \d+', body):
+        return re.sub(rb'/' + key + rb' \d+', b'/' + key + b' ' + value, body, count=1)
+    return body[:body.rindex(b'>>')].rstrip() + b' /' + key + b' ' + value + b' >>'
+
+
+def sign_pdf(data, key, cert, field=None, reason=None, when=None):
+    """PDF bytes plus an incremental update signing field (default: the first unsigned one)"""
+    pdf = PdfFile(data)
+    unsigned = [(number, name) for number, name, signed in signature_fields(pdf)
+                if not signed and (field is None or name == field)]
+    if not unsigned:
+        raise ValueError(f"no unsigned signature field{f' named {field!r}' if field else ''}")
+    widget, _ = unsigned[0]
+    acroform, acroform_body = _acroform(pdf)
+    when = when or datetime.datetime.now(datetime.timezone.utc)
+
+    sig_number = pdf.size
+    signature = (b'<< /Type /Sig /Filter /Adobe.PPKLite /SubFilter /adbe.pkcs7.detached '
+                 + BYTE_RANGE_PLACEHOLDER
+                 + b' /Contents <' + b'0' * (2 * SIGNATURE_SPACE) + b'>'
+                 + b' /M (D:' + when.strftime('%Y%m%d%H%M%S').encode('ascii') + b"+00'00')"
+                 + b' /Name (' + pdf_string(cert.subject.rfc4514_string()) + b')'
+                 + (b' /Reason (' + pdf_string(reason) + b')' if reason else b'')
+                 + b' >>')
+    objects = {
+        sig_number: signature,
+        widget: _with_entry(pdf.object(widget), b'V', b'%d 0 R' % sig_number),
+        acroform: _with_entry(acroform_body, b'SigFlags', b'3'),    # SignaturesExist | AppendOnly
+    }
+    out = bytearray(data + incremental_update(pdf, objects))
+
+    # Patch the byte range in place: everything except the hex string between < and >
+    contents = out.index(b'/Contents <', len(data)) + len(b'/Contents ')
+    gap_end = contents + 2 * SIGNATURE_SPACE + 2
+    byte_range = b'/ByteRange [0 %010d %010d %010d]' % (contents, gap_end, len(out) - gap_end)
+    start = out.index(BYTE_RANGE_PLACEHOLDER, len(data))
+    out[start:start + len(byte_range)] = byte_range
+
+    signed = (pkcs7.PKCS7SignatureBuilder()
+              .set_data(bytes(out[:contents]) + bytes(out[gap_end:]))
+              .add_signer(cert, key, hashes.SHA256())
+              .sign(serialization.Encoding.DER, [pkcs7.PKCS7Options.DetachedSignature, pkcs7.PKCS7Options.Binary]))
+    if len(signed) > SIGNATURE_SPACE:
+        raise ValueError(f"signature is {len(signed)} bytes, more than the {SIGNATURE_SPACE} reserved")
+    out[contents + 1:contents + 1 + 2 * len(signed)] = signed.hex().encode('ascii')
+    return bytes(out)
+
+
+_key = None
+_cert = None
+
+
+def _init_worker(key_path, cert_path):
+    global _key, _cert
+    _key, _cert = load_credentials(key_path, cert_path)
+
+
+def _sign_chunk(task):
+    """Worker: sign one chunk of files; return [(path, output bytes or None, error)]"""
+    out_dir, field, reason, paths = task
+    results = []
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                data = sign_pdf(f.read(), _key, _cert, field, reason)
+        except (OSError, ValueError, AttributeError) as error:
+            results.append((path, None, str(error) or type(error).__name__))
+            continue
+        with open(os.path.join(out_dir, os.path.basename(path)), 'wb') as f:
+            f.write(data)
+        results.append((path, len(data), None))
+    return results
+
+
+def sign_files(paths, out_dir=OUTPUT_DIR, key_path=None, cert_path=None, field=None, reason=None, workers=None):
+    """Sign every PDF into out_dir; return (signed count, total bytes, [(path, error)])"""
+    if key_path is None:
+        key_path, cert_path = test_credentials()
+    os.makedirs(out_dir, exist_ok=True)
+    tasks = [(out_dir, field, reason, paths[start:start + CHUNK_SIZE])
+             for start in range(0, len(paths), CHUNK_SIZE)]
+    count = total = 0
+    errors = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(key_path, cert_path)) as pool:
+        for results in pool.map(_sign_chunk, tasks):
+            for path, size, error in results:
+                if error:
+                    errors.append((path, error))
+                else:
+                    count += 1
+                    total += size
+    return count, total, errors
+
+
+def benchmark(count, workers):
+    """Signatures per second over count copies of a form, against loading the key per signature"""
+    from prefill_forms import find_spec, render_template
+
+    template = render_template(find_spec(BENCH_FORM))
+    key_path, cert_path = test_credentials()
+    work_dir = tempfile.mkdtemp(prefix='sign-bench-')
+    try:
+        paths = []
+        for n in range(count):
+            paths.append(os.path.join(work_dir, f"{BENCH_FORM}-{n:06d}.pdf"))
+            with open(paths[-1], 'wb') as f:
+                f.write(template)
+        out_dir = os.path.join(work_dir, 'signed')
+        start = time.perf_counter()
+        signed, total, errors = sign_files(paths, out_dir, key_path, cert_path, workers=workers)
+        elapsed = time.perf_counter() - start
+    finally:
+        shutil.rmtree(work_dir)
+    if errors:
+        print(f"{len(errors)} failed, e.g. {errors[0][1]}")
+    print(f"Signed {signed:,} PDFs in {elapsed:.2f} s = {signed / elapsed:,.0f} signatures/s "
+          f"(update {(total / max(signed, 1) - len(template)) / 1024:.1f} KB on a {len(template) / 1024:.1f} KB form)")
+
+    sample = min(count, 50)
+    start = time.perf_counter()
+    for _ in range(sample):
+        load_credentials(key_path, cert_path)
+    per_load = (time.perf_counter() - start) / sample
+    key, cert = load_credentials(key_path, cert_path)
+    start = time.perf_counter()
+    for _ in range(sample):
+        sign_pdf(template, key, cert)
+    per_sign = (time.perf_counter() - start) / sample
+    print(f"One process: {per_sign * 1000:.2f} ms per signature with cached credentials, "
+          f"{(per_sign + per_load) * 1000:.2f} ms loading the key and certificate each time")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Digitally sign generated PDF forms")
+    parser.add_argument('pdfs', nargs='*', help="PDF files to sign")
+    parser.add_argument('--out', default=OUTPUT_DIR, help="output directory (default: signed/)")
+    parser.add_argument('--key', help="PEM private key (default: the local test signer)")
+    parser.add_argument('--cert', help="PEM certificate for --key")
+    parser.add_argument('--field', help="signature field name (default: the first unsigned one)")
+    parser.add_argument('--reason', help="reason recorded in the signature")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--bench', type=int, metavar='N', help=f"time signing N copies of {BENCH_FORM}")
+    args = parser.parse_args()
+
+    if x509 is None:
+        sys.exit("cryptography is required (pip install cryptography)")
+    if bool(args.key) != bool(args.cert):
+        parser.error("--key and --cert go together")
+    if args.bench:
+        benchmark(args.bench, args.workers)
+        return 0
+    if not args.pdfs:
+        parser.error("PDF files required (or --bench N)")
+    start = time.perf_counter()
+    count, total, errors = sign_files(args.pdfs, args.out, args.key, args.cert, args.field, args.reason, args.workers)
+    elapsed = time.perf_counter() - start
+    for path, error in errors:
+        print(f"SKIP {path}: {error}")
+    print(f"Signed {count:,} PDFs ({total / 1e6:.1f} MB) into {args.out} in {elapsed:.2f} s "
+          f"({count / max(elapsed, 1e-9):,.0f} signatures/s)")
+    return 1 if errors and not count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
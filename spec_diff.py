@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Wiley University - Business & Finance Website
+Form spec differ
+
+Compares the form specs in create_all_forms() between two builds and
+reports per form which fields were added, removed, moved, relabeled or
+changed (type, required flag, options), and which PDF widget names
+(field_N...) shift as a result. Every field and every form carries a hash
+of its spec subtree, so unchanged forms are skipped without looking at
+their fields.
+
+A build is the working tree (default for NEW), a git revision (default for
+OLD is HEAD) or a snapshot written with --save. --sql prints the
+submission_store.py migration for the real deltas.
+
+    python3 spec_diff.py                     # HEAD vs working tree
+    python3 spec_diff.py v1.2 --json
+    python3 spec_diff.py snapshot.json --sql --save snapshot.json
+"""
+
+import argparse
+import ast
+import contextlib
+import difflib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import types
+
+from generate_forms import FormSpecCollector, load_form_specs, spec_hash, subtree_hash
+from submission_store import SQL_TYPES, form_columns, quote, table_name
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SNAPSHOT_VERSION = 1
+
+# Field attributes that matter to submissions (label changes are reported as relabels)
+SCHEMA_ATTRIBUTES = ('type', 'required', 'options')
+
+
+def compile_spec(spec):
+    """Form spec -> {hash, title, department, fields: [input field + column, kind, hash]}"""
+    fields = []
+    for column, kind, field in form_columns(spec):
+        fields.append(dict(field, column=column, kind=kind,
+                           hash=subtree_hash([field[a] for a in ('type', 'label', 'required', 'options')])))
+    return {
+        'hash': spec_hash(spec['title'], spec['department'], spec['fields'], spec['instructions']),
+        'title': spec['title'],
+        'department': spec['department'],
+        'fields': fields,
+    }
+
+
+def compile_specs(specs):
+    """{slug: compiled form}"""
+    return {spec['slug']: compile_spec(spec) for spec in specs}
+
+
+# Run in a fresh process by specs_at_revision(): module source on stdin,
+# specs as JSON on stdout
+REVISION_SNIPPET = (
+    "import sys, spec_diff; "
+    "sys.stdout.write(spec_diff.collect_specs(sys.stdin.read(), sys.argv[1], sys.argv[2]))"
+)
+
+
+def definitions_only(source, filename, forms_dir):
+    """A module's AST without its top-level side effects
+
+    Top-level expression statements (the os.makedirs() of the original
+    hard-coded forms folder) and the __main__ block are dropped, and any
+    FORMS_DIR assignment points at forms_dir instead.
+    """
+    tree = ast.parse(source, filename)
+    body = []
+    for node in tree.body:
+        if isinstance(node, ast.Expr):
+            continue
+        if isinstance(node, ast.If) and '__main__' in ast.unparse(node.test):
+            continue
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == 'FORMS_DIR'
+                                                for t in node.targets):
+            node = ast.Assign(targets=[ast.Name('FORMS_DIR', ast.Store())], value=ast.Constant(forms_dir))
+        body.append(node)
+    tree.body = body
+    return ast.fix_missing_locations(tree)
+
+
+def collect_specs(source, filename, forms_dir):
+    """JSON form specs from a generate_forms.py source, collected without drawing
+
+    Older revisions predate load_form_specs(), so the module's generator
+    class is swapped for FormSpecCollector before create_all_forms() runs.
+    """
+    module = types.ModuleType('generate_forms_at_revision')
+    module.__file__ = os.path.join(forms_dir, 'generate_forms.py')
+    exec(compile(definitions_only(source, filename, forms_dir), filename, 'exec'), module.__dict__)
+    collector = FormSpecCollector()
+    module.WileyFormGenerator = lambda *args, **kwargs: collector
+    with contextlib.redirect_stdout(io.StringIO()):
+        module.create_all_forms()
+    return json.dumps(collector.forms)
+
+
+def specs_at_revision(revision):
+    """Form specs from generate_forms.py as committed at a git revision
+
+    The old module runs in a separate process, from a temporary directory
+    that its forms folder and spec cache also point at, so nothing it does
+    on import can touch the working tree or paths outside it.
+    """
+    source = subprocess.run(['git', 'show', f"{revision}:generate_forms.py"], cwd=BASE_DIR,
+                            capture_output=True, text=True, check=True).stdout
+    with tempfile.TemporaryDirectory() as scratch:
+        env = dict(os.environ, WILEY_FORMS_DIR=scratch, WILEY_SPEC_CACHE_DIR=scratch,
+                   PYTHONPATH=os.pathsep.join(filter(None, (BASE_DIR, os.environ.get('PYTHONPATH')))))
+        result = subprocess.run([sys.executable, '-c', REVISION_SNIPPET, f"{revision}:generate_forms.py", scratch],
+                                input=source, capture_output=True, text=True, cwd=scratch, env=env)
+    if result.returncode:
+        sys.exit(f"Could not load the form specs at {revision}:\n{result.stderr.strip()}")
+    return json.loads(result.stdout)
+
+
+def load_build(source):
+    """Compiled specs for 'working', a snapshot file or a git revision"""
+    if source == 'working':
+        return compile_specs(load_form_specs())
+    if source.endswith('.json') and os.path.exists(source):
+        with open(source) as f:
+            snapshot = json.load(f)
+        if snapshot.get('version') != SNAPSHOT_VERSION:
+            sys.exit(f"{source}: unsupported snapshot version")
+        return snapshot['forms']
+    return compile_specs(specs_at_revision(source))
+
+
+def diff_form(old, new):
+    """Field-level changes between two compiled versions of one form"""
+    changes = {'added': [], 'removed': [], 'moved': [], 'relabeled': [], 'changed': [], 'renamed_widgets': []}
+    old_fields, new_fields = old['fields'], new['fields']
+    matched = []   # (old index, new index)
+
+    # Identical fields in the same order
+    matcher = difflib.SequenceMatcher(None, [f['hash'] for f in old_fields], [f['hash'] for f in new_fields],
+                                      autojunk=False)
+    unmatched_old, unmatched_new = [], []
+    replaced = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            matched += zip(range(i1, i2), range(j1, j2))
+            continue
+        unmatched_old += range(i1, i2)
+        unmatched_new += range(j1, j2)
+        if tag == 'replace':
+            replaced.append((list(range(i1, i2)), list(range(j1, j2))))
+
+    # Identical fields somewhere else: moved
+    by_hash = {}
+    for j in unmatched_new:
+        by_hash.setdefault(new_fields[j]['hash'], []).append(j)
+    for i in list(unmatched_old):
+        candidates = by_hash.get(old_fields[i]['hash'])
+        if candidates:
+            j = candidates.pop(0)
+            unmatched_old.remove(i)
+            unmatched_new.remove(j)
+            matched.append((i, j))
+            changes['moved'].append({'field': new_fields[j]['key'], 'from': i, 'to': j})
+
+    # Same label, different attributes: changed
+    by_label = {}
+    for j in unmatched_new:
+        by_label.setdefault(new_fields[j]['label'], []).append(j)
+    for i in list(unmatched_old):
+        candidates = by_label.get(old_fields[i]['label'])
+        if candidates:
+            j = candidates.pop(0)
+            unmatched_old.remove(i)
+            unmatched_new.remove(j)
+            matched.append((i, j))
+            changes['changed'].append({
+                'field': new_fields[j]['key'],
+                'attributes': {a: [old_fields[i][a], new_fields[j][a]]
+                               for a in SCHEMA_ATTRIBUTES if old_fields[i][a] != new_fields[j][a]},
+            })
+
+    # Same slot in a replaced run, same type and options: relabeled
+    for old_run, new_run in replaced:
+        for i, j in zip(old_run, new_run):
+            if i not in unmatched_old or j not in unmatched_new:
+                continue
+            a, b = old_fields[i], new_fields[j]
+            if (a['type'], a['required'], a['options']) == (b['type'], b['required'], b['options']):
+                unmatched_old.remove(i)
+                unmatched_new.remove(j)
+                matched.append((i, j))
+                changes['relabeled'].append({'from': a['key'], 'to': b['key'], 'label': [a['label'], b['label']]})
+
+    changes['removed'] = [old_fields[i]['key'] for i in sorted(unmatched_old)]
+    changes['added'] = [new_fields[j]['key'] for j in sorted(unmatched_new)]
+    for i, j in sorted(matched, key=lambda pair: pair[1]):
+        if old_fields[i]['name'] != new_fields[j]['name'] and new_fields[j]['name']:
+            changes['renamed_widgets'].append({'field': new_fields[j]['key'], 'from': old_fields[i]['name'],
+                                               'to': new_fields[j]['name']})
+    changes['_matched'] = matched
+    return changes
+
+
+def diff_builds(old, new):
+    """{'added_forms', 'removed_forms', 'forms': {slug: changes}} for forms whose spec hash differs"""
+    report = {
+        'added_forms': sorted(set(new) - set(old)),
+        'removed_forms': sorted(set(old) - set(new)),
+        'unchanged_forms': 0,
+        'forms': {},
+    }
+    for slug in new:
+        if slug not in old:
+            continue
+        if old[slug]['hash'] == new[slug]['hash']:
+            report['unchanged_forms'] += 1
+            continue
+        changes = diff_form(old[slug], new[slug])
+        changes['meta'] = {k: [old[slug][k], new[slug][k]] for k in ('title', 'department')
+                           if old[slug][k] != new[slug][k]}
+        report['forms'][slug] = changes
+    return report
+
+
+def migration_sql(report, old, new):
+    """submission_store.py statements for the schema deltas (removed columns are kept, not dropped)"""
+    statements = []
+    for slug in report['added_forms']:
+        statements.append(f"-- new form {slug}: created by SubmissionStore on next open")
+    for slug, changes in report['forms'].items():
+        table = quote(table_name(slug))
+        old_fields, new_fields = old[slug]['fields'], new[slug]['fields']
+        for i, j in changes['_matched']:
+            a, b = old_fields[i], new_fields[j]
+            if a['column'] != b['column']:
+                statements.append(f"ALTER TABLE {table} RENAME COLUMN {quote(a['column'])} TO {quote(b['column'])};")
+            if a['kind'] != b['kind']:
+                statements.append(f"-- {slug}.{b['column']}: kind {a['kind']} -> {b['kind']} (existing values kept)")
+        for field in new_fields:
+            if field['key'] in changes['added']:
+                statements.append(f"ALTER TABLE {table} ADD COLUMN {quote(field['column'])} {SQL_TYPES[field['kind']]};")
+        for key in changes['removed']:
+            statements.append(f"-- {slug}.{key} no longer collected (column kept)")
+    return statements
+
+
+def print_report(report):
+    """Human-readable change report"""
+    for slug in report['added_forms']:
+        print(f"+ {slug} (new form)")
+    for slug in report['removed_forms']:
+        print(f"- {slug} (form removed)")
+    for slug, changes in report['forms'].items():
+        print(f"~ {slug}")
+        for key, (before, after) in changes['meta'].items():
+            print(f"    {key}: {before!r} -> {after!r}")
+        for key in changes['added']:
+            print(f"    + {key}")
+        for key in changes['removed']:
+            print(f"    - {key}")
+        for move in changes['moved']:
+            print(f"    moved {move['field']} ({move['from']} -> {move['to']})")
+        for relabel in changes['relabeled']:
+            print(f"    relabeled {relabel['from']} -> {relabel['to']}")
+        for change in changes['changed']:
+            details = ', '.join(f"{a} {v[0]!r} -> {v[1]!r}" for a, v in change['attributes'].items())
+            print(f"    changed {change['field']}: {details or 'layout only'}")
+        if not any(changes[k] for k in ('added', 'removed', 'moved', 'relabeled', 'changed', 'meta')):
+            print("    layout only")
+        if changes['renamed_widgets']:
+            print(f"    {len(changes['renamed_widgets'])} PDF widget names shift "
+                  f"(e.g. {changes['renamed_widgets'][0]['from']} -> {changes['renamed_widgets'][0]['to']})")
+    touched = len(report['forms']) + len(report['added_forms'])
+    print(f"{touched} forms to rebuild, {report['unchanged_forms']} unchanged")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff form specs between two builds")
+    parser.add_argument('old', nargs='?', default='HEAD', help="git revision or snapshot .json (default: HEAD)")
+    parser.add_argument('new', nargs='?', default='working', help="git revision, snapshot .json or 'working' (default)")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    parser.add_argument('--sql', action='store_true', help="print submission store migration statements")
+    parser.add_argument('--save', metavar='PATH', help="write the NEW build as a snapshot")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    old, new = load_build(args.old), load_build(args.new)
+    loaded = time.perf_counter()
+    report = diff_builds(old, new)
+    diffed = time.perf_counter()
+
+    if args.sql:
+        print('\n'.join(migration_sql(report, old, new)) or '-- no schema changes')
+    elif args.json:
+        for changes in report['forms'].values():
+            del changes['_matched']
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    print(f"Loaded specs in {(loaded - start) * 1000:.1f} ms, diffed {len(new)} forms in "
+          f"{(diffed - loaded) * 1000:.2f} ms", file=sys.stderr)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'version': SNAPSHOT_VERSION, 'forms': new}, f, separators=(',', ':'))
+    return 1 if report['forms'] or report['added_forms'] or report['removed_forms'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
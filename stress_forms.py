@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Wiley University - Business & Finance Website
+Synthetic form specs and a scaling stress test for the generator
+
+synthetic_spec() builds a seeded spec of a given size in one of several
+mixes: every field type together, thousands of checkboxes, huge radio
+groups, wide rows of many items, or long instructions. Rows stand in for
+deep nesting, which the generator can't express: _draw_field() draws every
+row item as a text box, so a row inside a row is not a nested layout. The
+harness renders each mix at doubling field counts and records render time
+(best of --repeat), peak memory of one render (tracemalloc), PDF bytes and
+pages, the check_layout.py issues of the laid-out widgets and the text lines
+drawn off the page. It prints the growth exponent between sizes (1.0 is linear)
+and flags a mix whose fitted exponent over the larger sizes (4x --min and
+up, where fixed per-form costs no longer dominate, at least three of them)
+is above --max-exponent. Time, memory and bytes against field count are
+drawn as log-log charts into an SVG file.
+
+Layout issues fail the run too, unless --allow-layout-issues is given. Two
+are known: a radio group taller than a page runs off it (_draw_field()
+never splits options across pages), and long instructions are not
+paginated (_draw_instructions() draws every line on page 1).
+
+    python3 stress_forms.py                          # all mixes, 50 to 1,600 fields
+    python3 stress_forms.py --mix radios --max 3200 --backend native
+    python3 stress_forms.py --json > stress.json
+    python3 stress_forms.py --mix radios --allow-layout-issues
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+from check_layout import check_form
+from generate_forms import BACKENDS, LayoutCanvas, WileyFormGenerator
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PLOT_PATH = os.path.join(BASE_DIR, '.build-cache', 'stress', 'stress.svg')
+MIXES = ('mixed', 'checkboxes', 'radios', 'rows', 'instructions')
+MIN_FIT_SIZES = 3       # sizes from 4x --min up that the fitted exponent needs
+METRICS = ('time', 'peak', 'bytes')
+WORDS = ('account', 'amount', 'approval', 'budget', 'campus', 'receipt', 'department', 'vendor', 'travel',
+         'mileage', 'invoice', 'deposit', 'student', 'employee', 'building', 'request', 'purchase', 'refund')
+
+
+def _label(rng, words=3):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, words))).title()
+
+
+def _field(rng, kind):
+    """One field spec of a type, with row items for 'row'"""
+    if kind == 'section':
+        return {'type': 'section', 'label': _label(rng, 4)}
+    if kind == 'row':
+        items = rng.randint(2, 5)
+        width = round(7 / items, 2)
+        return {'type': 'row', 'fields': [{'label': _label(rng, 2), 'width': width} for _ in range(items)]}
+    if kind == 'radio':
+        return {'type': 'radio', 'label': _label(rng), 'options': [_label(rng, 2) for _ in range(rng.randint(2, 6))]}
+    field = {'type': kind, 'label': _label(rng, 5)}
+    if kind == 'text':
+        field['width'] = rng.choice((2, 3, 4, 6))
+    elif kind == 'textarea':
+        field.update(width=6, height=rng.choice((0.6, 1, 1.5)))
+    if kind != 'signature' and rng.random() < 0.3:
+        field['required'] = True
+    return field
+
+
+def synthetic_spec(field_count, mix='mixed', seed=0):
+    """A seeded spec with about field_count fields (row items included) in a mix of MIXES"""
+    rng = random.Random(f"{mix}/{field_count}/{seed}")
+    fields = []
+    count = 0
+    instructions = "Synthetic form for scaling tests."
+    if mix == 'instructions':
+        instructions = ' '.join(rng.choice(WORDS) for _ in range(field_count * 10))
+
+    while count < field_count:
+        if len(fields) % 12 == 0:
+            fields.append(_field(rng, 'section'))
+        elif mix == 'checkboxes':
+            fields.append({'type': 'checkbox', 'label': f"{_label(rng, 4)} {count + 1}"})
+        elif mix == 'radios':
+            # One group per 100 fields, each taller than a page
+            options = min(100, field_count - count)
+            fields.append({'type': 'radio', 'label': _label(rng),
+                           'options': [f"{_label(rng, 2)} {n + 1}" for n in range(options)]})
+            count += options - 1
+        elif mix == 'rows':
+            items = rng.randint(4, 8)
+            fields.append({'type': 'row', 'fields': [{'label': f"{rng.choice(WORDS).title()} {n + 1}", 'width': 7 / items}
+                                                     for n in range(items)]})
+            count += items - 1
+        else:
+            fields.append(_field(rng, rng.choices(
+                ('text', 'textarea', 'date', 'checkbox', 'radio', 'signature', 'row'),
+                weights=(30, 5, 10, 25, 10, 5, 15))[0]))
+            count += len(fields[-1].get('fields', ())) - (1 if fields[-1]['type'] == 'row' else 0)
+        count += fields[-1]['type'] != 'section'
+
+    slug = f"synthetic-{mix}-{field_count}"
+    return {'slug': slug, 'filename': f"{slug}.pdf", 'title': f"Synthetic {mix.title()} Form ({field_count:,} fields)",
+            'department': 'Scaling Tests', 'fields': fields, 'instructions': instructions}
+
+
+def measure(spec, backend, repeat):
+    """{'time', 'peak', 'bytes', 'pages', 'widgets', 'issues', 'text_off_page'} for one spec"""
+    generator = WileyFormGenerator(deterministic=True, backend=backend)
+
+    def render():
+        return generator.render_form(spec['title'], spec['department'], spec['fields'], spec['instructions'],
+                                     slug=spec['slug'])
+
+    render()
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        data = render()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    rects = generator.widget_rects
+    pages = max((rect[0] for rect in rects), default=1)
+    issues = check_form(spec['filename'], pages, rects, generator.width, generator.height)
+    # check_layout.py only sees widgets; count text lines drawn outside the page too
+    c = LayoutCanvas()
+    generator._draw_form(c, spec['title'], spec['department'], spec['fields'], spec['instructions'])
+    text_off_page = sum(1 for method, args, _ in c._calls
+                        if method in ('drawString', 'drawRightString') and not 0 <= args[1] <= generator.height)
+
+    tracemalloc.start()
+    render()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'time': best, 'peak': peak, 'bytes': len(data), 'pages': pages, 'widgets': len(rects),
+            'issues': len(issues), 'text_off_page': text_off_page}
+
+
+def exponent(a, b, metric):
+    """Growth exponent of metric between two results (1.0 is linear in field count)"""
+    return math.log(b[metric] / a[metric]) / math.log(b['fields'] / a['fields'])
+
+
+def fitted_exponent(results, metric):
+    """Least-squares slope of log(metric) against log(fields)"""
+    xs = [math.log(r['fields']) for r in results]
+    ys = [math.log(r[metric]) for r in results]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    spread = sum((x - mean_x) ** 2 for x in xs)
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / spread if spread else 1.0
+
+
+def sizes(smallest, largest):
+    """Doubling field counts from smallest to largest"""
+    out = []
+    n = smallest
+    while n <= largest:
+        out.append(n)
+        n *= 2
+    return out
+
+
+def plot(results, path):
+    """Write log-log charts of time, memory and bytes against field count as SVG"""
+    metrics = (('time', 'render time (s)'), ('peak', 'peak memory (bytes)'), ('bytes', 'PDF size (bytes)'))
+    colors = ('#3D2C68', '#C0392B', '#1E8449', '#D68910', '#2E86C1', '#7F8C8D')
+    width, height, pad = 360, 260, 48
+    mixes = sorted({r['mix'] for r in results}, key=MIXES.index)
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width * len(metrics)}" height="{height + 40}" '
+             f'font-family="Helvetica, Arial, sans-serif" font-size="11">']
+    all_fields = [r['fields'] for r in results]
+    x_lo, x_hi = math.log10(min(all_fields)), math.log10(max(all_fields))
+    for panel, (metric, title) in enumerate(metrics):
+        left = panel * width
+        values = [r[metric] for r in results if r[metric] > 0]
+        y_lo, y_hi = math.log10(min(values)), math.log10(max(values))
+        y_hi = max(y_hi, y_lo + 1e-9)
+
+        def point(result):
+            x = left + pad + (math.log10(result['fields']) - x_lo) / max(x_hi - x_lo, 1e-9) * (width - 2 * pad)
+            y = height - pad + (pad * 2 - height) * (math.log10(result[metric]) - y_lo) / (y_hi - y_lo)
+            return f"{x:.1f},{y:.1f}"
+
+        parts.append(f'<text x="{left + width / 2}" y="16" text-anchor="middle" font-weight="bold">{title}</text>')
+        parts.append(f'<rect x="{left + pad}" y="{pad}" width="{width - 2 * pad}" height="{height - 2 * pad}" '
+                     f'fill="none" stroke="#B1B6C1"/>')
+        parts.append(f'<text x="{left + pad}" y="{height - pad + 16}">{min(all_fields):,}</text>')
+        parts.append(f'<text x="{left + width - pad}" y="{height - pad + 16}" text-anchor="end">'
+                     f'{max(all_fields):,} fields</text>')
+        parts.append(f'<text x="{left + pad - 4}" y="{pad + 4}" text-anchor="end">{10 ** y_hi:.3g}</text>')
+        parts.append(f'<text x="{left + pad - 4}" y="{height - pad}" text-anchor="end">{10 ** y_lo:.3g}</text>')
+        for color, mix in zip(colors, mixes):
+            line = [point(r) for r in results if r['mix'] == mix and r[metric] > 0]
+            parts.append(f'<polyline fill="none" stroke="{color}" stroke-width="2" points="{" ".join(line)}"/>')
+    for n, (color, mix) in enumerate(zip(colors, mixes)):
+        parts.append(f'<rect x="{pad + n * 110}" y="{height + 12}" width="12" height="12" fill="{color}"/>')
+        parts.append(f'<text x="{pad + n * 110 + 16}" y="{height + 22}">{mix}</text>')
+    parts.append('</svg>\n')
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write('\n'.join(parts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling stress test of the form generator on synthetic specs")
+    parser.add_argument('--mix', choices=MIXES, action='append', help="mix to run (repeatable; default: all)")
+    parser.add_argument('--min', type=int, default=50, help="smallest field count (default: 50)")
+    parser.add_argument('--max', type=int, default=1600, help="largest field count (default: 1600)")
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='reportlab')
+    parser.add_argument('--repeat', type=int, default=3, help="timed renders per size; the best is reported")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-exponent', type=float, default=1.25,
+                        help="flag growth faster than fields ** this between sizes (default: 1.25)")
+    parser.add_argument('--plot', default=PLOT_PATH, help="SVG output (default: .build-cache/stress/stress.svg)")
+    parser.add_argument('--allow-layout-issues', action='store_true',
+                        help="don't fail on layout issues or text off the page, only on growth")
+    parser.add_argument('--json', action='store_true', help="print the results as JSON")
+    args = parser.parse_args()
+    if len([n for n in sizes(args.min, args.max) if n >= 4 * args.min]) < MIN_FIT_SIZES:
+        parser.error(f"the fit needs {MIN_FIT_SIZES} sizes from 4x --min up: "
+                     f"use --max of at least {4 * args.min * 2 ** (MIN_FIT_SIZES - 1):,} for --min {args.min:,}")
+
+    results = []
+    flagged = []
+    broken = []
+    for mix in args.mix or MIXES:
+        previous = None
+        for n in sizes(args.min, args.max):
+            spec = synthetic_spec(n, mix, args.seed)
+            result = dict(measure(spec, args.backend, args.repeat), mix=mix, fields=n)
+            result['exponents'] = {m: exponent(previous, result, m) for m in METRICS} if previous else {}
+            results.append(result)
+            if not args.json:
+                growth = result['exponents']
+                print(f"{mix:>12} {n:>6,} fields: {result['time'] * 1000:9.1f} ms {result['peak'] / 1e6:8.1f} MB peak "
+                      f"{result['bytes'] / 1024:9.0f} KB {result['pages']:4} pages {result['issues']:5} layout issues "
+                      f"{result['text_off_page']:5} text lines off page"
+                      + (f"  growth x^{growth['time']:.2f} time, x^{growth['peak']:.2f} memory, "
+                         f"x^{growth['bytes']:.2f} bytes" if growth else ""), flush=True)
+            previous = result
+        if any(r['issues'] or r['text_off_page'] for r in results if r['mix'] == mix):
+            broken.append(mix)
+        large = [r for r in results if r['mix'] == mix and r['fields'] >= 4 * args.min]
+        if len(large) >= MIN_FIT_SIZES:
+            fitted = {m: fitted_exponent(large, m) for m in METRICS}
+            slow = [m for m, e in fitted.items() if e > args.max_exponent]
+            if slow:
+                flagged.append(mix)
+            if not args.json:
+                print(f"{mix:>12} fitted from {large[0]['fields']:,} fields: "
+                      + ', '.join(f"x^{e:.2f} {m}" for m, e in fitted.items())
+                      + (f"  NON-LINEAR: {', '.join(slow)}" if slow else ""))
+
+    plot(results, args.plot)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"Charts: {args.plot}")
+        if flagged:
+            print(f"Grew faster than fields^{args.max_exponent}: {', '.join(flagged)}")
+        if broken:
+            print(f"Layout issues or text off the page: {', '.join(broken)}"
+                  + (" (allowed)" if args.allow_layout_issues else ""))
+    return 1 if flagged or (broken and not args.allow_layout_issues) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
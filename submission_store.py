@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+"""
+Wiley University - Business & Finance Website
+Submission store
+
+A local SQLite database with one table per form from create_all_forms(),
+keyed by the form slug. Columns come from the field specs: checkboxes are
+integers, dates are ISO text (so they sort and range-filter), amounts and
+counts are numbers, everything else is text. Every table also carries the
+submission ID, submission time and a workflow status, with indexes on the
+filters department reports use (status, department, building, employee,
+student, priority). The database runs in WAL mode so several writers and
+readers can share it.
+
+    python3 submission_store.py tables
+    python3 submission_store.py query travel-reimbursement-request --where status=pending \\
+        --group-by department --sum total_reimbursement_requested
+    python3 submission_store.py import submissions.jsonl
+    python3 submission_store.py bench --rows 1000000
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sqlite3
+import statistics
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from generate_forms import input_fields, load_form_specs
+from ingest_server import SubmissionIds
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_PATH = os.path.join(BASE_DIR, 'submissions', 'store.db')
+
+SCHEMA_VERSION = 1
+
+# Columns every form table has, ahead of the spec columns
+META_COLUMNS = (
+    ('id', 'INTEGER PRIMARY KEY'),
+    ('submission_id', 'TEXT NOT NULL UNIQUE'),
+    ('submitted_at', 'TEXT NOT NULL'),
+    ('status', "TEXT NOT NULL DEFAULT 'pending'"),
+)
+STATUSES = ('pending', 'approved', 'rejected', 'paid', 'closed')
+
+# Spec columns indexed as (column, submitted_at) for drill-downs and as
+# (status, column) so "pending ... by column" reports read only the index
+FILTER_COLUMNS = frozenset((
+    'department', 'building', 'building_name', 'employee_id', 'student_id', 'priority', 'form_status',
+))
+
+# Kind of a text field, inferred from its label
+DATE_LABEL = re.compile(r'(^|\s)date\b|^expiration\b', re.IGNORECASE)
+REAL_LABEL = re.compile(r'\b(amount|total|balance|income|agi|gpa|airfare|lodging|meals|tolls|mileage)\b', re.IGNORECASE)
+INTEGER_LABEL = re.compile(r'^number (of|in)\b|\b(attendance|passengers)\b|\bneeded$', re.IGNORECASE)
+
+SQL_TYPES = {'text': 'TEXT', 'date': 'TEXT', 'real': 'REAL', 'integer': 'INTEGER', 'boolean': 'INTEGER'}
+TRUE_VALUES = frozenset(('1', 'on', 'yes', 'true', 'x', 'checked'))
+DATE_FORMATS = ('%m/%d/%Y', '%m/%d/%y', '%Y-%m-%d')
+
+
+def table_name(slug):
+    """'work-order-request' -> 'work_order_request'"""
+    return slug.replace('-', '_')
+
+
+def quote(identifier):
+    """SQLite identifier quoting"""
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def column_kind(field):
+    """Storage kind for one input field"""
+    if field['type'] == 'checkbox':
+        return 'boolean'
+    if field['type'] == 'date' or DATE_LABEL.search(field['label']):
+        return 'date'
+    if field['type'] == 'text':
+        if REAL_LABEL.search(field['label']):
+            return 'real'
+        if INTEGER_LABEL.search(field['label']):
+            return 'integer'
+    return 'text'
+
+
+def form_columns(spec):
+    """[(column, kind, field)] for one form spec; spec keys that clash with meta columns get a form_ prefix"""
+    reserved = {name for name, _ in META_COLUMNS} | {'extra'}
+    columns = []
+    for field in input_fields(spec['fields']):
+        key = field['key']
+        if key in reserved:
+            key = f"form_{key}"
+        columns.append((key, column_kind(field), field))
+    return columns
+
+
+def coerce(kind, value):
+    """Submitted value -> stored value; anything that doesn't parse is kept as text"""
+    if isinstance(value, (list, tuple)):
+        value = ', '.join(map(str, value))
+    if kind == 'boolean':
+        if isinstance(value, bool):
+            return int(value)
+        return int(str(value or '').strip().lower() in TRUE_VALUES)
+    if value is None:
+        return None
+    text = str(value).strip()
+    if not text:
+        return None
+    if kind == 'date':
+        for fmt in DATE_FORMATS:
+            try:
+                return datetime.strptime(text, fmt).date().isoformat()
+            except ValueError:
+                pass
+    elif kind in ('real', 'integer'):
+        number = text.replace('$', '').replace(',', '')
+        try:
+            return int(number) if kind == 'integer' else float(number)
+        except ValueError:
+            pass
+    return text
+
+
+class FormTable:
+    """Column layout and field-name lookup for one form"""
+
+    def __init__(self, spec):
+        self.slug = spec['slug']
+        self.table = table_name(self.slug)
+        self.columns = form_columns(spec)
+        self.kinds = {column: kind for column, kind, _ in self.columns}
+        # Submissions may name a value by column, spec label or PDF field name
+        self.lookup = {}
+        for column, _, field in self.columns:
+            for alias in (field['name'], field['label'], field['key'], column):
+                if alias:
+                    self.lookup.setdefault(alias, column)
+
+    def ddl(self):
+        """CREATE TABLE and CREATE INDEX statements"""
+        definitions = [f"{name} {sql}" for name, sql in META_COLUMNS]
+        definitions += [f"{quote(column)} {SQL_TYPES[kind]}" for column, kind, _ in self.columns]
+        definitions.append('extra TEXT')
+        statements = [f"CREATE TABLE IF NOT EXISTS {quote(self.table)} (\n    " + ',\n    '.join(definitions) + '\n)']
+        statements += [f"CREATE INDEX IF NOT EXISTS {quote(index)} ON {quote(self.table)} ({columns})"
+                       for index, columns in self.indexes()]
+        return statements
+
+    def indexes(self):
+        """[(index name, column list)]"""
+        indexes = [(f"{self.table}__status", 'status, submitted_at'),
+                   (f"{self.table}__submitted_at", 'submitted_at')]
+        for column, _, _ in self.columns:
+            if column in FILTER_COLUMNS:
+                indexes.append((f"{self.table}__{column}", f"{quote(column)}, submitted_at"))
+                indexes.append((f"{self.table}__status_{column}", f"status, {quote(column)}"))
+        return indexes
+
+    def row(self, fields):
+        """Spec column values plus a JSON blob of any names the spec doesn't know"""
+        values = dict.fromkeys(self.kinds)
+        extra = {}
+        for name, value in fields.items():
+            column = self.lookup.get(name)
+            if column is None:
+                extra[name] = value
+            else:
+                values[column] = value
+        return ([coerce(self.kinds[column], value) for column, value in values.items()],
+                json.dumps(extra, separators=(',', ':')) if extra else None)
+
+
+class SubmissionStore:
+    """SQLite store with one typed table per form"""
+
+    def __init__(self, path=STORE_PATH, specs=None):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.forms = {spec['slug']: FormTable(spec) for spec in (specs or load_form_specs())}
+        self.ids = SubmissionIds()
+        self._migrate()
+
+    def _migrate(self):
+        """Create missing tables and indexes; add columns for fields added to a spec"""
+        with self.conn:
+            for form in self.forms.values():
+                existing = {row[1] for row in self.conn.execute(f"PRAGMA table_info({quote(form.table)})")}
+                for column, kind, _ in form.columns if existing else ():
+                    if column not in existing:
+                        self.conn.execute(f"ALTER TABLE {quote(form.table)} ADD COLUMN {quote(column)} {SQL_TYPES[kind]}")
+                for statement in form.ddl():
+                    self.conn.execute(statement)
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def form(self, slug):
+        try:
+            return self.forms[slug]
+        except KeyError:
+            raise KeyError(f"Unknown form {slug!r}") from None
+
+    def insert_many(self, slug, submissions):
+        """Insert Apps Script style submissions ({fields, submissionId?, timestamp?, status?}) in one transaction
+
+        Returns the number of rows written; a repeated submission ID replaces the earlier row.
+        """
+        form = self.form(slug)
+        now = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        rows = []
+        for submission in submissions:
+            values, extra = form.row(submission.get('fields', {}))
+            submission_id = submission.get('submissionId') or self.ids.next(slug)
+            rows.append([submission_id, submission.get('timestamp') or now,
+                         submission.get('status') or 'pending'] + values + [extra])
+        columns = ['submission_id', 'submitted_at', 'status'] + [c for c, _, _ in form.columns] + ['extra']
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO {quote(form.table)} ({', '.join(map(quote, columns))}) "
+                f"VALUES ({', '.join('?' * len(columns))})",
+                rows,
+            )
+        return len(rows)
+
+    def set_status(self, slug, submission_id, status):
+        """Move a submission through the workflow"""
+        with self.conn:
+            return self.conn.execute(f"UPDATE {quote(self.form(slug).table)} SET status = ? WHERE submission_id = ?",
+                                     (status, submission_id)).rowcount
+
+    def counts(self):
+        """{slug: row count}"""
+        return {slug: self.conn.execute(f"SELECT COUNT(*) FROM {quote(form.table)}").fetchone()[0]
+                for slug, form in self.forms.items()}
+
+    def query(self, slug, where=None, since=None, until=None, group_by=None, total=None, limit=100, indexed=True):
+        """Filter (equality on columns, submitted_at range) and optionally group; return (header, rows)"""
+        form = self.form(slug)
+        known = {name for name, _ in META_COLUMNS} | set(form.kinds)
+        for column in list(where or {}) + [c for c in (group_by, total) if c]:
+            if column not in known:
+                raise KeyError(f"{slug} has no column {column!r}")
+
+        conditions, params = [], []
+        for column, value in (where or {}).items():
+            conditions.append(f"{quote(column)} = ?")
+            params.append(coerce(form.kinds.get(column, 'text'), value))
+        if since:
+            conditions.append('submitted_at >= ?')
+            params.append(since)
+        if until:
+            conditions.append('submitted_at < ?')
+            params.append(until)
+
+        if group_by:
+            header = [group_by, 'count'] + ([f"sum({total})"] if total else [])
+            select = f"{quote(group_by)}, COUNT(*)" + (f", ROUND(SUM({quote(total)}), 2)" if total else '')
+        else:
+            header = ['submission_id', 'submitted_at', 'status'] + [c for c, _, _ in form.columns]
+            select = ', '.join(map(quote, header))
+        sql = f"SELECT {select} FROM {quote(form.table)}{'' if indexed else ' NOT INDEXED'}"
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        if group_by:
+            sql += f" GROUP BY {quote(group_by)} ORDER BY COUNT(*) DESC"
+        else:
+            sql += ' ORDER BY submitted_at DESC'
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return header, self.conn.execute(sql, params).fetchall()
+
+    def close(self):
+        self.conn.close()
+
+
+def print_table(header, rows):
+    """Print query results as aligned columns"""
+    cells = [[str(h) for h in header]] + [['' if v is None else str(v) for v in row] for row in rows]
+    widths = [min(max(len(r[i]) for r in cells), 40) for i in range(len(header))]
+    for n, row in enumerate(cells):
+        print('  '.join(value[:40].ljust(width) for value, width in zip(row, widths)).rstrip())
+        if n == 0:
+            print('  '.join('-' * width for width in widths))
+    print(f"({len(rows)} rows)")
+
+
+# ---- Benchmark -------------------------------------------------------------
+
+BENCH_DEPARTMENTS = ('Business Office', 'Financial Aid', 'Athletics', 'Student Affairs', 'Library',
+                     'Information Technology', 'Facilities', 'Admissions', 'Registrar', 'Nursing',
+                     'Education', 'Business Administration')
+BENCH_BUILDINGS = ('Thirkield Hall', 'Carnegie Library', 'Johnson Hall', 'Wiley Chapel', 'Ruth Rankin Hall',
+                   'Student Union', 'Fine Arts Center', 'Science Hall')
+
+# Share of rows per form; the rest are spread over the other forms
+BENCH_WEIGHTS = {'travel-reimbursement-request': 0.3, 'work-order-request': 0.3}
+
+
+def synthetic_fields(form, rng, start, days=730):
+    """Random but plausible values for every column of a form"""
+    fields = {}
+    for column, kind, field in form.columns:
+        if kind == 'boolean':
+            fields[column] = rng.random() < 0.5
+        elif kind == 'date':
+            fields[column] = (start + timedelta(days=rng.randrange(days))).strftime('%m/%d/%Y')
+        elif kind == 'real':
+            fields[column] = f"{rng.uniform(5, 2500):.2f}"
+        elif kind == 'integer':
+            fields[column] = str(rng.randint(1, 200))
+        elif field['options']:
+            fields[column] = rng.choice(field['options'])
+        elif 'department' in column:
+            fields[column] = rng.choice(BENCH_DEPARTMENTS)
+        elif 'building' in column:
+            fields[column] = rng.choice(BENCH_BUILDINGS)
+        elif field['type'] == 'textarea':
+            fields[column] = ' '.join(rng.choice(('repair', 'request', 'needed', 'office', 'urgent', 'student'))
+                                      for _ in range(rng.randint(5, 30)))
+        else:
+            fields[column] = f"{field['label'][:12]} {rng.randint(1, 99999)}"
+    return fields
+
+
+def time_query(store, repeat=5, **kwargs):
+    """Median seconds for a query, and its rows"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _, rows = store.query(**kwargs)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), rows
+
+
+def benchmark(rows, path, batch=10000, seed=0):
+    """Load `rows` synthetic submissions, then time report queries with and without indexes"""
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    store = SubmissionStore(path)
+    rng = random.Random(seed)
+    slugs = list(store.forms)
+    rest = (1 - sum(BENCH_WEIGHTS.values())) / (len(slugs) - len(BENCH_WEIGHTS))
+    weights = [BENCH_WEIGHTS.get(slug, rest) for slug in slugs]
+    epoch = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    start = time.perf_counter()
+    written = 0
+    while written < rows:
+        size = min(batch, rows - written)
+        for slug, count in sorted(Counter(rng.choices(slugs, weights, k=size)).items()):
+            form = store.forms[slug]
+            submissions = []
+            for _ in range(count):
+                written += 1
+                submitted = epoch + timedelta(seconds=rng.randrange(730 * 86400))
+                submissions.append({
+                    'submissionId': f"WU-{slug[:3].upper()}-{written:09d}",
+                    'timestamp': submitted.isoformat(timespec='seconds'),
+                    'status': 'pending' if rng.random() < 0.1 else rng.choice(STATUSES[1:]),
+                    'fields': synthetic_fields(form, rng, epoch.date()),
+                })
+            store.insert_many(slug, submissions)
+    elapsed = time.perf_counter() - start
+    store.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    size = os.path.getsize(path)
+    print(f"Loaded {rows:,} submissions in {elapsed:.1f} s ({rows / elapsed:,.0f} rows/s), "
+          f"{size / 1e6:,.1f} MB on disk")
+    store.conn.execute('ANALYZE')
+
+    reports = (
+        ('Pending travel reimbursements by department',
+         dict(slug='travel-reimbursement-request', where={'status': 'pending'}, group_by='department',
+              total='total_reimbursement_requested', limit=None)),
+        ('Pending work orders by building',
+         dict(slug='work-order-request', where={'status': 'pending'}, group_by='building', limit=None)),
+        ('Latest 50 work orders for one building',
+         dict(slug='work-order-request', where={'building': BENCH_BUILDINGS[0]}, limit=50)),
+        ('Work orders submitted in the last 7 days',
+         dict(slug='work-order-request', since=(epoch + timedelta(days=723)).isoformat(timespec='seconds'), limit=None)),
+    )
+    print(f"\n{'report':<46} {'rows':>7} {'indexed':>10} {'full scan':>10} {'speedup':>8}")
+    for label, kwargs in reports:
+        indexed, result = time_query(store, **kwargs)
+        scanned, _ = time_query(store, indexed=False, **kwargs)
+        print(f"{label:<46} {len(result):>7,} {indexed * 1000:>8.2f}ms {scanned * 1000:>8.1f}ms {scanned / indexed:>7.1f}x")
+    store.close()
+
+
+def import_jsonl(store, path):
+    """Import Apps Script style {formType, fields, submissionId?} lines
+
+    Returns ({slug: rows}, [(line number, problem)]). Lines that aren't a
+    JSON object, lack a string formType or fields object, or name a form
+    the store doesn't have are skipped and reported; the rest are imported.
+    """
+    by_form = {}
+    skipped = []
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                submission = json.loads(line)
+            except ValueError as error:
+                skipped.append((line_number, f"not valid JSON: {error}"))
+                continue
+            if not isinstance(submission, dict):
+                skipped.append((line_number, f"not a JSON object: got {type(submission).__name__}"))
+                continue
+            form_type = submission.get('formType')
+            if not isinstance(form_type, str):
+                skipped.append((line_number, "formType missing or not a string"))
+            elif form_type not in store.forms:
+                skipped.append((line_number, f"unknown form type {form_type!r} (not in create_all_forms())"))
+            elif not isinstance(submission.get('fields', {}), dict):
+                skipped.append((line_number, "fields must be an object"))
+            else:
+                by_form.setdefault(form_type, []).append(submission)
+    return {slug: store.insert_many(slug, submissions) for slug, submissions in by_form.items()}, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local SQLite store for form submissions")
+    parser.add_argument('--db', default=STORE_PATH, help="database file (default: submissions/store.db)")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sub.add_parser('tables', help="list forms and row counts")
+    schema = sub.add_parser('schema', help="print the table definition for a form")
+    schema.add_argument('slug')
+
+    query = sub.add_parser('query', help="filter and group a form's submissions")
+    query.add_argument('slug')
+    query.add_argument('--where', action='append', default=[], metavar='COLUMN=VALUE')
+    query.add_argument('--since', help="submitted at or after (ISO date/time)")
+    query.add_argument('--until', help="submitted before (ISO date/time)")
+    query.add_argument('--group-by', help="count rows per value of this column")
+    query.add_argument('--sum', dest='total', help="with --group-by, also total this column")
+    query.add_argument('--limit', type=int, default=100)
+
+    load = sub.add_parser('import', help="import a JSONL file of {formType, fields} submissions")
+    load.add_argument('path')
+
+    bench = sub.add_parser('bench', help="load synthetic submissions and time report queries")
+    bench.add_argument('--rows', type=int, default=1_000_000)
+    bench.add_argument('--db', dest='bench_db', default=os.path.join(BASE_DIR, 'submissions', 'bench.db'))
+
+    args = parser.parse_args()
+    if args.command == 'bench':
+        benchmark(args.rows, args.bench_db)
+        return
+
+    store = SubmissionStore(args.db)
+    try:
+        if args.command == 'tables':
+            for slug, count in store.counts().items():
+                print(f"{slug:<34} {count:>9,}")
+        elif args.command == 'schema':
+            print(';\n'.join(store.form(args.slug).ddl()) + ';')
+        elif args.command == 'query':
+            where = dict(item.split('=', 1) for item in args.where)
+            print_table(*store.query(args.slug, where, args.since, args.until, args.group_by, args.total,
+                                     None if args.group_by else args.limit))
+        else:
+            imported, skipped = import_jsonl(store, args.path)
+            for slug, count in imported.items():
+                print(f"Imported {count:,} submissions into {slug}")
+            for line_number, problem in skipped:
+                print(f"{os.path.basename(args.path)}:{line_number} skipped: {problem}", file=sys.stderr)
+            if skipped:
+                sys.exit(f"Skipped {len(skipped):,} lines")
+    except KeyError as error:
+        sys.exit(error.args[0])
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
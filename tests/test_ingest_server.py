@@ -0,0 +1,53 @@
+"""ingest_server.py accepts every form the site posts"""
+
+import http.client
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from ingest_server import make_server
+
+
+class OnlineFormPostTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.server = make_server('127.0.0.1', 0, directory=self.tmp.name)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.server.writer.close()
+        self.tmp.cleanup()
+
+    def post(self, payload):
+        conn = http.client.HTTPConnection(*self.server.server_address, timeout=10)
+        try:
+            conn.request('POST', '/', json.dumps(payload), {'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            return response.status, json.loads(response.read())
+        finally:
+            conn.close()
+
+    def test_online_only_form_is_stored(self):
+        # online-forms/information-technology/it-support-request.html has no PDF spec
+        status, body = self.post({'formType': 'it-support-request',
+                                  'fields': {'Name': 'Jane Doe', 'Issue': 'Printer offline'}})
+        self.assertEqual(status, 200, body)
+        self.assertTrue(body['submissionId'].startswith('WU-IT--'))
+        with sqlite3.connect(os.path.join(self.tmp.name, 'submissions.db')) as db:
+            rows = db.execute('SELECT "Name", "Issue" FROM "it-support-request"').fetchall()
+        self.assertEqual(rows, [('Jane Doe', 'Printer offline')])
+
+    def test_unknown_form_is_rejected(self):
+        status, body = self.post({'formType': 'no-such-form', 'fields': {'Name': 'Jane Doe'}})
+        self.assertEqual(status, 400)
+        self.assertIn('Unknown form type', body['message'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+"""validate_submissions.py accepts what the online forms actually post"""
+
+import unittest
+
+from validate_submissions import Validator, online_form_pages
+
+# A direct-deposit-authorization.html submission, with the page's own field names
+DIRECT_DEPOSIT_POST = {
+    'First Name': 'Jane',
+    'Last Name': 'Doe',
+    'Employee ID': 'E104233',
+    'Department': 'Business Office',
+    'Email': 'jane.doe@wileyc.edu',
+    'Phone': '(903) 927-3300',
+    'Action Type': 'New Enrollment',
+    'Bank Name': 'First National Bank',
+    'Account Type': 'Checking',
+    'Routing Number': '021000021',
+    'Account Number': '000123456789',
+    'Confirm Account Number': '000123456789',
+    'Authorize Deposit': 'Yes',
+    'Authorize Corrections': 'Yes',
+    'Certify Accuracy': 'Yes',
+    'Electronic Signature': 'Jane Doe',
+    'Signature Date': '2026-10-19',
+}
+
+
+class OnlineFormTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.validator = Validator()
+        cls.pages = online_form_pages()
+
+    def test_direct_deposit_post_is_valid(self):
+        self.assertEqual(self.validator.validate('direct-deposit-authorization', DIRECT_DEPOSIT_POST), [])
+
+    def test_missing_page_field_is_required(self):
+        fields = dict(DIRECT_DEPOSIT_POST, Email='')
+        errors = self.validator.validate('direct-deposit-authorization', fields)
+        self.assertEqual([(e['field'], e['code']) for e in errors], [('email_address', 'required')])
+
+    def test_bad_routing_number_under_page_name(self):
+        fields = dict(DIRECT_DEPOSIT_POST, **{'Routing Number': '021000022'})
+        errors = self.validator.validate('direct-deposit-authorization', fields)
+        self.assertEqual([e['code'] for e in errors], ['routing_checksum'])
+
+    def test_every_page_covers_its_required_fields(self):
+        for form_type, page in self.pages.items():
+            if form_type not in self.validator.forms:
+                continue
+            fields = {name: options[0] if options else 'Yes' for name, (_, options) in page.items()}
+            errors = self.validator.validate(form_type, fields)
+            with self.subTest(form_type=form_type):
+                self.assertEqual([e['label'] for e in errors if e['code'] in ('required', 'unchecked')], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+"""
+Wiley University - Business & Finance Website
+Server-side submission validation
+
+Compiles every form spec from create_all_forms() into a flat rule set once
+(required fields, MM/DD/YYYY or YYYY-MM-DD dates, digit counts such as the 9-digit routing
+number with its ABA checksum, radio options, email/phone format matching
+online-forms/js/form-handler.js, numeric amounts) and checks submissions
+against it. Errors are returned as dicts with the field key, label, an
+error code and a message, so callers can map them back onto a form.
+
+Field names are matched without case, punctuation or the required '*', by
+spec key, label or PDF field name and by the names the form's
+online-forms/ page posts ("Email" for "Email Address"), through the page's
+labels or HTML_ALIASES. Radio options accept the page's own choices, and a
+required field the page doesn't ask for is not enforced.
+
+    from validate_submissions import validate_submission
+    errors = validate_submission('direct-deposit-authorization', {'Routing Number (9 digits)': '12345'})
+
+    python3 validate_submissions.py submissions.jsonl [--json] [--workers 4]
+"""
+
+import argparse
+import glob
+import html
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+from generate_forms import input_fields, load_form_specs
+from submission_store import TRUE_VALUES, column_kind
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ONLINE_FORMS_DIR = os.path.join(BASE_DIR, 'online-forms')
+
+DATE_PATTERN = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})')
+ISO_DATE_PATTERN = re.compile(r'(\d{4})-(\d{2})-(\d{2})')   # what <input type="date"> posts
+DIGITS_LABEL = re.compile(r'\((?:last )?(\d+) digits\)', re.IGNORECASE)
+EMAIL_PATTERN = re.compile(r'[^\s@]+@[^\s@]+\.[^\s@]+')        # validateEmail() in form-handler.js
+PHONE_PATTERN = re.compile(r'[\d\s\-().]+')                      # validatePhone() in form-handler.js
+NUMBER_PATTERN = re.compile(r'-?\$?\s*(\d{1,3}(,\d{3})+|\d+)(\.\d+)?')
+NON_DIGITS = re.compile(r'\D')
+NON_WORD = re.compile(r'[\W_]+')
+PARENTHETICAL = re.compile(r'\([^)]*\)')
+
+# online-forms/*/*.html markup
+FORM_NAME_PATTERN = re.compile(r'<form\b[^>]*\bname\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+CONTROL_PATTERN = re.compile(r'<(?:input|select|textarea)\b[^>]*>', re.IGNORECASE)
+LABEL_PATTERN = re.compile(r'<label\b([^>]*)>(.*?)</label>', re.IGNORECASE | re.DOTALL)
+SELECT_PATTERN = re.compile(r'(<select\b[^>]*>)(.*?)</select>', re.IGNORECASE | re.DOTALL)
+OPTION_PATTERN = re.compile(r'<option\b[^>]*>', re.IGNORECASE)
+ATTR_PATTERN = re.compile(r'''\b([\w-]+)\s*=\s*(["'])(.*?)\2''', re.DOTALL)
+TAG_PATTERN = re.compile(r'<[^>]+>')
+BUTTON_TYPES = ('hidden', 'submit', 'button', 'reset')
+
+# Online form field names whose page label doesn't match the spec label either
+HTML_ALIASES = {
+    '1098t-consent-form': {'Consent Electronic': 'I certify this is my valid email address and I consent to electronic delivery'},
+    'account-access-request': {'Access Level': 'Specific Access/Permissions Needed',
+                               'Justification': 'Business Reason for Access'},
+    'annual-fleet-inventory-report': {'Certify Accurate': 'I certify this inventory is accurate and complete'},
+    'citation-appeal-form': {'Appeal Reason': 'Detailed Explanation'},
+    'dependency-override-appeal': {'Reason': 'Detailed Explanation of Circumstances'},
+    'driver-authorization-application': {'Certify Accurate': 'I certify all information provided is true and accurate'},
+    'driver-authorization-form': {'License Number': "Driver's License Number",
+                                  'Authorize MVR': 'I authorize Wiley University to obtain my driving record'},
+    'equipment-checkout-request': {'Checkout Date': 'Pickup Date', 'Purpose': 'Purpose/Event'},
+    'expense-report': {'Description': 'Business Purpose', 'Amount': 'TOTAL EXPENSES'},
+    'incident-accident-report': {'Location': 'Location (Building/Room/Area)', 'Description': 'Description of Incident'},
+    'insurance-certificate-request': {'Holder Name': 'Organization/Company Name', 'Holder Address': 'Address',
+                                      'Purpose': 'Purpose/Event Name'},
+    'key-request-form': {'Justification': 'Justification for Access'},
+    'liability-waiver': {'Event Name': 'Event/Activity Name', 'Name': 'Participant Name (Print)'},
+    'meal-plan-change-request': {'Reason': 'Please explain why you are requesting this change'},
+    'moving-request-form': {'From Building': 'Current Location (Building/Room)',
+                            'To Building': 'New Location (Building/Room)', 'Preferred Date': 'Requested Move Date'},
+    'petty-cash-request': {'Account Code': 'Budget Code', 'Purpose': 'Purpose/Description'},
+    'sap-appeal-form': {'Explanation': 'Explain the circumstances that led to your academic difficulty',
+                        'Plan': 'What has changed that will allow you to succeed?'},
+    'scholarship-application': {'GPA': 'Current GPA',
+                                'Statement': 'Describe your academic goals and why you deserve this scholarship',
+                                'Certify': 'I certify all information is accurate'},
+    'special-circumstances-form': {'Explanation': 'Describe your special circumstances in detail'},
+    'third-party-billing': {'Sponsor Name': 'Company/Organization Name', 'Sponsor Address': 'Address'},
+    'tuition-appeal-form': {'Reason': 'Explanation of Appeal'},
+    'vehicle-accident-report': {'Accident Description': 'Describe how accident occurred'},
+    'vehicle-reservation-request': {'Name': 'Primary Driver Name'},
+    'vendor-application': {'Products/Services': 'Description of Products/Services'},
+    'vendor-payment-request': {'Amount': 'Amount to Pay', 'Account Code': 'Budget Code'},
+    'verification-worksheet': {'Email': 'Email Address', 'Household Size': 'Number in Household',
+                               'In College': 'Number in College (at least half-time)'},
+    'w9-request-form': {'Legal Name': 'Name (as shown on tax return)'},
+}
+
+CHUNK_SIZE = 2000
+
+
+def normalize(name):
+    """Field name or label for matching: casefolded, without punctuation or the required '*'"""
+    return ' '.join(NON_WORD.sub(' ', str(name).casefold()).split())
+
+
+def _attrs(tag):
+    return {name.lower(): html.unescape(value) for name, _, value in ATTR_PATTERN.findall(tag)}
+
+
+def _text(markup):
+    return html.unescape(TAG_PATTERN.sub(' ', markup))
+
+
+def online_form_pages(directory=ONLINE_FORMS_DIR):
+    """{formType: {field name: (label text, options)}} for the online-forms/*/*.html pages
+
+    The label is the <label for=...> of a control, or the text around a
+    lone checkbox; radio buttons and checkbox groups keep '' (their label
+    text is one option). Options are the values of a radio group or <select>.
+    """
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(directory, '*', '*.html'))):
+        with open(path, encoding='utf-8') as f:
+            page = f.read()
+        form = FORM_NAME_PATTERN.search(page)
+        if not form:
+            continue
+        labels, options, ids, checkboxes = {}, {}, {}, {}
+        for tag in CONTROL_PATTERN.findall(page):
+            attrs = _attrs(tag)
+            kind = attrs.get('type', '').lower()
+            if attrs.get('name') and kind not in BUTTON_TYPES:
+                labels.setdefault(attrs['name'], '')
+                options.setdefault(attrs['name'], [])
+                if attrs.get('id'):
+                    ids[attrs['id']] = attrs['name']
+                if kind == 'radio' and attrs.get('value'):
+                    options[attrs['name']].append(attrs['value'])
+                elif kind == 'checkbox':
+                    checkboxes[attrs['name']] = checkboxes.get(attrs['name'], 0) + 1
+        for select, body in SELECT_PATTERN.findall(page):
+            name = _attrs(select).get('name')
+            if name in options:
+                options[name].extend(value for value in (_attrs(tag).get('value') for tag in OPTION_PATTERN.findall(body))
+                                     if value)
+        for label_attrs, body in LABEL_PATTERN.findall(page):
+            target = ids.get(_attrs(label_attrs).get('for'))
+            if target is None:
+                control = CONTROL_PATTERN.search(body)
+                attrs = _attrs(control.group(0)) if control else {}
+                lone = attrs.get('type', '').lower() == 'checkbox' and checkboxes.get(attrs.get('name')) == 1
+                target = attrs['name'] if lone else None
+            if target in labels and not labels[target]:
+                labels[target] = ' '.join(_text(CONTROL_PATTERN.sub('', body)).split())
+        pages[form.group(1)] = {name: (labels[name], tuple(options[name])) for name in labels}
+    return pages
+
+
+def _present(value):
+    if isinstance(value, (list, tuple)):
+        return any(_present(v) for v in value)
+    return value is not None and value is not False and str(value).strip() != ''
+
+
+def _check_date(value):
+    match = DATE_PATTERN.fullmatch(value)
+    if match:
+        month, day, year = map(int, match.groups())
+    else:
+        match = ISO_DATE_PATTERN.fullmatch(value)
+        if not match:
+            return False
+        year, month, day = map(int, match.groups())
+    try:
+        date(year, month, day)
+    except ValueError:
+        return False
+    return True
+
+
+def _routing_checksum(value):
+    digits = [int(d) for d in value]
+    return sum(w * d for w, d in zip((3, 7, 1) * 3, digits)) % 10 == 0
+
+
+def _check_phone(value):
+    return bool(PHONE_PATTERN.fullmatch(value)) and len(NON_DIGITS.sub('', value)) >= 10
+
+
+def _option_check(options, page_options=()):
+    """('option', test, message) accepting options and the online page's own values
+
+    Online forms post the option text, sometimes without its "($50/year)"
+    note, and some pages offer choices the PDF doesn't.
+    """
+    allowed = frozenset(normalize(text) for option in options for text in (option, PARENTHETICAL.sub('', option)))
+    allowed |= frozenset(normalize(value) for value in page_options)
+    return ('option', lambda value: normalize(value) in allowed, f"must be one of: {', '.join(options)}")
+
+
+def compile_rules(spec):
+    """[(key, label, required, required_code, checks)] where checks is [(code, test, message)]"""
+    rules = []
+    for field in input_fields(spec['fields']):
+        label = field['label']
+        lower = label.lower()
+        checks = []
+        kind = column_kind(field)
+        if field['type'] == 'radio' and field['options']:
+            checks.append(_option_check(field['options']))
+        elif kind == 'date':
+            checks.append(('date_format', _check_date, "must be a valid date (MM/DD/YYYY or YYYY-MM-DD)"))
+        elif kind in ('real', 'integer'):
+            checks.append(('number', NUMBER_PATTERN.fullmatch, "must be a number"))
+        elif field['type'] == 'text':
+            digits = DIGITS_LABEL.search(label)
+            if digits:
+                count = int(digits.group(1))
+                checks.append(('digits', re.compile(r'\d{%d}' % count).fullmatch, f"must be exactly {count} digits"))
+                if 'routing number' in lower:
+                    checks.append(('routing_checksum', _routing_checksum, "is not a valid ABA routing number"))
+            elif 'email' in lower:
+                checks.append(('email', EMAIL_PATTERN.fullmatch, "must be a valid email address"))
+            elif 'phone' in lower and 'name' not in lower:
+                checks.append(('phone', _check_phone, "must be a phone number with at least 10 digits"))
+        required_code = 'unchecked' if field['type'] == 'checkbox' else 'required'
+        rules.append((field['key'], label, field['required'], required_code, checks,
+                      (field['name'], label, field['key'])))
+    return rules
+
+
+def _page_checks(checks, options, page_options):
+    """Checks for a field the online page asks for (page options join the spec's; a text box drops the option check)"""
+    if not page_options:
+        return [check for check in checks if check[0] != 'option']
+    return [_option_check(options, page_options) if check[0] == 'option' else check for check in checks]
+
+
+def page_lookup(slug, page, lookup):
+    """{normalized online form field name: field key} for one online-forms page
+
+    A page name matches by itself, through HTML_ALIASES, or through its page
+    label when no other page field has that label.
+    """
+    aliases = HTML_ALIASES.get(slug, {})
+    mapped = {}
+    for name in page:
+        key = lookup.get(normalize(aliases[name])) if name in aliases else lookup.get(normalize(name))
+        if key is not None:
+            mapped[normalize(name)] = key
+    labels = [normalize(label) for label, _ in page.values() if label]
+    claimed = set(mapped.values())
+    for name, (label, _) in page.items():
+        key = lookup.get(normalize(label)) if label and labels.count(normalize(label)) == 1 else None
+        if normalize(name) not in mapped and key is not None and key not in claimed:
+            mapped[normalize(name)] = key
+            claimed.add(key)
+    return mapped
+
+
+class Validator:
+    """Precompiled rule sets for every form, keyed by slug
+
+    Field names are matched after normalize(), by spec key, label or PDF
+    field name, and by the names the online-forms page for the form posts.
+    A required field that the page doesn't ask for is not enforced, since
+    a submission from the site can't include it.
+    """
+
+    def __init__(self, specs=None, pages=None):
+        if pages is None:
+            pages = online_form_pages()
+        self.forms = {}
+        for spec in specs or load_form_specs():
+            rules = compile_rules(spec)
+            lookup = {}
+            for key, _, _, _, _, aliases in rules:
+                for alias in aliases:
+                    if alias:
+                        lookup.setdefault(normalize(alias), key)
+            rules = [rule[:5] for rule in rules]
+            page = pages.get(spec['slug'])
+            if page is not None:
+                mapped = page_lookup(spec['slug'], page, lookup)
+                lookup.update(mapped)
+                page_options = {}
+                for name, (_, options) in page.items():
+                    page_options.setdefault(mapped.get(normalize(name)), []).extend(options)
+                spec_options = {field['key']: field['options'] for field in input_fields(spec['fields'])}
+                rules = [(key, label, required and key in page_options, code,
+                          _page_checks(checks, spec_options[key], page_options[key]) if key in page_options else checks)
+                         for key, label, required, code, checks in rules]
+            self.forms[spec['slug']] = (rules, lookup)
+
+    def validate(self, form_type, fields):
+        """Error dicts for one submission ([] when valid)"""
+        if not isinstance(form_type, str):
+            return [{'field': None, 'label': None, 'code': 'malformed', 'message': "formType must be a string"}]
+        form = self.forms.get(form_type)
+        if form is None:
+            return [{'field': None, 'label': None, 'code': 'unknown_form', 'message': f"Unknown form type {form_type!r}"}]
+        if not isinstance(fields, dict):
+            return [{'field': None, 'label': None, 'code': 'malformed', 'message': "fields must be an object"}]
+        rules, lookup = form
+        values = {}
+        for name, value in fields.items():
+            key = lookup.get(normalize(name))
+            if key is not None:
+                values[key] = value
+
+        errors = []
+        for key, label, required, required_code, checks in rules:
+            value = values.get(key)
+            if required_code == 'unchecked':
+                present = str(value).strip().lower() in TRUE_VALUES if not isinstance(value, bool) else value
+            else:
+                present = _present(value)
+            if not present:
+                if required:
+                    errors.append({'field': key, 'label': label, 'code': required_code,
+                                   'message': f"{label} is required"})
+                continue
+            if isinstance(value, (list, tuple)):
+                value = ', '.join(map(str, value))
+            text = str(value).strip()
+            for code, test, message in checks:
+                if not test(text):
+                    errors.append({'field': key, 'label': label, 'code': code, 'message': f"{label} {message}"})
+                    break
+        return errors
+
+    def validate_many(self, submissions):
+        """[(index, errors)] for the invalid ones among Apps Script style {formType, fields} dicts"""
+        invalid = []
+        for index, submission in enumerate(submissions):
+            errors = self.validate(submission.get('formType'), submission.get('fields'))
+            if errors:
+                invalid.append((index, errors))
+        return invalid
+
+
+_default = None
+
+
+def validate_submission(form_type, fields):
+    """Validate one submission against the built-in specs (compiled on first use)"""
+    global _default
+    if _default is None:
+        _default = Validator()
+    return _default.validate(form_type, fields)
+
+
+_worker = None
+
+
+def _init_worker():
+    global _worker
+    _worker = Validator()
+
+
+def _validate_chunk(chunk):
+    """Worker: validate (line number, raw line) pairs"""
+    results = []
+    for line_number, line in chunk:
+        try:
+            submission = json.loads(line)
+            if not isinstance(submission, dict):
+                raise ValueError(f"got {type(submission).__name__}")
+        except ValueError as error:
+            submission = {}
+            errors = [{'field': None, 'label': None, 'code': 'malformed', 'message': f"Not a JSON object: {error}"}]
+        else:
+            errors = _worker.validate(submission.get('formType'), submission.get('fields'))
+        if errors:
+            form_type, submission_id = submission.get('formType'), submission.get('submissionId')
+            results.append((line_number, form_type if isinstance(form_type, str) else None,
+                            submission_id if isinstance(submission_id, str) else None, errors))
+    return results
+
+
+def read_chunks(path, size=CHUNK_SIZE):
+    """(line number, line) pairs in chunks, skipping blank lines"""
+    chunk = []
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if line.strip():
+                chunk.append((line_number, line))
+                if len(chunk) == size:
+                    yield chunk
+                    chunk = []
+    if chunk:
+        yield chunk
+
+
+def validate_file(path, workers=1):
+    """Validate a JSONL file; return (lines checked, [(line, formType, submissionId, errors)])"""
+    checked = 0
+    invalid = []
+    if workers == 1:
+        _init_worker()
+        for chunk in read_chunks(path):
+            checked += len(chunk)
+            invalid.extend(_validate_chunk(chunk))
+        return checked, invalid
+
+    chunks = list(read_chunks(path))
+    checked = sum(len(chunk) for chunk in chunks)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        for results in pool.map(_validate_chunk, chunks):
+            invalid.extend(results)
+    return checked, invalid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate a JSONL file of {formType, fields} submissions")
+    parser.add_argument('path')
+    parser.add_argument('--json', action='store_true', help="print one JSON result per invalid line")
+    parser.add_argument('--workers', type=int, default=1, help="worker processes (default: 1)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    checked, invalid = validate_file(args.path, args.workers)
+    elapsed = time.perf_counter() - start
+
+    for line_number, form_type, submission_id, errors in invalid:
+        if args.json:
+            print(json.dumps({'line': line_number, 'formType': form_type, 'submissionId': submission_id,
+                              'errors': errors}))
+        else:
+            print(f"{os.path.basename(args.path)}:{line_number} {form_type or '?'} {submission_id or ''}".rstrip())
+            for error in errors:
+                print(f"    {error['code']}: {error['message']}")
+    print(f"Checked {checked:,} submissions in {elapsed:.2f} s ({checked / max(elapsed, 1e-9):,.0f}/s): "
+          f"{len(invalid):,} invalid", file=sys.stderr)
+    return 1 if invalid else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
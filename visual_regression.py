@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Wiley University - Business & Finance Website
+Visual regression check for the generated PDFs
+
+Rasterizes every page of forms/*.pdf at low resolution and compares it with
+the golden image in visual-goldens/. A page fails when more than a small
+share of its pixels differ noticeably; a diff image marking the changed
+pixels in red is written next to the cached rasters. Rasters are cached in
+.build-cache/raster/ by PDF content hash, so only PDFs that changed are
+rendered again, and pages are rendered in parallel. A golden that no
+rendered page matches (a form lost a page or was removed) fails the check;
+--update deletes it. So does a page with no golden, until --update adds one.
+Goldens carry their DPI in the name (expense-report-50dpi-p1.png), so a run
+at another --dpi has goldens of its own.
+
+Rendering uses pypdfium2 when installed, else poppler's pdftoppm; comparing
+needs Pillow.
+
+    python3 visual_regression.py --update     # accept the current PDFs as goldens
+    python3 visual_regression.py              # compare
+    python3 visual_regression.py expense-report.pdf --threshold 0.002
+"""
+
+import argparse
+import glob
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image, ImageChops
+except ImportError:
+    Image = None
+
+try:
+    import pypdfium2
+except ImportError:
+    pypdfium2 = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FORMS_DIR = os.path.join(BASE_DIR, 'forms')
+GOLDEN_DIR = os.path.join(BASE_DIR, 'visual-goldens')
+CACHE_DIR = os.path.join(BASE_DIR, '.build-cache', 'raster')
+
+DPI = 50
+PIXEL_TOLERANCE = 48       # grey levels a pixel may move before it counts as changed (antialiasing)
+DIFF_THRESHOLD = 0.001     # share of changed pixels that fails a page
+
+PAGE_PATTERN = re.compile(rb'/Type\s*/Page\b(?!s)')
+
+
+def renderer():
+    """Name of the available rasterizer, or None"""
+    if pypdfium2 is not None:
+        return 'pypdfium2'
+    if shutil.which('pdftoppm'):
+        return 'pdftoppm'
+    return None
+
+
+def pdf_digest(path):
+    """Content hash of a PDF and its page count"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return hashlib.sha256(data).hexdigest()[:16], len(PAGE_PATTERN.findall(data))
+
+
+def raster_path(digest, page, dpi):
+    return os.path.join(CACHE_DIR, f"{digest}-{dpi}-p{page + 1}.png")
+
+
+def render_page(task):
+    """Render one page to the raster cache (worker); return (cache path, cached)"""
+    pdf_path, digest, page, dpi = task
+    out_path = raster_path(digest, page, dpi)
+    if os.path.exists(out_path):
+        return out_path, True
+
+    tmp_path = f"{out_path}.{os.getpid()}.tmp.png"
+    if pypdfium2 is not None:
+        document = pypdfium2.PdfDocument(pdf_path)
+        try:
+            document.init_forms()
+            bitmap = document[page].render(scale=dpi / 72, grayscale=True, may_draw_forms=True)
+            bitmap.to_pil().convert('L').save(tmp_path, optimize=True)
+        finally:
+            document.close()
+    else:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            prefix = os.path.join(tmp_dir, 'page')
+            subprocess.run(['pdftoppm', '-r', str(dpi), '-f', str(page + 1), '-l', str(page + 1),
+                            '-gray', '-png', '-singlefile', pdf_path, prefix], check=True)
+            shutil.move(prefix + '.png', tmp_path)
+    os.replace(tmp_path, out_path)
+    return out_path, False
+
+
+GOLDEN_NAME = re.compile(r'(.+)-(\d+)dpi-p(\d+)\.png')
+
+
+def golden_path(pdf_name, page, dpi=DPI):
+    return os.path.join(GOLDEN_DIR, f"{os.path.splitext(pdf_name)[0]}-{dpi}dpi-p{page + 1}.png")
+
+
+def stale_goldens(pdf_names, matched, all_forms, dpi=DPI):
+    """[(pdf name, page, path)] of goldens at dpi no rendered page matched, for pdf_names (or any form)"""
+    stems = {os.path.splitext(name)[0] for name in pdf_names}
+    stale = []
+    for path in sorted(glob.glob(os.path.join(GOLDEN_DIR, '*.png'))):
+        match = GOLDEN_NAME.fullmatch(os.path.basename(path))
+        if not match or int(match.group(2)) != dpi or path in matched or not (all_forms or match.group(1) in stems):
+            continue
+        stale.append((f"{match.group(1)}.pdf", int(match.group(3)) - 1, path))
+    return stale
+
+
+def compare(current_path, golden, diff_path, tolerance=PIXEL_TOLERANCE):
+    """Share of pixels that differ by more than tolerance (1.0 if the page size changed)"""
+    with Image.open(current_path) as current, Image.open(golden) as expected:
+        current, expected = current.convert('L'), expected.convert('L')
+        if current.size != expected.size:
+            return 1.0
+        mask = ImageChops.difference(current, expected).point(lambda v: 255 if v > tolerance else 0)
+        changed = mask.histogram()[255]
+        if changed:
+            overlay = Image.merge('RGB', (current.point(lambda v: v // 2 + 128), current, current))
+            overlay.paste((220, 0, 0), mask=mask)
+            overlay.save(diff_path)
+    return changed / (current.size[0] * current.size[1])
+
+
+def page_tasks(pdf_paths, dpi):
+    """[(pdf path, digest, page, dpi)] for every page of every PDF"""
+    tasks = []
+    for path in pdf_paths:
+        digest, pages = pdf_digest(path)
+        tasks += [(path, digest, page, dpi) for page in range(pages)]
+    return tasks
+
+
+def run(pdf_paths, dpi=DPI, threshold=DIFF_THRESHOLD, update=False, workers=None, all_forms=True):
+    """Render and compare; return [(pdf name, page, status, changed share, cached)]
+
+    Goldens left over for pages that weren't rendered are 'stale' (deleted
+    with update). all_forms=False limits that to the forms in pdf_paths.
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tasks = page_tasks(pdf_paths, dpi)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        rendered = list(pool.map(render_page, tasks, chunksize=4))
+
+    results = []
+    matched = set()
+    if update:
+        os.makedirs(GOLDEN_DIR, exist_ok=True)
+    for (pdf_path, _, page, _), (current, cached) in zip(tasks, rendered):
+        name = os.path.basename(pdf_path)
+        golden = golden_path(name, page, dpi)
+        matched.add(golden)
+        if update:
+            shutil.copyfile(current, golden)
+            results.append((name, page, 'updated', 0.0, cached))
+        elif not os.path.exists(golden):
+            results.append((name, page, 'new', 0.0, cached))
+        else:
+            diff_path = os.path.join(CACHE_DIR, 'diffs', os.path.basename(golden))
+            os.makedirs(os.path.dirname(diff_path), exist_ok=True)
+            share = compare(current, golden, diff_path)
+            results.append((name, page, 'fail' if share > threshold else 'ok', share, cached))
+
+    for name, page, path in stale_goldens([os.path.basename(p) for p in pdf_paths], matched, all_forms, dpi):
+        if update:
+            os.remove(path)
+        results.append((name, page, 'deleted' if update else 'stale', 0.0, False))
+    return results
+
+
+def print_report(results, elapsed, dpi=DPI):
+    """Print failing pages and a summary"""
+    counts = {}
+    for name, page, status, share, _ in results:
+        counts[status] = counts.get(status, 0) + 1
+        if status == 'fail':
+            print(f"FAIL {name} page {page + 1}: {share:.2%} of pixels changed "
+                  f"(diff: {os.path.relpath(os.path.join(CACHE_DIR, 'diffs', os.path.basename(golden_path(name, page, dpi))))})")
+        elif status == 'new':
+            print(f"NEW  {name} page {page + 1}: no {dpi} DPI golden (run with --update to add it)")
+        elif status == 'stale':
+            print(f"GONE {name} page {page + 1}: golden matches no rendered page (run with --update to delete it)")
+    cached = sum(1 for result in results if result[4])
+    summary = ', '.join(f"{n} {status}" for status, n in sorted(counts.items()))
+    print(f"{len(results)} pages in {elapsed:.2f} s ({cached} rasters from cache): {summary}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare rendered PDF pages against golden images")
+    parser.add_argument('pdfs', nargs='*', help="PDF files or names in forms/ (default: all)")
+    parser.add_argument('--update', action='store_true', help="replace the goldens with the current rendering")
+    parser.add_argument('--dpi', type=int, default=DPI)
+    parser.add_argument('--threshold', type=float, default=DIFF_THRESHOLD,
+                        help=f"share of changed pixels that fails a page (default: {DIFF_THRESHOLD})")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    if Image is None:
+        sys.exit("Pillow is required (pip install pillow)")
+    if renderer() is None:
+        sys.exit("No PDF rasterizer found (pip install pypdfium2, or install poppler-utils)")
+
+    pdf_paths = [p if os.path.exists(p) else os.path.join(FORMS_DIR, p) for p in args.pdfs]
+    pdf_paths = pdf_paths or sorted(glob.glob(os.path.join(FORMS_DIR, '*.pdf')))
+    start = time.perf_counter()
+    results = run(pdf_paths, args.dpi, args.threshold, args.update, args.workers, all_forms=not args.pdfs)
+    print_report(results, time.perf_counter() - start, args.dpi)
+    return 1 if any(result[2] in ('fail', 'stale', 'new') for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())